@@ -1,169 +1,55 @@
-import sqlite3
+import argparse
+import atexit
+import logging
 from datetime import datetime
+from itertools import chain
+
+from connection import DEFAULT_PROFILE, PROFILES
+from crew_assignment import CrewAssigner, print_result
+from flight_service import FlightService
+from instrumentation import Instrumentation
+from render import DESTINATION_COLUMNS, FLIGHT_COLUMNS, PILOT_COLUMNS, SELECTION_COLUMNS, TableWriter
 
 
 class FlightManager:
-    # Table creation
-    pilots_table = """
-    CREATE TABLE IF NOT EXISTS Pilots (
-        PilotID INTEGER PRIMARY KEY,
-        FirstName TEXT NOT NULL,
-        LastName TEXT NOT NULL,
-        LicenseNumber TEXT UNIQUE NOT NULL
-    )
-    """
-
-    destinations_table = """
-    CREATE TABLE IF NOT EXISTS Destinations (
-        DestinationID INTEGER PRIMARY KEY,
-        AirportCode TEXT UNIQUE NOT NULL,
-        CityName TEXT NOT NULL,
-        Country TEXT NOT NULL,
-        TimeZone TEXT NOT NULL
-    )
-    """
-
-    flights_table = """
-    CREATE TABLE IF NOT EXISTS Flights (
-        FlightID INTEGER PRIMARY KEY,
-        FlightNumber TEXT NOT NULL,
-        Origin TEXT NOT NULL,
-        Destination TEXT NOT NULL,
-        DepartureTime DATETIME NOT NULL,
-        Status TEXT NOT NULL CHECK(Status IN ('Scheduled', 'Delayed', 'Cancelled', 'Completed')),
-        PilotID INTEGER,
-        FOREIGN KEY (PilotID) REFERENCES Pilots(PilotID)
-    )
-    """
-    #additional table added
-    deleted_destinations_table = """
-    CREATE TABLE IF NOT EXISTS DeletedDestinations (
-        DestinationID INTEGER PRIMARY KEY,
-        AirportCode TEXT NOT NULL,
-        CityName TEXT NOT NULL,
-        Country TEXT NOT NULL,
-        TimeZone TEXT NOT NULL
-    )
-    """
-
-    def __init__(self):
-
-        self.connect = sqlite3.connect("flights.db")
-        self.cursor = self.connect.cursor()
-        self.cursor.execute(self.pilots_table)
-        self.cursor.execute(self.destinations_table)
-        self.cursor.execute(self.flights_table)
-        self.cursor.execute(self.deleted_destinations_table)
-
-        #reduce the duplication of data and limit the sqlite integrity error
-        self.cursor.execute("SELECT COUNT(*) FROM Flights")
-        count = self.cursor.fetchone()[0]
-
-        if count == 0:
-
-
-            pilot_data = [
-                ("James", "Anderson", "LIC123456"),
-                ("Sarah", "Thompson", "LIC789012"),
-                ("Robert", "Williams", "LIC345678"),
-                ("Emily", "Johnson", "LIC901234"),
-                ("Michael", "Brown", "LIC567890")
-            ]
-
-            destination_data = [
-                ("LHR", "London", "United Kingdom", "GMT"),
-                ("JFK", "New York", "United States", "GMT-5"),
-                ("CDG", "Paris", "France", "GMT+1"),
-                ("DXB", "Dubai", "United Arab Emirates", "GMT+4"),
-                ("SYD", "Sydney", "Australia", "GMT+11")
-            ]
-
-            flight_data = [
-                ("BA101", "LHR", "JFK", "2025-02-01 08:30:00", "Scheduled", 1),
-                ("AF302", "CDG", "DXB", "2025-02-01 12:15:00", "Delayed", 2),
-                ("EK450", "DXB", "SYD", "2025-02-02 18:45:00", "Completed", 3),
-                ("AA789", "JFK", "LHR", "2025-02-03 09:00:00", "Cancelled", 4),
-                ("QF200", "SYD", "CDG", "2025-02-04 21:30:00", "Scheduled", 5)
-            ]
-
-            for pilot in pilot_data:
-                self.cursor.execute("INSERT INTO Pilots (FirstName, LastName, LicenseNumber) VALUES (?, ?, ?)",
-                                    pilot)
-
-            for dest in destination_data:
-                self.cursor.execute(
-                    "INSERT INTO Destinations (AirportCode, CityName, Country, TimeZone) VALUES (?, ?, ?, ?)",
-                    dest)
-
-            for flight in flight_data:
-                self.cursor.execute(
-                    "INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status, PilotID) VALUES (?, ?, ?, ?, ?, ?)",
-                    flight)
-
-        self.connect.commit()
+    # the console pauses after this many rows so large tables do not flood the terminal
+    page_size = 500
 
+    def __init__(self, database="flights.db", profile=DEFAULT_PROFILE, instrumentation=None):
 
+        # all database work goes through the headless service, this class only handles input and printing
+        self.service = FlightService(database, profile, instrumentation=instrumentation)
 
+    # the service opens the database on first use, not when the console starts
+    @property
+    def connect(self):
+        return self.service.connect
 
-    def view_all_flights(self):
-        # Join Flights and Pilots tables to get pilot names
-        self.cursor.execute("""
-                SELECT 
-                    f.FlightNumber, 
-                    f.Origin, 
-                    f.Destination, 
-                    f.DepartureTime, 
-                    f.Status,
-                    CASE 
-                        WHEN p.FirstName IS NULL THEN 'NO PILOT ASSIGNED'
-                        ELSE p.FirstName || ' ' || p.LastName 
-                    END as PilotName
-                FROM Flights f
-                LEFT JOIN Pilots p ON f.PilotID = p.PilotID
-            """)
-        all_flights = self.cursor.fetchall()
-
-        print("\nAll Flight Information:")
-        print("-" * 85)
-        print(f"{'Flight #':<10} {'From':<10} {'To':<10} {'Departure':<20} {'Status':<10} {'Pilot':<20}")
-        print("-" * 85)
-        #template to view in table format
-        for flight in all_flights:
-            pilot_name = flight[5] if flight[5] else "No Pilot Assigned"
-            print(f"{flight[0]:<10} {flight[1]:<10} {flight[2]:<10} {flight[3]:<20} {flight[4]:<10} {pilot_name:<20}")
+    @property
+    def cursor(self):
+        return self.service.cursor
 
-        print("-" * 85)
+    # every listing goes through one writer: columns sized from the first page, one write per page
+    def listing(self, columns, title, rows, rule_width=85):
+        writer = TableWriter(columns, block_rows=self.page_size, rule_width=rule_width)
+        writer.write(rows, title, self.continue_listing)
 
+    # asked after every full page of a listing
+    def continue_listing(self, count):
+        if count % self.page_size != 0:
+            return True
+        return input(f"-- {count} rows shown, press Enter for more or Q to stop: ").upper() != 'Q'
 
 
-    def view_all_pilots(self):
-        self.cursor.execute("""
-            SELECT 
-                p.PilotID,
-                p.FirstName,
-                p.LastName,
-                p.LicenseNumber,
-                CASE 
-                    WHEN EXISTS (
-                        SELECT 1 FROM Flights f 
-                        WHERE f.PilotID = p.PilotID 
-                        AND f.Status IN ('Scheduled', 'Delayed')
-                    ) THEN 'NOT AVAILABLE'
-                    ELSE 'AVAILABLE'
-                END as Status
-            FROM Pilots p
-        """)
-        pilots = self.cursor.fetchall()
-
-        print("\nAll Pilots Information:")
-        print("-" * 85)
-        print(f"{'ID':<5} {'First Name':<15} {'Last Name':<15} {'License':<15} {'Status':<20}")
-        print("-" * 85)
 
-        for pilot in pilots:
-            print(f"{pilot[0]:<5} {pilot[1]:<15} {pilot[2]:<15} {pilot[3]:<15} {pilot[4]:<20}")
+    def view_all_flights(self):
+        #template to view in table format
+        self.listing(FLIGHT_COLUMNS, "All Flight Information", self.service.find_flights(page_size=self.page_size))
 
-        print("-" * 85)
+
+
+    def view_all_pilots(self):
+        self.listing(PILOT_COLUMNS, "All Pilots Information", self.service.list_pilots(page_size=self.page_size))
 
 
 
@@ -174,12 +60,12 @@ class FlightManager:
         country = input("Enter country: ")
         timezone = input("Enter timezone (e.g., GMT+1): ")
 
-        # format into capital letters and noun (first letter capitalised)
-        self.cursor.execute("""
-            INSERT INTO Destinations (AirportCode, CityName, Country, TimeZone) 
-            VALUES (?, ?, ?, ?)""", (airport.upper(), city.title(), country.title(), timezone.upper()))
+        try:
+            self.service.add_destination(airport, city, country, timezone)
+        except ValueError as error:
+            print(error)
+            return
 
-        self.connect.commit()
         print("Destination added! Please find your added flight on the table below: ")
         self.view_destination()
 
@@ -188,107 +74,51 @@ class FlightManager:
         selection = input("Please choose a DESTINATION airport code you would like to remove (e.g. LHR): ")
         deletion = selection.upper()
 
-        self.cursor.execute("""
-                SELECT COUNT(*) FROM Flights 
-                WHERE Destination = ? AND Status NOT IN ('Completed', 'Cancelled')
-            """, (selection,))
-
-        flights_count = self.cursor.fetchone()[0]
+        flights_count, complete_cancel_count = self.service.destination_flight_counts(deletion)
 
         if flights_count > 0:
             print(f"Error: Destination '{selection}' cannot be deleted as it has active flights.")
 
-        elif flights_count == 0:
-            self.cursor.execute("""
-                           SELECT COUNT(*) FROM Flights 
-                           WHERE Destination = ? AND (Status = 'Completed' OR Status = 'Cancelled')
-                       """, (selection,))
-            complete_cancel_count = self.cursor.fetchone()[0]
-
-            if complete_cancel_count >0:
-                confirm = input("Please enter \"CHECK\" to view all flight data and to then update the route: ")
-                if confirm.upper() == "CHECK":
-                    print("Here are all the flights:")
-                    self.view_all_flights()
-                    choice = input("Would you like to proceed? Enter Y for yes or N for no: ")
-                    if choice.upper() == 'Y':
-                        self.deleted_table_insertion(deletion)
-                        self.cursor.execute(""" DELETE FROM Destinations WHERE AirportCode = ?""", (deletion,))
-                        self.connect.commit()
+        elif complete_cancel_count > 0:
+            confirm = input("Please enter \"CHECK\" to view all flight data and to then update the route: ")
+            if confirm.upper() == "CHECK":
+                print("Here are all the flights:")
+                self.view_all_flights()
+                choice = input("Would you like to proceed? Enter Y for yes or N for no: ")
+                if choice.upper() == 'Y':
+                    if self.delete_destination(deletion):
                         print("Destination now deleted! Here are all the available destinations & flights:")
                         self.view_destination()
 
-                    else:
-                        self.remove_destination()
-
+                else:
+                    self.remove_destination()
+                    return
 
-
-            else:
-                self.deleted_table_insertion(deletion)
-                self.cursor.execute(""" DELETE FROM Destinations WHERE AirportCode = ?""", (deletion,))
-                self.connect.commit()
+        else:
+            if self.delete_destination(deletion):
                 print("Destination now deleted! Here are all the available destinations")
                 self.view_destination()
 
-
-        self.update_flight_data()
         self.view_all_flights()
-    #method added to stop the deletion of the airport code where flights are in transit
-    def update_flight_data(self):
-        self.cursor.execute("""
-            UPDATE Flights 
-            SET Destination = '-'
-            WHERE Destination NOT IN (
-                SELECT AirportCode 
-                FROM Destinations
-            )
-            AND (Status IN ('Completed', 'Cancelled') OR Status IS NULL)
-        """)
-        self.connect.commit()
-
 
-
-    def deleted_table_insertion(self, airport_code):
-        self.cursor.execute("""
-                INSERT INTO DeletedDestinations (AirportCode, CityName, Country, TimeZone)
-                SELECT AirportCode, CityName, Country, TimeZone 
-                FROM Destinations 
-                WHERE AirportCode = ?
-            """, (airport_code,))
-
-        self.connect.commit()
+    def delete_destination(self, airport_code):
+        try:
+            self.service.remove_destination(airport_code)
+        except ValueError as error:
+            print(error)
+            return False
+        return True
 
 
 
     def view_destination(self):
-        self.cursor.execute(''' SELECT * FROM Destinations''')
-        all_updated_destinations = self.cursor.fetchall()
-
-        print("\nAll Available Destinations Information:")
-        print("-" * 85)
-        print(f"{'ID#':<10} {'Code':<10} {'City':<20} {'Country':<20} {'Timezone':<10}")
-        print("-" * 85)
-
-        for destination in all_updated_destinations:
-
-            print(f"{destination[0]:<10} {destination[1]:<10} {destination[2]:<20} {destination[3]:<20} {destination[4]:<10}")
-
-        print("-" * 85)
+        self.listing(DESTINATION_COLUMNS, "All Available Destinations Information",
+                     self.service.list_destinations(page_size=self.page_size))
 
 
     def view_deleted_destinations(self):
-        self.cursor.execute('''SELECT * FROM DeletedDestinations''')
-        deleted_destinations = self.cursor.fetchall()
-
-        print("\nDeleted Destinations:")
-        print("-" * 100)
-        print(f"{'ID#':<10} {'Code':<10} {'City':<20} {'Country':<20} {'Timezone':<10} ")
-        print("-" * 100)
-
-        for dest in deleted_destinations:
-            print(f"{dest[0]:<10} {dest[1]:<10} {dest[2]:<20} {dest[3]:<20} {dest[4]:<10} ")
-
-        print("-" * 100)
+        self.listing(DESTINATION_COLUMNS, "Deleted Destinations",
+                     self.service.list_deleted_destinations(page_size=self.page_size), rule_width=100)
 
 
 
@@ -302,18 +132,15 @@ class FlightManager:
             license_num = input("Enter license number (e.g. LIC123456): ")
 
             #logic to check if pilot already in data assuming all licensce numbers are unique
-            self.cursor.execute(""" SELECT COUNT (*) FROM Pilots WHERE LicenseNumber = ?""", (license_num,))
-            count = self.cursor.fetchone()[0]
-            if count>0:
+            try:
+                self.service.add_pilot(first, last, license_num)
+            except ValueError:
                 print("Pilot license number already exists, please try again!")
                 continue
 
-            self.cursor.execute("""
-                   INSERT INTO Pilots (FirstName, LastName, LicenseNumber) 
-                   VALUES (?, ?, ?)""", (first.title(), last.title(), license_num.upper()))
-            self.connect.commit()
             print("Pilot added! Here is the updated list of all pilots")
             self.view_all_pilots()
+            break
 
 
 
@@ -324,8 +151,7 @@ class FlightManager:
         # Check flight number doesnt already exist
         while True:
             flight_num = input("Enter new flight number (e.g. BA123): ").upper()
-            self.cursor.execute("SELECT COUNT(*) FROM Flights WHERE FlightNumber = ?", (flight_num,))
-            if self.cursor.fetchone()[0] > 0:
+            if self.service.flight_number_exists(flight_num):
                 print("Flight number already exists. Please try again.")
             else:
                 break
@@ -336,8 +162,7 @@ class FlightManager:
 
         while True:
             origin = input("Enter origin airport code from above (e.g. LHR): ").upper()
-            self.cursor.execute("SELECT COUNT(*) FROM Destinations WHERE AirportCode = ?", (origin,))
-            if self.cursor.fetchone()[0] == 0:
+            if not self.service.airport_exists(origin):
                 print("Origin airport does not exist in our listings. Please try again.")
             else:
                 break
@@ -348,8 +173,7 @@ class FlightManager:
                 print("Destination cannot be the same as origin!")
                 continue
 
-            self.cursor.execute("SELECT COUNT(*) FROM Destinations WHERE AirportCode = ?", (destination,))
-            if self.cursor.fetchone()[0] == 0:
+            if not self.service.airport_exists(destination):
                 print("Destination airport does not exist in our listings. Please try again.")
             else:
                 break
@@ -363,18 +187,19 @@ class FlightManager:
         self.view_all_pilots()
 
         #select pilot
-        pilot_id = self.select_available_pilot_only(departure)
+        pilot_id = self.select_available_pilot_only(departure, origin)
         if pilot_id is None:
             print("Flight creation cancelled")
             return
 
         # Insert the new flight
-        self.cursor.execute("""
-            INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status, PilotID) 
-            VALUES (?, ?, ?, ?, 'Scheduled', ?)
-        """, (flight_num, origin, destination, departure, pilot_id))
+        try:
+            self.service.create_flight(flight_num, origin, destination, departure, pilot_id)
+        except ValueError as error:
+            print(error)
+            print("Flight creation cancelled")
+            return
 
-        self.connect.commit()
         print("Flight added! Here are all current flights:")
         self.view_all_flights()
 
@@ -388,18 +213,20 @@ class FlightManager:
         # check if flight number exists
         while True:
             flight_number = input("\nEnter Flight Number to change (e.g. XX123): ").upper()
-            self.cursor.execute("SELECT COUNT(*) FROM Flights WHERE FlightNumber = ?", (flight_number,))
-            if self.cursor.fetchone()[0] > 0:
+            current = self.service.get_flight(flight_number)
+            if current is not None:
                 break
             print("Flight number not found. Please try again.")
 
+        # changes are collected and written together at the end
+        changes = {}
+
         # change flight number
         if input("Do you want to change the Flight Number? (Y/N): ").upper() == 'Y':
             while True:
                 new_number = input("New flight number: ").upper()
                 if 2 <= len(new_number) <= 6:  # Basic validation
-                    self.cursor.execute("UPDATE Flights SET FlightNumber = ? WHERE FlightNumber = ?",(new_number, flight_number))
-                    flight_number = new_number  # Update reference for subsequent changes
+                    changes["flight_number"] = new_number
                     break
                 print("Flight number must be 2-6 characters.") #change so its 2 letters followed by 4 numbers
 
@@ -409,9 +236,8 @@ class FlightManager:
             self.view_destination()
             while True:
                 new_origin = input("New origin airport code: ").upper()
-                self.cursor.execute("SELECT COUNT(*) FROM Destinations WHERE AirportCode = ?", (new_origin,))
-                if self.cursor.fetchone()[0] > 0:
-                    self.cursor.execute("UPDATE Flights SET Origin = ? WHERE FlightNumber = ?",(new_origin, flight_number))
+                if self.service.airport_exists(new_origin):
+                    changes["origin"] = new_origin
                     break
                 print("Airport code not found. Please choose from the list above.")
 
@@ -421,29 +247,25 @@ class FlightManager:
             self.view_destination()
             while True:
                 new_dest = input("New destination airport code: ").upper()
-                self.cursor.execute("SELECT COUNT(*) FROM Destinations WHERE AirportCode = ?", (new_dest,))
-                if self.cursor.fetchone()[0] > 0:
-                    self.cursor.execute("UPDATE Flights SET Destination = ? WHERE FlightNumber = ?",
-                                        (new_dest, flight_number))
+                if self.service.airport_exists(new_dest):
+                    changes["destination"] = new_dest
                     break
                 print("Airport code not found. Please choose from the list above.")
 
         # change departure time
         if input("Do you want to change Departure Time? (Y/N): ").upper() == 'Y':
-            new_time = self.get_datetime_input()
-            self.cursor.execute("UPDATE Flights SET DepartureTime = ? WHERE FlightNumber = ?",
-                                (new_time, flight_number))
+            changes["departure_time"] = self.get_datetime_input()
 
         # change pilot
         if input("Do you want to Change Pilot? (Y/N): ").upper() == 'Y':
-            # Get current flight's departure time again to apply to function
-            self.cursor.execute("SELECT DepartureTime FROM Flights WHERE FlightNumber = ?", (flight_number,))
-            departure_time = self.cursor.fetchone()[0]
+            # check against the new departure time when it is being changed as well
+            departure_time = changes.get("departure_time", current.departure_time)
 
-            new_pilot = self.select_available_pilot_only(departure_time)
+            # the flight being amended does not count against its own pilot
+            new_pilot = self.select_available_pilot_only(departure_time, changes.get("origin", current.origin),
+                                                         (current.flight_id,))
             if new_pilot is not None:
-                self.cursor.execute("UPDATE Flights SET PilotID = ? WHERE FlightNumber = ?",
-                                    (new_pilot, flight_number))
+                changes["pilot_id"] = new_pilot
 
         # change flight status
         if input("Change Flight Status? (Y/N): ").upper() == 'Y':
@@ -451,57 +273,83 @@ class FlightManager:
             while True:
                 new_status = input("Enter new status: ").title()
                 if new_status in ['Scheduled', 'Delayed', 'Cancelled', 'Completed']:
-                    self.cursor.execute("UPDATE Flights SET Status = ? WHERE FlightNumber = ?",
-                                        (new_status, flight_number))
+                    changes["status"] = new_status
                     break
                 print("Invalid status. Please choose from the list above.")
 
-        self.connect.commit()
+        try:
+            self.service.amend_flight(flight_number, changes)
+        except ValueError as error:
+            print(error)
+            print("Flight was not updated")
+            return
+
         print("\nFlight updated successfully! Updated flight details:")
-        self.cursor.execute("""
-            SELECT f.*, p.FirstName, p.LastName 
-            FROM Flights f 
-            LEFT JOIN Pilots p ON f.PilotID = p.PilotID 
-            WHERE f.FlightNumber = ?
-        """, (flight_number,))
         print("Here are the updated flights")
         self.view_all_flights()
 
-    def select_available_pilot_only (self, departure_time):
+    # departures or arrivals of one airport over the next hours, in the airport's local time
+    def view_board(self):
+        airport = input("Enter airport code (e.g. LHR): ").strip().upper()
+        arrivals = input("Departures or Arrivals? (D/A): ").strip().upper() == 'A'
+        start = input("From local time (YYYY-MM-DD HH:MM), blank for now: ").strip() or None
+        hours = input("Hours to show (default 6): ").strip()
+
+        try:
+            hours = float(hours) if hours else 6
+            board = self.service.arrival_board if arrivals else self.service.departure_board
+            flights = board(airport, start, hours)
+        except ValueError as error:
+            print(error)
+            return
+
+        print(f"\n{'Arrivals into' if arrivals else 'Departures from'} {airport} (local time):")
+        print("-" * 85)
+        print(f"{'Time':<20} {'Flight #':<10} {'From':<10} {'To':<10} {'Status':<10} {'Pilot':<20}")
+        print("-" * 85)
+        for flight in flights:
+            print(f"{flight.local_time:<20} {flight.flight_number:<10} {flight.origin:<10} {flight.destination:<10} "
+                  f"{flight.status:<10} {flight.pilot_name:<20}")
+        if not flights:
+            print("No flights in this window")
+        print("-" * 85)
+
+    # crews every unassigned Scheduled flight in one go, optionally limited to a departure window
+    def auto_assign_pilots(self):
+        departure_from = input("First departure to crew (YYYY-MM-DD HH:MM), blank for all: ").strip() or None
+        departure_to = input("Crew departures before (YYYY-MM-DD HH:MM), blank for all: ").strip() or None
+        dry_run = input("Preview without saving? (Y/N): ").strip().upper() == 'Y'
+
+        try:
+            result = CrewAssigner(self.connect).assign(departure_from, departure_to, dry_run=dry_run)
+        except ValueError as error:
+            print(error)
+            return
+
+        show = bool(result.unassignable) and input(
+            f"{len(result.unassignable)} flights could not be crewed, list them? (Y/N): ").strip().upper() == 'Y'
+        print_result(result, show)
+
+    def select_available_pilot_only (self, departure_time, origin, exclude_flights=()):
 
         print("\nCurrent Pilots:")
         self.view_all_pilots()
 
         while True:
-            pilot_id = input("Enter pilot ID from list above: ")
+            pilot_id = input("Enter pilot ID from list above: ").strip()
 
             # Check if pilot exists
-            self.cursor.execute("SELECT COUNT(*) FROM Pilots WHERE PilotID = ?", (pilot_id,))
-            if self.cursor.fetchone()[0] == 0:
+            if not pilot_id.isdigit() or not self.service.pilot_exists(int(pilot_id)):
                 print("Invalid pilot ID. Please try again.")
                 continue
+            pilot_id = int(pilot_id)
 
             # to check if pilot has conflicting flights
-            self.cursor.execute("""
-                SELECT COUNT(*) FROM Flights WHERE PilotID = ? 
-                AND Status IN ('Scheduled', 'Delayed')
-                AND (
-                    datetime(DepartureTime, '-12 hours') <= datetime(?)
-                    AND datetime(DepartureTime, '+12 hours') >= datetime(?)
-                )
-            """, (pilot_id, departure_time, departure_time))
-
-            if self.cursor.fetchone()[0] > 0:
+            if not self.service.pilot_is_available(pilot_id, departure_time, origin, exclude_flights):
                 print("Pilot is not available as they are flying 12 hours of this flight time: ")
-                self.cursor.execute("""
-                    SELECT FlightNumber, DepartureTime, Status FROM Flights WHERE PilotID = ? 
-                    AND Status IN ('Scheduled', 'Delayed')
-                    ORDER BY DepartureTime
-                """, (pilot_id,))
-                conflicts = self.cursor.fetchall()
                 print("\nPilot's current schedule:")
-                for flight in conflicts:
-                    print(f"Flight {flight[0]}: {flight[1]} ({flight[2]})")
+                for flight in self.service.pilot_schedule(pilot_id):
+                    print(f"Flight {flight.flight_number}: {flight.departure_time} ({flight.status})")
                 print("Would you like ti choose a different pilot.")
 
                 if input("(Y/N): ").upper() != 'Y':
@@ -542,49 +390,42 @@ class FlightManager:
         print("2. View flights via Origin airport")
         print("3. View flights via Destination")
         print("4. View flights via Status")
+        print("5. Combine several criteria")
+        print("6. Find destinations, pilots or flight numbers by partial text")
 
-        criteria = input("Please choose from the options 1-4: ")
+        criteria = input("Please choose from the options 1-6: ")
 
         if criteria == "1":
             while True:
                 flight_no = input("Please enter a flight number (e.g. BA123): ").upper()
-                self.cursor.execute("SELECT COUNT(*) FROM Flights WHERE FlightNumber = ?", (flight_no,))
-                count = self.cursor.fetchone()[0]
-                if count == 0:
+                flights = self.first_result(self.service.find_flights(flight_number=flight_no))
+                if flights is None:
                     print("Flight Number does not exist, please try again!")
                     continue
                 break
 
-            self.cursor.execute("SELECT * FROM Flights WHERE FlightNumber = ?", (flight_no,))
-            flights = self.cursor.fetchall()
             self.display_selection_results(flights)
 
         elif criteria == "2":
             while True:
                 origin = input("Please enter an origin airport code (e.g. LHR): ").upper()
-                self.cursor.execute("SELECT COUNT(*) FROM Flights WHERE Origin = ?", (origin,))
-                count = self.cursor.fetchone()[0]
-                if count == 0:
+                flights = self.first_result(self.service.find_flights(origin=origin))
+                if flights is None:
                     print("Origin does not exist in current flights, please try again!")
                     continue
                 break
 
-            self.cursor.execute("SELECT * FROM Flights WHERE Origin = ?", (origin,))
-            flights = self.cursor.fetchall()
             self.display_selection_results(flights)
 
         elif criteria == "3":
             while True:
                 destination = input("Please enter destination airport code (e.g. LHR): ").upper()
-                self.cursor.execute("SELECT COUNT(*) FROM Flights WHERE Destination = ?", (destination,))
-                count = self.cursor.fetchone()[0]
-                if count == 0:
+                flights = self.first_result(self.service.find_flights(destination=destination))
+                if flights is None:
                     print("Destination does not exist in current flights, please try again!")
                     continue
                 break
 
-            self.cursor.execute("SELECT * FROM Flights WHERE Destination = ?", (destination,))
-            flights = self.cursor.fetchall()
             self.display_selection_results(flights)
 
         elif criteria == "4":
@@ -594,37 +435,88 @@ class FlightManager:
             print("4. View all COMPLETED flights")
             choice = input("Please select an option (1-4): ")
 
-            if choice == "1":
-                self.cursor.execute("SELECT * FROM Flights WHERE Status = 'Scheduled'")
-            elif choice == "2":
-                self.cursor.execute("SELECT * FROM Flights WHERE Status = 'Delayed'")
-            elif choice == "3":
-                self.cursor.execute("SELECT * FROM Flights WHERE Status = 'Cancelled'")
-            elif choice == '4':
-                self.cursor.execute("SELECT * FROM Flights WHERE Status = 'Completed")
-            else:
+            statuses = {"1": "Scheduled", "2": "Delayed", "3": "Cancelled", "4": "Completed"}
+            if choice not in statuses:
                 print("Invalid option")
                 return
 
-            flights = self.cursor.fetchall()
-            self.display_selection_results(flights)
+            self.display_selection_results(self.service.find_flights(status=statuses[choice]))
+
+        elif criteria == "5":
+            self.combined_search()
+
+        elif criteria == "6":
+            self.text_search()
 
         else:
             print("Invalid option")
 
+    def combined_search(self):
+        print("Leave any criterion blank to match all flights.")
+        filters = {
+            "flight_number": input("Flight number: ").strip().upper() or None,
+            "origin": input("Origin airport code: ").strip().upper() or None,
+            "destination": input("Destination airport code: ").strip().upper() or None,
+            "statuses": input("Statuses, comma separated (e.g. Scheduled,Delayed): ").strip() or None,
+            "pilot_id": input("Pilot ID: ").strip() or None,
+            "departure_from": input("Departing from (YYYY-MM-DD HH:MM): ").strip() or None,
+            "departure_to": input("Departing before (YYYY-MM-DD HH:MM): ").strip() or None,
+        }
+        if filters["pilot_id"] is not None and not filters["pilot_id"].isdigit():
+            print("Invalid pilot ID")
+            return
+
+        try:
+            flights = self.service.find_flights(page_size=self.page_size, by_departure=True, **filters)
+        except ValueError as error:
+            print(error)
+            return
+        self.display_selection_results(flights)
+
+    # prefix matches on every word, e.g. "new yo" or "kowal"
+    def text_search(self):
+        text = input("Search for (city, country, airport code, pilot name or flight number): ")
+
+        destinations = self.service.search_destinations(text)
+        pilots = self.service.search_pilots(text)
+        flights = self.service.search_flight_numbers(text)
+        if not destinations and not pilots and not flights:
+            print("No matches found")
+            return
+
+        if destinations:
+            print("\nMatching Destinations:")
+            print("-" * 85)
+            for destination in destinations:
+                print(f"{destination.airport_code:<10} {destination.city_name:<20} {destination.country:<20} "
+                      f"{destination.timezone:<10}")
+        if pilots:
+            print("\nMatching Pilots:")
+            print("-" * 85)
+            for pilot in pilots:
+                print(f"{pilot.pilot_id:<5} {pilot.first_name:<15} {pilot.last_name:<15} "
+                      f"{pilot.license_number:<15} {pilot.availability:<20}")
+        if flights:
+            self.display_selection_results(flights)
+        else:
+            print("-" * 85)
+
+    # the first page of a search tells whether anything matched, no separate count query is needed;
+    # returns None when nothing did, otherwise an iterator over every result
+    def first_result(self, flights):
+        first = next(flights, None)
+        if first is None:
+            return None
+        return chain([first], flights)
+
     def display_selection_results(self, flights):
+        flights = self.first_result(iter(flights))
         #in case of search errors
-        if not flights:
+        if flights is None:
             print("No flights found")
             return
-        #print in table format
-        print("\nFlight Results:")
-        print("-" * 60)
-        print("FlightID  Number  From  To    Departure Time    Status")
-        print("-" * 60)
-        for flight in flights:
-            print(f"{flight[0]:<9} {flight[1]:<7} {flight[2]:<5} {flight[3]:<5} {flight[4]:<16} {flight[5]}")
-        print("-" * 60)
+        #print in table format, rows are written a page at a time as they are read
+        self.listing(SELECTION_COLUMNS, "Flight Results", flights, rule_width=60)
 
 
 
@@ -634,7 +526,22 @@ class FlightManager:
 
 
 def main():
-    db = FlightManager()
+    parser = argparse.ArgumentParser(description="Flight management console")
+    parser.add_argument("--database", default="flights.db", help="database file, or :memory: for a throwaway session")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--instrument", metavar="STATS_FILE",
+                        help="record query and method timings, added to STATS_FILE on exit")
+    parser.add_argument("--slow-ms", type=float, default=100.0, help="statements slower than this are logged")
+    parser.add_argument("--slow-log", help="file for the slow query log, stderr when not given")
+    args = parser.parse_args()
+
+    instrumentation = None
+    if args.instrument:
+        logging.basicConfig(filename=args.slow_log, format="%(asctime)s %(message)s")
+        instrumentation = Instrumentation(args.slow_ms)
+        atexit.register(instrumentation.save, args.instrument)
+
+    db = FlightManager(args.database, args.profile, instrumentation)
 #option menu
     while True:
         print("\nFlight Management API Menu:")
@@ -649,11 +556,13 @@ def main():
         print("8. Add New Flight Route")
         print("9. Amend Flight Route")
         print("10. Search for Flights via: ")
+        print("11. Departure / Arrival Board")
+        print("12. Auto-assign Pilots")
         print("-*-" * 6)
 
 
 
-        choice = input("Please choose an option(1-9): ")
+        choice = input("Please choose an option(1-12): ")
 
         if choice == "1":
             db.view_all_flights()
@@ -675,9 +584,13 @@ def main():
             db.amend_flight()
         elif choice == '10':
             db.search_flight_via_status()
+        elif choice == '11':
+            db.view_board()
+        elif choice == '12':
+            db.auto_assign_pilots()
         else:
-            print("Incorrect selection, please choose a number between 1-9")
+            print("Incorrect selection, please choose a number between 1-12")
 
 #allow code to run
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
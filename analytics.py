@@ -0,0 +1,233 @@
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:
+    # only this module needs numpy, the rest of the application runs without it
+    np = None
+
+from connection import DEFAULT_PROFILE, PROFILES
+from flight_service import VALID_STATUSES, FlightService, normalise_departure
+
+
+# statuses are counted by their position in VALID_STATUSES
+SCHEDULED, DELAYED, CANCELLED, COMPLETED = (VALID_STATUSES.index(status)
+                                            for status in ("Scheduled", "Delayed", "Cancelled", "Completed"))
+# retired destinations are stored as '-' and have no DestinationID
+NO_AIRPORT = -1
+NO_PILOT = -1
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("Analytics needs numpy, install it with: pip install numpy")
+
+
+def outcome_rates(counts):
+    # (completed, delayed, cancelled) shares from rows of counts by status. Completed and Cancelled are the only
+    # outcomes and are shares of the finished flights; a Delayed flight is still in progress, so delayed is its
+    # share of the flights yet to fly, Scheduled and Delayed
+    finished = np.maximum(counts[..., COMPLETED] + counts[..., CANCELLED], 1)
+    active = np.maximum(counts[..., SCHEDULED] + counts[..., DELAYED], 1)
+    return counts[..., COMPLETED] / finished, counts[..., DELAYED] / active, counts[..., CANCELLED] / finished
+
+
+class GroupCounts:
+    # flights per group key and status; chunks are merged into the totals as they arrive, so only one
+    # chunk and one row per group are ever in memory
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty((0, len(VALID_STATUSES)), dtype=np.int64)
+
+    def add(self, keys, statuses):
+        chunk_keys, inverse = np.unique(keys, return_inverse=True)
+        chunk_counts = np.bincount(inverse * len(VALID_STATUSES) + statuses,
+                                   minlength=len(chunk_keys) * len(VALID_STATUSES))
+        keys = np.concatenate([self.keys, chunk_keys])
+        counts = np.concatenate([self.counts, chunk_counts.reshape(-1, len(VALID_STATUSES))])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.zeros((len(self.keys), len(VALID_STATUSES)), dtype=np.int64)
+        np.add.at(self.counts, inverse, counts)
+
+    def rates(self):
+        # (flights, completed, delayed, cancelled) per key; flights counts every status
+        return (self.counts.sum(axis=1),) + outcome_rates(self.counts)
+
+
+class FlightAnalytics:
+    # completion, delay and cancellation rates per route, pilot and UTC day, computed over Flights in chunks of
+    # integer arrays: airports as their DestinationID, statuses as their VALID_STATUSES position
+    def __init__(self, connection, chunk_size=100000):
+        require_numpy()
+        self.connect = connection
+        self.cursor = self.connect.cursor()
+        self.chunk_size = chunk_size
+        self.airports = {NO_AIRPORT: "-"}
+        # route keys pack origin and destination into one integer below airport_base squared
+        self.airport_base = 1
+        self.routes = GroupCounts()
+        self.pilots = GroupCounts()
+        self.days = GroupCounts()
+        self.flights = 0
+
+    def load(self, departure_from=None, departure_to=None):
+        self.cursor.execute("SELECT DestinationID, AirportCode FROM Destinations")
+        self.airports.update(self.cursor.fetchall())
+        self.airport_base = max(self.airports) + 2
+
+        status_code = " ".join(f"WHEN '{status}' THEN {code}" for code, status in enumerate(VALID_STATUSES))
+        # a departure time sqlite cannot read has no epoch and so no day, it is left out of every report
+        conditions, params = ["f.DepartureUTCEpoch IS NOT NULL"], []
+        if departure_from is not None:
+            conditions.append("f.DepartureTime >= ?")
+            params.append(normalise_departure(departure_from))
+        if departure_to is not None:
+            conditions.append("f.DepartureTime < ?")
+            params.append(normalise_departure(departure_to))
+        where = f"WHERE {' AND '.join(conditions)}"
+
+        # a separate cursor, so the chunks stream while self.cursor stays free
+        rows = self.connect.cursor()
+        rows.execute(f"""
+            SELECT
+                COALESCE(o.DestinationID, {NO_AIRPORT}),
+                COALESCE(d.DestinationID, {NO_AIRPORT}),
+                f.DepartureUTCEpoch / 86400,
+                CASE f.Status {status_code} END,
+                COALESCE(f.PilotID, {NO_PILOT})
+            FROM Flights f
+            LEFT JOIN Destinations o ON o.AirportCode = f.Origin
+            LEFT JOIN Destinations d ON d.AirportCode = f.Destination
+            {where}
+        """, params)
+        while True:
+            chunk = rows.fetchmany(self.chunk_size)
+            if not chunk:
+                break
+            self.add_chunk(np.array(chunk, dtype=np.int64))
+        return self
+
+    def add_chunk(self, chunk):
+        origins, destinations, days, statuses, pilots = chunk.T
+        self.routes.add((origins + 1) * self.airport_base + destinations + 1, statuses)
+        self.pilots.add(pilots, statuses)
+        self.days.add(days, statuses)
+        self.flights += len(chunk)
+
+    def route_rates(self, top=20):
+        flights, completed, delayed, cancelled = self.routes.rates()
+        order = np.argsort(-flights, kind="stable")[:top]
+        origins, destinations = np.divmod(self.routes.keys[order], self.airport_base)
+        return [(self.airports.get(int(origin) - 1, "?"), self.airports.get(int(destination) - 1, "?"),
+                 int(flights[index]), float(completed[index]), float(delayed[index]), float(cancelled[index]))
+                for origin, destination, index in zip(origins, destinations, order)]
+
+    def pilot_rates(self, top=20):
+        flights, completed, delayed, cancelled = self.pilots.rates()
+        order = np.argsort(-flights, kind="stable")[:top]
+        pilot_ids = [int(key) for key in self.pilots.keys[order] if key != NO_PILOT]
+        names = {}
+        if pilot_ids:
+            self.cursor.execute(f"SELECT PilotID, FirstName || ' ' || LastName FROM Pilots "
+                                f"WHERE PilotID IN ({', '.join('?' * len(pilot_ids))})", pilot_ids)
+            names.update(self.cursor.fetchall())
+        return [(int(self.pilots.keys[index]), names.get(int(self.pilots.keys[index]), "No Pilot Assigned"),
+                 int(flights[index]), float(completed[index]), float(delayed[index]), float(cancelled[index]))
+                for index in order]
+
+    def daily_rates(self, window=7, last=30):
+        # every UTC calendar day in range, days without flights included, with rates over the trailing window
+        if window < 1:
+            raise ValueError("The rolling window must be at least 1 day.")
+        if not len(self.days.keys):
+            return []
+        first, last_day = int(self.days.keys[0]), int(self.days.keys[-1])
+        counts = np.zeros((last_day - first + 1, len(VALID_STATUSES)), dtype=np.int64)
+        counts[self.days.keys - first] = self.days.counts
+        flights = counts.sum(axis=1)
+        totals = np.cumsum(np.vstack([np.zeros((1, len(VALID_STATUSES)), dtype=np.int64), counts]), axis=0)
+        window = min(window, len(counts))
+        _, rolling_delayed, rolling_cancelled = outcome_rates(totals[window:] - totals[:-window])
+        # the rolling rates start once a full window of days is available
+        offset = window - 1
+        start = max(len(counts) - last, offset)
+        _, delayed, cancelled = outcome_rates(counts)
+        return [(date(1970, 1, 1) + timedelta(days=first + day), int(flights[day]),
+                 float(delayed[day]), float(cancelled[day]),
+                 float(rolling_delayed[day - offset]), float(rolling_cancelled[day - offset]))
+                for day in range(start, len(counts))]
+
+
+def print_route_report(analytics, top):
+    print(f"\nBusiest Routes ({analytics.flights:,} flights):")
+    print("-" * 85)
+    print(f"{'From':<10} {'To':<10} {'Flights':>10} {'Completed':>12} {'Delayed':>12} {'Cancelled':>12}")
+    print("-" * 85)
+    for origin, destination, flights, completed, delayed, cancelled in analytics.route_rates(top):
+        print(f"{origin:<10} {destination:<10} {flights:>10,} {completed:>12.1%} {delayed:>12.1%} {cancelled:>12.1%}")
+    print("-" * 85)
+
+
+def print_pilot_report(analytics, top):
+    print("\nBusiest Pilots:")
+    print("-" * 85)
+    print(f"{'ID':<5} {'Pilot':<24} {'Flights':>10} {'Completed':>12} {'Delayed':>12} {'Cancelled':>12}")
+    print("-" * 85)
+    for pilot_id, name, flights, completed, delayed, cancelled in analytics.pilot_rates(top):
+        pilot_id = "-" if pilot_id == NO_PILOT else pilot_id
+        print(f"{pilot_id:<5} {name:<24} {flights:>10,} {completed:>12.1%} {delayed:>12.1%} {cancelled:>12.1%}")
+    print("-" * 85)
+
+
+def print_daily_report(analytics, window, last):
+    print(f"\nDaily Operations, UTC days (last {last} days, rolling {window} day rates):")
+    print("-" * 85)
+    print(f"{'Date':<12} {'Flights':>8} {'Delayed':>10} {'Cancelled':>10} "
+          f"{f'{window}d Delayed':>18} {f'{window}d Cancelled':>18}")
+    print("-" * 85)
+    for day, flights, delayed, cancelled, rolling_delayed, rolling_cancelled in analytics.daily_rates(window, last):
+        print(f"{day.isoformat():<12} {flights:>8,} {delayed:>10.1%} {cancelled:>10.1%} "
+              f"{rolling_delayed:>18.1%} {rolling_cancelled:>18.1%}")
+    print("-" * 85)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Completion, delay and cancellation rates per route, pilot and day")
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--report", nargs="+", default=["routes", "pilots", "daily"],
+                        choices=["routes", "pilots", "daily"])
+    parser.add_argument("--top", type=int, default=20, help="routes and pilots to show, busiest first")
+    parser.add_argument("--days", type=int, default=30, help="days to show in the daily report, latest last")
+    parser.add_argument("--window", type=int, default=7, help="days in the rolling rates")
+    parser.add_argument("--from", dest="departure_from", help="first departure time to include, e.g. 2025-01-01")
+    parser.add_argument("--to", dest="departure_to", help="include departures before this time")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="rows read into memory at a time")
+    args = parser.parse_args()
+    if args.window < 1:
+        parser.error("--window must be at least 1")
+
+    try:
+        require_numpy()
+    except RuntimeError as error:
+        print(error)
+        sys.exit(1)
+
+    service = FlightService(args.database, args.profile)
+    start = time.perf_counter()
+    analytics = FlightAnalytics(service.connect, args.chunk_size).load(args.departure_from, args.departure_to)
+    print(f"Analysed {analytics.flights:,} flights in {time.perf_counter() - start:.2f}s")
+
+    if "routes" in args.report:
+        print_route_report(analytics, args.top)
+    if "pilots" in args.report:
+        print_pilot_report(analytics, args.top)
+    if "daily" in args.report:
+        print_daily_report(analytics, args.window, args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from connection import DEFAULT_PROFILE, PROFILES
+from flight_service import FlightService, normalise_departure
+
+
+class ArchiveResult:
+    def __init__(self, cutoff):
+        self.cutoff = cutoff
+        self.moved = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def __str__(self):
+        return (f"Before {self.cutoff:<20} {self.moved:>10} moved {self.batches:>6} batches "
+                f"{self.seconds:>8.2f}s")
+
+
+class FlightArchiver:
+    # moves Completed and Cancelled flights that departed before a cutoff from Flights into the Flights table of an
+    # attached archive database, oldest first, one transaction per batch, so the live table keeps only the flights
+    # still being worked on and readers are never blocked for long
+    def __init__(self, service, archive_path="flights_archive.db", batch_size=5000):
+        self.service = service
+        self.connect = service.connect
+        self.cursor = self.connect.cursor()
+        self.batch_size = batch_size
+        self.columns = service.attach_archive(archive_path)
+
+    def archive(self, cutoff, max_flights=None):
+        result = ArchiveResult(normalise_departure(cutoff))
+        start = time.perf_counter()
+        while max_flights is None or result.moved < max_flights:
+            batch_size = self.batch_size if max_flights is None else min(self.batch_size, max_flights - result.moved)
+            with self.connect:
+                self.connect.execute("BEGIN IMMEDIATE")
+                # the newest flight is never moved, so new FlightIDs keep counting up from it and never repeat
+                # an archived one
+                self.cursor.execute("""
+                    SELECT FlightID FROM main.Flights
+                    WHERE DepartureTime < ? AND Status IN ('Completed', 'Cancelled')
+                    AND FlightID < (SELECT MAX(FlightID) FROM main.Flights)
+                    ORDER BY DepartureTime
+                    LIMIT ?
+                """, (result.cutoff, batch_size))
+                batch = json.dumps([row[0] for row in self.cursor.fetchall()])
+                if batch == "[]":
+                    break
+                # in WAL mode a commit is atomic per database file only; a batch copied but not deleted
+                # before a crash is copied again over itself by the next run
+                self.cursor.execute(f"""
+                    INSERT OR REPLACE INTO archive.Flights ({self.columns}, ArchivedAt)
+                    SELECT {self.columns}, datetime('now') FROM main.Flights
+                    WHERE FlightID IN (SELECT value FROM json_each(?))
+                """, (batch,))
+                self.cursor.execute("DELETE FROM main.Flights WHERE FlightID IN (SELECT value FROM json_each(?))",
+                                    (batch,))
+                result.moved += self.cursor.rowcount
+                result.batches += 1
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def counts(self):
+        self.cursor.execute("SELECT (SELECT COUNT(*) FROM main.Flights), (SELECT COUNT(*) FROM archive.Flights)")
+        return self.cursor.fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move finished flights older than a cutoff into an archive database")
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--archive", default="flights_archive.db", help="archive database, created if missing")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    cutoff = parser.add_mutually_exclusive_group()
+    cutoff.add_argument("--before", help="archive flights that departed before this time, e.g. 2025-06-01")
+    cutoff.add_argument("--older-than", type=float, default=90,
+                        help="archive flights that departed more than this many days ago, default 90")
+    parser.add_argument("--batch-size", type=int, default=5000, help="flights moved per transaction")
+    parser.add_argument("--max-flights", type=int, help="stop after moving this many flights")
+    parser.add_argument("--vacuum", action="store_true", help="reclaim the freed pages of the live database afterwards")
+    args = parser.parse_args()
+
+    before = args.before or datetime.now() - timedelta(days=args.older_than)
+    service = FlightService(args.database, args.profile)
+    archiver = FlightArchiver(service, args.archive, args.batch_size)
+    result = archiver.archive(before, args.max_flights)
+    live, archived = archiver.counts()
+    if args.vacuum and result.moved:
+        service.connect.execute("VACUUM main")
+
+    print("\nArchive Summary:")
+    print("-" * 85)
+    print(result)
+    print(f"{live:,} flights live in {args.database} ({os.path.getsize(args.database) / 1024 / 1024:,.1f} MB), "
+          f"{archived:,} in {args.archive}")
+    print("-" * 85)
+
+
+if __name__ == "__main__":
+    main()
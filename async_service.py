@@ -0,0 +1,181 @@
+import asyncio
+import types
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from connection_pool import ConnectionPool
+from flight_service import FlightService
+
+
+def frozen(value):
+    # a hashable stand-in for a read's arguments, so a list of pilot ids or statuses can key the in-flight reads
+    if isinstance(value, (list, tuple)):
+        return tuple(frozen(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(frozen(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((name, frozen(item)) for name, item in value.items()))
+    return value
+
+
+class AsyncFlightService:
+    # asyncio front end over FlightService: reads run on a bounded thread pool of pooled read connections,
+    # writes run one at a time on the pool's single writer, so the event loop never waits on sqlite
+    def __init__(self, database="flights.db", max_readers=8):
+        self.pool = ConnectionPool(database, max_readers)
+        self.read_executor = ThreadPoolExecutor(max_readers, thread_name_prefix="flight-read")
+        self.write_executor = ThreadPoolExecutor(1, thread_name_prefix="flight-write")
+        # every read holds a slot while it has a connection, so executor threads never block waiting for one
+        self.read_slots = asyncio.Semaphore(max_readers)
+        # identical reads already running, later callers await the same task instead of querying again
+        self.inflight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self.inflight:
+            await asyncio.gather(*self.inflight.values(), return_exceptions=True)
+        self.read_executor.shutdown(wait=True)
+        self.write_executor.shutdown(wait=True)
+        self.pool.close()
+
+    def run_read(self, method, args, kwargs, limit):
+        with self.pool.reader() as service:
+            result = getattr(service, method)(*args, **kwargs)
+            # lazy results are read before the connection goes back to the pool, and shared results stay immutable
+            if isinstance(result, types.GeneratorType):
+                result = tuple(islice(result, limit))
+            elif isinstance(result, list):
+                result = tuple(result)
+            return result
+
+    async def read_task(self, method, args, kwargs, limit):
+        async with self.read_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.read_executor, self.run_read, method, args, kwargs, limit)
+
+    # limit caps how many rows of a listing are read, use the stream_* methods for whole tables
+    async def read(self, method, *args, limit=None, **kwargs):
+        key = (method, frozen(args), limit, frozen(kwargs))
+        try:
+            hash(key)
+        except TypeError:
+            # an argument that cannot be frozen is read on its own, without sharing
+            return await self.read_task(method, args, kwargs, limit)
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.read_task(method, args, kwargs, limit))
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self.inflight.pop(key, None))
+        # a cancelled caller must not cancel the query other callers are waiting on
+        return await asyncio.shield(task)
+
+    def run_write(self, method, args, kwargs):
+        with self.pool.writer() as service:
+            return getattr(service, method)(*args, **kwargs)
+
+    async def write(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.write_executor, self.run_write, method, args, kwargs)
+
+    async def stream(self, method, key, page_size=None, **kwargs):
+        # yields rows a keyset page at a time; every page is read on its own pooled connection, given back before
+        # its rows are yielded, so a caller that stops iterating part way holds no slot or connection. key is the
+        # listing's sort key of a row, the next page starts after the last row's key
+        page_size = page_size or FlightService.page_size
+        after = None
+        while True:
+            page = await self.read_task(method, (), dict(kwargs, page_size=page_size, after=after), page_size)
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                break
+            after = key(page[-1])
+
+    async def find_flights(self, limit=None, by_departure=False, **filters):
+        return await self.read("find_flights", limit=limit, page_size=limit, by_departure=by_departure, **filters)
+
+    def stream_flights(self, page_size=None, by_departure=False, **filters):
+        if by_departure:
+            key = lambda row: (row.departure_time, row.flight_id)
+        else:
+            key = lambda row: (row.flight_id,)
+        return self.stream("find_flights", key, page_size, by_departure=by_departure, **filters)
+
+    async def get_flight(self, flight_number):
+        return await self.read("get_flight", flight_number)
+
+    async def create_flight(self, flight_number, origin, destination, departure_time, pilot_id=None,
+                            status='Scheduled'):
+        return await self.write("create_flight", flight_number, origin, destination, departure_time, pilot_id, status)
+
+    async def amend_flight(self, flight_number, changes):
+        return await self.write("amend_flight", flight_number, changes)
+
+    async def amend_flights(self, amendments):
+        return await self.write("amend_flights", [dict(amendment) for amendment in amendments])
+
+    async def update_status(self, flight_number, status):
+        return await self.write("update_status", flight_number, status)
+
+    async def assign_pilot(self, flight_number, pilot_id):
+        return await self.write("assign_pilot", flight_number, pilot_id)
+
+    async def search_flight_numbers(self, text, limit=20):
+        return await self.read("search_flight_numbers", text, limit)
+
+    async def list_pilots(self, limit=None):
+        return await self.read("list_pilots", limit=limit, page_size=limit)
+
+    def stream_pilots(self, page_size=None):
+        return self.stream("list_pilots", lambda row: (row.pilot_id,), page_size)
+
+    async def get_pilot(self, pilot_id):
+        return await self.read("get_pilot", pilot_id)
+
+    async def available_pilots(self, pilot_ids, departure_time, origin=None):
+        pilot_ids = None if pilot_ids is None else tuple(pilot_ids)
+        return await self.read("available_pilots", pilot_ids, departure_time, origin)
+
+    async def pilot_schedule(self, pilot_id):
+        return await self.read("pilot_schedule", pilot_id)
+
+    async def search_pilots(self, text, limit=20):
+        return await self.read("search_pilots", text, limit)
+
+    async def add_pilot(self, first_name, last_name, license_number):
+        return await self.write("add_pilot", first_name, last_name, license_number)
+
+    async def departure_board(self, airport_code, start=None, hours=6, limit=None):
+        return await self.read("departure_board", airport_code, start, hours, limit)
+
+    async def arrival_board(self, airport_code, start=None, hours=6, limit=None):
+        return await self.read("arrival_board", airport_code, start, hours, limit)
+
+    async def list_destinations(self, limit=None):
+        return await self.read("list_destinations", limit=limit, page_size=limit)
+
+    def stream_destinations(self, page_size=None):
+        return self.stream("list_destinations", lambda row: (row.destination_id,), page_size)
+
+    async def list_deleted_destinations(self, limit=None):
+        return await self.read("list_deleted_destinations", limit=limit, page_size=limit)
+
+    async def get_destination(self, airport_code):
+        return await self.read("get_destination", airport_code)
+
+    async def search_destinations(self, text, limit=20):
+        return await self.read("search_destinations", text, limit)
+
+    async def add_destination(self, airport_code, city_name, country, timezone):
+        return await self.write("add_destination", airport_code, city_name, country, timezone)
+
+    async def remove_destination(self, airport_code):
+        return await self.write("remove_destination", airport_code)
+
+    async def retire_destinations(self, airport_codes):
+        return await self.write("retire_destinations", list(airport_codes))
@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from itertools import islice
+
+from datagen import generate_database
+from FlightManagement import FlightManager
+
+
+class BenchmarkConsole(FlightManager):
+    # the console views without the pause after every page
+    def continue_listing(self, count):
+        return True
+
+
+def dataset_sizes(flights):
+    # thousands of pilots and airports at the larger scales, kept in proportion to the flights
+    pilots = min(max(flights // 50, 200), 20000)
+    airports = min(max(flights // 1000, 50), 5000)
+    return pilots, airports
+
+
+def dataset(directory, flights, seed):
+    # generated datasets are kept and reused, generating millions of flights takes minutes
+    path = os.path.join(directory, f"flights-{flights}-seed{seed}.db")
+    pilots, airports = dataset_sizes(flights)
+    info = {"flights": flights, "pilots": pilots, "airports": airports, "seed": seed, "generated_s": None}
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        start = time.perf_counter()
+        generate_database(path + ".partial", flights, pilots, airports, seed)
+        os.replace(path + ".partial", path)
+        info["generated_s"] = time.perf_counter() - start
+    info["size_mb"] = os.path.getsize(path) / 1024 / 1024
+    return path, info
+
+
+def measure(function, repeat, budget):
+    # runs function up to repeat times, stopping early once budget seconds are spent; always at least once
+    timings = []
+    deadline = time.perf_counter() + budget
+    while len(timings) < repeat:
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+        if time.perf_counter() >= deadline:
+            break
+    return {"runs": len(timings), "median_ms": statistics.median(timings), "min_ms": min(timings),
+            "max_ms": max(timings)}
+
+
+def samples(service):
+    # values for the prompts, taken from the middle of the schedule so they are neither first nor last
+    cursor = service.connect.cursor()
+    cursor.execute("SELECT MAX(FlightID) FROM Flights")
+    middle = cursor.fetchone()[0] // 2
+    cursor.execute("SELECT FlightNumber, Origin, Destination, DepartureTime FROM Flights WHERE FlightID >= ? "
+                   "AND PilotID IS NOT NULL ORDER BY FlightID LIMIT 1", (middle,))
+    flight_number, origin, destination, departure = cursor.fetchone()
+    cursor.execute("SELECT PilotID FROM Flights WHERE FlightNumber = ?", (flight_number,))
+    pilot_id = cursor.fetchone()[0]
+    # destinations with no active flights, removable without being refused
+    cursor.execute("""
+        SELECT AirportCode FROM Destinations d
+        WHERE NOT EXISTS (SELECT 1 FROM Flights f WHERE f.Destination = d.AirportCode
+                          AND f.Status IN ('Scheduled', 'Delayed'))
+        ORDER BY AirportCode
+    """)
+    retirable = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT CityName FROM Destinations WHERE AirportCode = ?", (destination,))
+    city = cursor.fetchone()[0]
+    cursor.execute("SELECT LastName FROM Pilots WHERE PilotID = ?", (pilot_id,))
+    last_name = cursor.fetchone()[0]
+    return {"flight_number": flight_number, "origin": origin, "destination": destination,
+            "departure": departure, "pilot_id": pilot_id, "retirable": retirable, "city": city,
+            "last_name": last_name}
+
+
+def read_operations(console, sample):
+    service = console.service
+    return {
+        # menu options 1-3, every row formatted as the console prints it
+        "view_all_flights": console.view_all_flights,
+        "view_all_flights first page": lambda: list(islice(service.find_flights(page_size=console.page_size),
+                                                           console.page_size)),
+        "view_all_pilots": console.view_all_pilots,
+        "view_destination": console.view_destination,
+        # what select_available_pilot_only runs for one entered pilot id
+        "select_available_pilot_only": lambda: (service.pilot_exists(sample["pilot_id"]),
+                                                service.pilot_is_available(sample["pilot_id"], sample["departure"]),
+                                                service.pilot_schedule(sample["pilot_id"])),
+        "available_pilots": lambda: service.available_pilots(None, sample["departure"]),
+        # menu option 10
+        "search_flight_via_status number": lambda: list(service.find_flights(flight_number=sample["flight_number"])),
+        "search_flight_via_status origin": lambda: list(service.find_flights(origin=sample["origin"])),
+        "search_flight_via_status destination":
+            lambda: list(service.find_flights(destination=sample["destination"])),
+        "search_flight_via_status delayed": lambda: list(service.find_flights(status="Delayed")),
+        "search_flight_via_status completed": lambda: list(service.find_flights(status="Completed")),
+        # a six hour board around the sample departure, read off the (airport, DepartureUTC) indexes
+        "departure board": lambda: service.departure_board(sample["origin"], sample["departure"], 6),
+        "arrival board": lambda: service.arrival_board(sample["destination"], sample["departure"], 6),
+        # partial text search through the fts5 indexes, and the LIKE scan it replaces
+        "text search destination": lambda: service.search_destinations(sample["city"][:3]),
+        "text search pilot surname": lambda: service.search_pilots(sample["last_name"][:4]),
+        "text search flight number prefix": lambda: service.search_flight_numbers(sample["flight_number"][:4]),
+        "like scan flight number": lambda: service.connect.execute(
+            "SELECT FlightID FROM Flights WHERE FlightNumber LIKE ? LIMIT 20",
+            (f"%{sample['flight_number'][1:]}%",)).fetchall(),
+    }
+
+
+def write_operations(console, sample):
+    service = console.service
+    counter = iter(range(10 ** 9))
+
+    def add_new_flight():
+        run = next(counter)
+        # one letter and five digits, a shape the generator never uses
+        flight_number = f"X{run:05d}"
+        service.flight_number_exists(flight_number)
+        service.airport_exists(sample["origin"])
+        service.airport_exists(sample["destination"])
+        # far in the future and 13 hours apart, so the same pilot is always available
+        departure = datetime(2030, 1, 1) + timedelta(hours=13 * run)
+        service.create_flight(flight_number, sample["origin"], sample["destination"], departure,
+                              sample["pilot_id"])
+
+    def amend_flight():
+        status = "Delayed" if next(counter) % 2 else "Scheduled"
+        service.amend_flight("X00000", {"status": status})
+
+    def add_new_pilot():
+        service.add_pilot("Bench", "Pilot", f"BENCH{next(counter):06d}")
+
+    retirable = iter(sample["retirable"])
+
+    def remove_destination():
+        service.destination_flight_counts(sample["retirable"][0])
+        service.remove_destination(next(retirable))
+
+    def remove_destination_refused():
+        try:
+            service.remove_destination(sample["origin"])
+        except ValueError:
+            pass
+
+    operations = {
+        "add_new_flight": add_new_flight,
+        "amend_flight": amend_flight,
+        "add_new_pilot": add_new_pilot,
+        "remove_destination refused": remove_destination_refused,
+    }
+    if sample["retirable"]:
+        operations["remove_destination"] = remove_destination
+    return operations
+
+
+def run_scale(directory, flights, args):
+    path, info = dataset(directory, flights, args.seed)
+    results = {}
+
+    # reads run against the generated dataset itself
+    console = BenchmarkConsole(path)
+    sample = samples(console.service)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for name, function in read_operations(console, sample).items():
+            results[name] = measure(function, args.repeat, args.budget)
+    console.connect.close()
+
+    # writes run against a copy, so the dataset stays the same for the next run
+    scratch = os.path.join(directory, "scratch.db")
+    shutil.copyfile(path, scratch)
+    console = BenchmarkConsole(scratch)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for name, function in write_operations(console, sample).items():
+            repeat = min(args.repeat, len(sample["retirable"])) if name == "remove_destination" else args.repeat
+            results[name] = measure(function, repeat, args.budget)
+    console.connect.close()
+    os.remove(scratch)
+
+    return {"dataset": info, "operations": results}
+
+
+def print_results(results):
+    for flights, scale in results["scales"].items():
+        dataset_info = scale["dataset"]
+        print(f"\nBenchmark: {int(flights):,} flights, {dataset_info['pilots']:,} pilots, "
+              f"{dataset_info['airports']:,} airports ({dataset_info['size_mb']:,.1f} MB)")
+        print("-" * 85)
+        print(f"{'Operation':<40} {'Runs':>6} {'Median ms':>12} {'Min ms':>12} {'Max ms':>12}")
+        print("-" * 85)
+        for name, timing in scale["operations"].items():
+            print(f"{name:<40} {timing['runs']:>6} {timing['median_ms']:>12,.2f} {timing['min_ms']:>12,.2f} "
+                  f"{timing['max_ms']:>12,.2f}")
+        print("-" * 85)
+
+
+def compare(baseline, current, threshold, noise_ms):
+    # an operation regresses when its median is more than threshold slower and the difference is above noise_ms
+    regressions = 0
+    print(f"\nBenchmark Comparison (regression above {threshold:.0%} and {noise_ms} ms):")
+    print("-" * 85)
+    print(f"{'Flights':>10} {'Operation':<36} {'Before ms':>11} {'After ms':>11} {'Change':>8} {'':>6}")
+    print("-" * 85)
+    for flights, scale in current["scales"].items():
+        before_scale = baseline["scales"].get(flights)
+        if before_scale is None:
+            continue
+        for name, timing in scale["operations"].items():
+            before = before_scale["operations"].get(name)
+            if before is None:
+                continue
+            change = timing["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+            difference = timing["median_ms"] - before["median_ms"]
+            flag = ""
+            if change > threshold and difference > noise_ms:
+                flag = "SLOWER"
+                regressions += 1
+            elif change < -threshold and -difference > noise_ms:
+                flag = "faster"
+            print(f"{int(flights):>10} {name:<36} {before['median_ms']:>11,.2f} {timing['median_ms']:>11,.2f} "
+                  f"{change:>+8.0%} {flag:>6}")
+    print("-" * 85)
+    print(f"{regressions} regressions")
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every console operation on generated datasets of growing size")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10000, 100000],
+                        help="flight counts to benchmark, e.g. 10000 100000 1000000 10000000")
+    parser.add_argument("--repeat", type=int, default=5, help="most runs of each operation")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="seconds after which an operation stops repeating")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default="benchmark_data", help="where generated datasets are kept")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare this run against")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two results files without running anything")
+    parser.add_argument("--threshold", type=float, default=0.20, help="slowdown counted as a regression, 0.20 = 20%%")
+    parser.add_argument("--noise-ms", type=float, default=0.1, help="differences below this are never regressions")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(load_results(args.compare[0]), load_results(args.compare[1]), args.threshold,
+                              args.noise_ms)
+        sys.exit(1 if regressions else 0)
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "scales": {str(flights): run_scale(args.data_dir, flights, args) for flights in args.scales},
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+
+    print_results(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), results, args.threshold, args.noise_ms)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
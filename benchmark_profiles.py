@@ -0,0 +1,110 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from bulk_import import BulkImporter, ImportResult
+from connection import PROFILES, describe_connection
+from flight_service import FlightService
+
+
+AIRPORTS = [f"A{index:02d}" for index in range(40)]
+
+
+def timed(function, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def prepare(service, pilots):
+    with service.connect:
+        service.cursor.executemany(
+            "INSERT OR IGNORE INTO Destinations (AirportCode, CityName, Country, TimeZone) VALUES (?, ?, ?, ?)",
+            [(code, f"City {code}", "Benchmark", "GMT") for code in AIRPORTS])
+        service.cursor.executemany(
+            "INSERT OR IGNORE INTO Pilots (FirstName, LastName, LicenseNumber) VALUES (?, ?, ?)",
+            [("Bench", f"Pilot{index}", f"BEN{index:06d}") for index in range(pilots)])
+
+
+def flight_rows(count, pilots, seed):
+    random_gen = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for index in range(count):
+        origin, destination = random_gen.sample(AIRPORTS, 2)
+        departure = start + timedelta(minutes=random_gen.randrange(0, 365 * 24 * 60))
+        # every benchmark airport is GMT, so DepartureUTC is the local time
+        departure = departure.strftime("%Y-%m-%d %H:%M:%S")
+        yield (f"B{index:07d}", origin, destination, departure,
+               random_gen.choice(("Scheduled", "Delayed", "Completed", "Cancelled")),
+               random_gen.randrange(1, pilots + 1), departure)
+
+
+def run_profile(profile, directory, args):
+    path = os.path.join(directory, f"{profile}.db")
+    service = FlightService(path, profile)
+    prepare(service, args.pilots)
+    results = {}
+
+    # bulk write path, batched executemany as used by bulk_import.py
+    importer = BulkImporter(service.connect)
+    result = ImportResult("Flights")
+    start = time.perf_counter()
+    importer.write_batches("""
+        INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status, PilotID, DepartureUTC)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""", flight_rows(args.flights, args.pilots, args.seed), result)
+    results["bulk insert rows/sec"] = args.flights / (time.perf_counter() - start)
+
+    # interactive write path, one committed transaction per flight like add_new_flight
+    start = time.perf_counter()
+    for index in range(args.single_writes):
+        origin, destination = AIRPORTS[index % 40], AIRPORTS[(index + 1) % 40]
+        service.create_flight(f"S{index:05d}", origin, destination, f"2026-01-01 {index % 24:02d}:00:00")
+    results["single insert ms"] = (time.perf_counter() - start) / args.single_writes * 1000
+
+    results["amend flight ms"] = timed(lambda: service.update_status("S00001", "Delayed"), 50) * 1000
+
+    # read paths used by the console views and prompts
+    results["list all flights s"] = timed(lambda: sum(1 for _ in service.find_flights()))
+    results["search by origin ms"] = timed(lambda: sum(1 for _ in service.find_flights(origin="A07")), 5) * 1000
+    results["available pilots ms"] = timed(lambda: service.available_pilots(None, "2025-06-01 12:00:00"), 20) * 1000
+    results["flight lookup ms"] = timed(lambda: service.get_flight("B0001234"), 200) * 1000
+
+    # the pragmas as the connection reports them, so the table shows what each profile actually ran with
+    settings = describe_connection(service.connect)
+    service.connect.close()
+    return results, settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare connection profiles on the FlightService read and write paths")
+    parser.add_argument("--flights", type=int, default=100000)
+    parser.add_argument("--pilots", type=int, default=500)
+    parser.add_argument("--single-writes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        runs = {profile: run_profile(profile, directory, args) for profile in args.profiles}
+    all_results = {profile: results for profile, (results, _) in runs.items()}
+    all_settings = {profile: settings for profile, (_, settings) in runs.items()}
+
+    metrics = list(next(iter(all_results.values())))
+    print(f"\nConnection Profile Benchmark ({args.flights} flights, {args.pilots} pilots):")
+    print("-" * 85)
+    print(f"{'Metric':<25}" + "".join(f"{profile:>15}" for profile in args.profiles))
+    print("-" * 85)
+    for metric in metrics:
+        print(f"{metric:<25}" + "".join(f"{all_results[profile][metric]:>15,.2f}" for profile in args.profiles))
+    print("-" * 85)
+    for name in next(iter(all_settings.values())):
+        print(f"{name:<25}" + "".join(f"{str(all_settings[profile][name]):>15}" for profile in args.profiles))
+    print("-" * 85)
+
+
+if __name__ == "__main__":
+    main()
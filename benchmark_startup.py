@@ -0,0 +1,82 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from connection import PROFILES
+from flight_service import FlightService
+
+
+# what a short-lived job does: open the service and answer one lookup
+FIRST_QUERY = "service.get_flight('BA101')"
+PROCESS_SCRIPT = f"""
+import sys
+from flight_service import FlightService
+service = FlightService(sys.argv[1], sys.argv[2])
+{FIRST_QUERY}
+"""
+
+
+def remove_database(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def in_process(path, profile, cold):
+    # construction alone, then the first query, which is where the connection opens
+    if cold:
+        remove_database(path)
+    start = time.perf_counter()
+    service = FlightService(path, profile)
+    constructed = time.perf_counter()
+    service.get_flight("BA101")
+    finished = time.perf_counter()
+    service.connect.close()
+    return (constructed - start) * 1000, (finished - start) * 1000
+
+
+def in_subprocess(path, profile, cold):
+    # a whole python process, imports included, as a cron job or CLI call pays it
+    if cold:
+        remove_database(path)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", PROCESS_SCRIPT, path, profile], check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FlightService startup on new (cold) and existing (warm) databases")
+    parser.add_argument("--repeat", type=int, default=20, help="starts measured for each case")
+    parser.add_argument("--profile", default="durable", choices=sorted(PROFILES))
+    parser.add_argument("--processes", action="store_true", help="also time whole python processes")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "startup.db")
+        for cold in (True, False):
+            case = "cold" if cold else "warm"
+            # a warm start needs the database one cold start leaves behind
+            in_process(path, args.profile, cold=False)
+            timings = [in_process(path, args.profile, cold) for _ in range(args.repeat)]
+            results[f"{case} construct ms"] = [constructed for constructed, first in timings]
+            results[f"{case} first query ms"] = [first for constructed, first in timings]
+            if args.processes:
+                results[f"{case} process ms"] = [in_subprocess(path, args.profile, cold) for _ in range(args.repeat)]
+
+    print(f"\nStartup Benchmark ({args.profile} profile, {args.repeat} starts each):")
+    print("-" * 85)
+    print(f"{'Measurement':<30} {'Median':>12} {'Min':>12} {'Max':>12}")
+    print("-" * 85)
+    for name, timings in results.items():
+        print(f"{name:<30} {statistics.median(timings):>12,.2f} {min(timings):>12,.2f} {max(timings):>12,.2f}")
+    print("-" * 85)
+
+
+if __name__ == "__main__":
+    main()
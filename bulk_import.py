@@ -0,0 +1,268 @@
+import argparse
+import csv
+import json
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime
+
+from connection import PROFILES
+from flight_service import (ACTIVE_STATUSES, PILOT_REST_SECONDS, FlightService, VALID_STATUSES, departure_epoch,
+                            departure_utc, parse_utc_offset)
+
+
+class ImportResult:
+    def __init__(self, table):
+        self.table = table
+        self.inserted = 0
+        self.rejected = []
+        self.seconds = 0.0
+
+    def rows_per_sec(self):
+        if self.seconds == 0:
+            return 0.0
+        return (self.inserted + len(self.rejected)) / self.seconds
+
+    def __str__(self):
+        return (f"{self.table:<14} {self.inserted:>10} inserted {len(self.rejected):>8} rejected "
+                f"{self.seconds:>8.2f}s {self.rows_per_sec():>12,.0f} rows/sec")
+
+
+class BulkImporter:
+    # rows per executemany call, each batch is committed as one transaction
+    batch_size = 5000
+
+    def __init__(self, connection, batch_size=None):
+        self.connect = connection
+        self.cursor = self.connect.cursor()
+        if batch_size is not None:
+            self.batch_size = batch_size
+
+        # in-memory lookups so flights never need a query per row to resolve references
+        self.airport_ids = {}
+        self.airport_offsets = {}
+        self.pilot_ids = {}
+        self.load_airports()
+        self.load_pilots()
+
+    def load_airports(self):
+        self.cursor.execute("SELECT AirportCode, DestinationID, UtcOffsetMinutes FROM Destinations")
+        rows = self.cursor.fetchall()
+        self.airport_ids = {airport: destination_id for airport, destination_id, _ in rows}
+        self.airport_offsets = {airport: offset for airport, _, offset in rows}
+
+    def load_pilots(self):
+        self.cursor.execute("SELECT LicenseNumber, PilotID FROM Pilots")
+        self.pilot_ids = dict(self.cursor.fetchall())
+
+    # files ending in .jsonl/.json are read line by line as json objects, anything else as csv with a header row;
+    # a line that is not a json object is yielded as None so the caller rejects it like any other bad row
+    @staticmethod
+    def read_rows(path):
+        with open(path, newline='', encoding='utf-8') as file:
+            if path.lower().endswith(('.jsonl', '.json')):
+                for line in file:
+                    line = line.strip()
+                    if line:
+                        try:
+                            row = json.loads(line)
+                        except ValueError:
+                            row = None
+                        yield row if isinstance(row, dict) else None
+            else:
+                yield from csv.DictReader(file)
+
+    def write_batches(self, sql, rows, result):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.flush(sql, batch, result)
+                batch = []
+        if batch:
+            self.flush(sql, batch, result)
+
+    def flush(self, sql, batch, result):
+        # the connection context manager commits the whole batch or rolls it back on error
+        with self.connect:
+            self.cursor.executemany(sql, batch)
+        result.inserted += len(batch)
+
+    def import_pilots(self, path):
+        result = ImportResult("Pilots")
+        start = time.perf_counter()
+        self.write_batches("INSERT INTO Pilots (FirstName, LastName, LicenseNumber) VALUES (?, ?, ?)",
+                           self.pilot_rows(path, result), result)
+        self.load_pilots()
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def pilot_rows(self, path, result):
+        seen = set(self.pilot_ids)
+        for line_no, row in enumerate(self.read_rows(path), 1):
+            if row is None:
+                result.rejected.append((line_no, "malformed json line"))
+                continue
+            try:
+                license_num = row['LicenseNumber'].strip().upper()
+                first = row['FirstName'].strip().title()
+                last = row['LastName'].strip().title()
+            except (KeyError, AttributeError):
+                result.rejected.append((line_no, "missing pilot column"))
+                continue
+            # same rule as add_new_pilot, license numbers are unique
+            if license_num in seen:
+                result.rejected.append((line_no, f"license {license_num} already exists"))
+                continue
+            seen.add(license_num)
+            yield first, last, license_num
+
+    def import_destinations(self, path):
+        result = ImportResult("Destinations")
+        start = time.perf_counter()
+        self.write_batches("INSERT INTO Destinations (AirportCode, CityName, Country, TimeZone) VALUES (?, ?, ?, ?)",
+                           self.destination_rows(path, result), result)
+        self.load_airports()
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def destination_rows(self, path, result):
+        seen = set(self.airport_ids)
+        for line_no, row in enumerate(self.read_rows(path), 1):
+            if row is None:
+                result.rejected.append((line_no, "malformed json line"))
+                continue
+            try:
+                airport = row['AirportCode'].strip().upper()
+                city = row['CityName'].strip().title()
+                country = row['Country'].strip().title()
+                timezone = row['TimeZone'].strip().upper()
+            except (KeyError, AttributeError):
+                result.rejected.append((line_no, "missing destination column"))
+                continue
+            if airport in seen:
+                result.rejected.append((line_no, f"airport {airport} already exists"))
+                continue
+            try:
+                parse_utc_offset(timezone)
+            except ValueError:
+                result.rejected.append((line_no, f"invalid timezone {timezone}"))
+                continue
+            seen.add(airport)
+            yield airport, city, country, timezone
+
+    def import_flights(self, path):
+        result = ImportResult("Flights")
+        start = time.perf_counter()
+        self.write_batches("""
+            INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status, PilotID, DepartureUTC)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""", self.flight_rows(path, result), result)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def load_pilot_departures(self):
+        # UTC departure epochs of every active crewed flight, sorted per pilot
+        self.cursor.execute(f"""
+            SELECT PilotID, DepartureUTCEpoch FROM Flights
+            WHERE PilotID IS NOT NULL AND Status IN ({', '.join('?' * len(ACTIVE_STATUSES))})
+            ORDER BY PilotID, DepartureUTCEpoch
+        """, ACTIVE_STATUSES)
+        departures = defaultdict(list)
+        for pilot_id, epoch in self.cursor.fetchall():
+            departures[pilot_id].append(epoch)
+        return departures
+
+    def flight_rows(self, path, result):
+        # same rules as create_flight: flight numbers are unique, and no two active flights of a pilot depart
+        # within 12 hours of each other, checked against the database and the rows accepted before this one
+        self.cursor.execute("SELECT DISTINCT FlightNumber FROM Flights")
+        seen = {row[0] for row in self.cursor.fetchall()}
+        pilot_departures = self.load_pilot_departures()
+        for line_no, row in enumerate(self.read_rows(path), 1):
+            if row is None:
+                result.rejected.append((line_no, "malformed json line"))
+                continue
+            try:
+                flight_num = row['FlightNumber'].strip().upper()
+                origin = row['Origin'].strip().upper()
+                destination = row['Destination'].strip().upper()
+                departure = datetime.fromisoformat(row['DepartureTime'].strip()).strftime("%Y-%m-%d %H:%M:%S")
+                status = (row.get('Status') or 'Scheduled').strip().title()
+                # pilots are referenced by license number, a blank value leaves the flight unassigned
+                license_num = (row.get('PilotLicense') or row.get('LicenseNumber') or '').strip().upper()
+            except (KeyError, AttributeError, ValueError):
+                # a json value that is not a string, such as "Status": 1, is as invalid as a missing one
+                result.rejected.append((line_no, "missing or invalid flight column"))
+                continue
+
+            if status not in VALID_STATUSES:
+                result.rejected.append((line_no, f"invalid status {status}"))
+                continue
+            if origin not in self.airport_ids:
+                result.rejected.append((line_no, f"unknown origin {origin}"))
+                continue
+            if destination not in self.airport_ids:
+                result.rejected.append((line_no, f"unknown destination {destination}"))
+                continue
+            if destination == origin:
+                result.rejected.append((line_no, "destination is the same as origin"))
+                continue
+
+            pilot_id = None
+            if license_num:
+                pilot_id = self.pilot_ids.get(license_num)
+                if pilot_id is None:
+                    result.rejected.append((line_no, f"unknown pilot license {license_num}"))
+                    continue
+
+            if flight_num in seen:
+                result.rejected.append((line_no, f"flight number {flight_num} already exists"))
+                continue
+            if pilot_id is not None and status in ACTIVE_STATUSES:
+                epoch = departure_epoch(departure) - self.airport_offsets[origin] * 60
+                booked = pilot_departures[pilot_id]
+                if bisect_right(booked, epoch + PILOT_REST_SECONDS) > bisect_left(booked, epoch - PILOT_REST_SECONDS):
+                    result.rejected.append((line_no, f"pilot {license_num} flies within 12 hours of this flight"))
+                    continue
+                insort(booked, epoch)
+            seen.add(flight_num)
+            yield (flight_num, origin, destination, departure, status, pilot_id,
+                   departure_utc(departure, self.airport_offsets[origin]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import pilots, destinations and flights from CSV or JSONL files")
+    parser.add_argument("--pilots", help="CSV/JSONL file with FirstName, LastName, LicenseNumber")
+    parser.add_argument("--destinations", help="CSV/JSONL file with AirportCode, CityName, Country, TimeZone")
+    parser.add_argument("--flights",
+                        help="CSV/JSONL file with FlightNumber, Origin, Destination, DepartureTime, Status, PilotLicense")
+    parser.add_argument("--batch-size", type=int, default=BulkImporter.batch_size)
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--profile", default="fast-ingest", choices=sorted(PROFILES))
+    parser.add_argument("--show-rejected", action="store_true", help="print every rejected row with its reason")
+    args = parser.parse_args()
+
+    service = FlightService(args.database, args.profile)
+    importer = BulkImporter(service.connect, args.batch_size)
+
+    # order matters, flights resolve against the pilots and destinations loaded before them
+    results = []
+    if args.destinations:
+        results.append(importer.import_destinations(args.destinations))
+    if args.pilots:
+        results.append(importer.import_pilots(args.pilots))
+    if args.flights:
+        results.append(importer.import_flights(args.flights))
+
+    print("\nBulk Import Summary:")
+    print("-" * 85)
+    for result in results:
+        print(result)
+        if args.show_rejected:
+            for line_no, reason in result.rejected:
+                print(f"    line {line_no}: {reason}")
+    print("-" * 85)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import sqlite3
+
+
+# pragma presets for open_connection, any setting can also be overridden per connection
+PROFILES = {
+    # WAL so readers never block behind the writer, every commit still fsynced
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    # bulk loading, a crash can lose the last transactions but never corrupts the file in WAL mode
+    "fast-ingest": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    # large page cache and memory-mapped reads for listing and search workloads
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -131072,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # sqlite's own defaults, what FlightManager used before profiles existed
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+}
+
+DEFAULT_PROFILE = "durable"
+
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+TEMP_STORES = ("DEFAULT", "FILE", "MEMORY")
+
+
+def profile_settings(profile=DEFAULT_PROFILE, **overrides):
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown connection profile: {profile} (choose from {', '.join(PROFILES)})")
+    settings = dict(PROFILES[profile])
+    for name, value in overrides.items():
+        if name not in settings:
+            raise ValueError(f"Unknown connection setting: {name}")
+        if value is not None:
+            settings[name] = value
+    return settings
+
+
+# check_same_thread=False is only safe when the caller serialises access, as ConnectionPool does for its writer;
+# factory is the sqlite3.Connection subclass to create, e.g. InstrumentedConnection
+def open_connection(database="flights.db", profile=DEFAULT_PROFILE, check_same_thread=True,
+                    factory=sqlite3.Connection, **overrides):
+    settings = profile_settings(profile, **overrides)
+
+    # pragma values cannot be bound as parameters, so they are checked before being formatted in
+    journal_mode = str(settings["journal_mode"]).upper()
+    synchronous = str(settings["synchronous"]).upper()
+    temp_store = str(settings["temp_store"]).upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Invalid journal mode: {journal_mode}")
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid synchronous setting: {synchronous}")
+    if temp_store not in TEMP_STORES:
+        raise ValueError(f"Invalid temp store: {temp_store}")
+
+    connection = sqlite3.connect(database, timeout=int(settings["busy_timeout"]) / 1000,
+                                 check_same_thread=check_same_thread, factory=factory)
+    connection.execute(f"PRAGMA journal_mode = {journal_mode}")
+    connection.execute(f"PRAGMA synchronous = {synchronous}")
+    connection.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    connection.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    connection.execute(f"PRAGMA temp_store = {temp_store}")
+    connection.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+    return connection
+
+
+def describe_connection(connection):
+    names = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+    settings = {}
+    for name in names:
+        # in-memory databases report nothing for some pragmas, mmap_size for one
+        row = connection.execute(f"PRAGMA {name}").fetchone()
+        settings[name] = row[0] if row else None
+    return settings
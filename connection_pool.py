@@ -0,0 +1,79 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+from flight_service import FlightService
+from reference_cache import ReferenceCache
+
+
+class ConnectionPool:
+    # read-only FlightServices handed to one thread at a time, plus a single writer shared behind a lock;
+    # in WAL mode the readers keep answering while the writer commits
+    def __init__(self, database="flights.db", max_readers=16, read_profile="read-heavy", write_profile="durable",
+                 instrumentation=None, route_graph=None):
+        if database == ":memory:":
+            raise ValueError("A connection pool needs a database file, every :memory: connection is a separate database")
+
+        self.database = database
+        self.read_profile = read_profile
+        self.max_readers = max_readers
+        self.instrumentation = instrumentation
+        self.idle_readers = queue.LifoQueue()
+        self.opened_readers = 0
+        self.readers_lock = threading.Lock()
+
+        # shared by every reader and the writer, so a write through the pool invalidates it for all readers
+        self.reference_cache = ReferenceCache()
+
+        # the writer is opened first so the schema and seed data exist before any reader opens
+        self.write_lock = threading.Lock()
+        self.write_service = FlightService(database, write_profile, check_same_thread=False,
+                                           reference_cache=self.reference_cache, instrumentation=instrumentation,
+                                           route_graph=route_graph)
+        self.write_service.open()
+
+    def open_reader(self):
+        # check_same_thread is off because a reader moves between threads, but only one uses it at a time
+        service = FlightService(self.database, self.read_profile, check_same_thread=False,
+                                reference_cache=self.reference_cache, instrumentation=self.instrumentation)
+        # reads only, a write attempted on this connection fails instead of contending with the writer
+        service.connect.execute("PRAGMA query_only = ON")
+        return service
+
+    @contextmanager
+    def reader(self):
+        try:
+            service = self.idle_readers.get_nowait()
+        except queue.Empty:
+            with self.readers_lock:
+                can_open = self.opened_readers < self.max_readers
+                if can_open:
+                    self.opened_readers += 1
+            if not can_open:
+                # once max_readers are open, wait for one to be handed back
+                service = self.idle_readers.get()
+            else:
+                try:
+                    service = self.open_reader()
+                except Exception:
+                    with self.readers_lock:
+                        self.opened_readers -= 1
+                    raise
+        try:
+            yield service
+        finally:
+            self.idle_readers.put(service)
+
+    @contextmanager
+    def writer(self):
+        with self.write_lock:
+            yield self.write_service
+
+    def close(self):
+        while True:
+            try:
+                self.idle_readers.get_nowait().connect.close()
+            except queue.Empty:
+                break
+        with self.write_lock:
+            self.write_service.connect.close()
@@ -0,0 +1,146 @@
+import argparse
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+
+from connection import DEFAULT_PROFILE, PROFILES
+from flight_service import PILOT_REST_SECONDS, FlightService, normalise_departure
+
+
+# a flight the solver could not crew, and why
+Unassignable = namedtuple("Unassignable", "flight_id flight_number departure_time reason")
+
+
+class AssignmentResult:
+    def __init__(self):
+        self.assigned = []
+        self.unassignable = []
+        self.seconds = 0.0
+        self.dry_run = False
+
+    def __str__(self):
+        return (f"{len(self.assigned):>10} assigned {len(self.unassignable):>8} unassignable "
+                f"{self.seconds:>8.2f}s {'dry run, nothing written' if self.dry_run else 'written'}")
+
+
+class CrewAssigner:
+    # assigns pilots to every unassigned Scheduled flight in a window, keeping the 12 hour rule of
+    # FlightService.validate_pilot: no two active flights of a pilot depart within PILOT_REST_SECONDS, measured
+    # between UTC departures
+    def __init__(self, connection):
+        self.connect = connection
+        self.cursor = self.connect.cursor()
+
+    def assign(self, departure_from=None, departure_to=None, pilot_ids=None, dry_run=False):
+        result = AssignmentResult()
+        result.dry_run = dry_run
+        start = time.perf_counter()
+        with self.connect:
+            # held from the first read to the last write, so no flight can be crewed by hand in between
+            self.connect.execute("BEGIN IMMEDIATE")
+            flights = self.load_flights(departure_from, departure_to)
+            if flights:
+                pilots = self.load_pilots(pilot_ids)
+                commitments = self.load_commitments(flights[0][2], flights[-1][2])
+                self.solve(flights, pilots, commitments, result)
+            if result.assigned and not dry_run:
+                self.cursor.executemany("UPDATE Flights SET PilotID = ? WHERE FlightID = ? AND PilotID IS NULL",
+                                        [(pilot_id, flight_id) for flight_id, pilot_id in result.assigned])
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def load_flights(self, departure_from, departure_to):
+        conditions = ["PilotID IS NULL", "Status = 'Scheduled'"]
+        params = []
+        if departure_from is not None:
+            conditions.append("DepartureTime >= ?")
+            params.append(normalise_departure(departure_from))
+        if departure_to is not None:
+            conditions.append("DepartureTime < ?")
+            params.append(normalise_departure(departure_to))
+        self.cursor.execute(f"""
+            SELECT FlightID, FlightNumber, DepartureUTCEpoch, DepartureTime FROM Flights
+            WHERE {' AND '.join(conditions)}
+            ORDER BY DepartureUTCEpoch, FlightID
+        """, params)
+        return self.cursor.fetchall()
+
+    def load_pilots(self, pilot_ids):
+        self.cursor.execute("SELECT PilotID FROM Pilots ORDER BY PilotID")
+        pilots = [row[0] for row in self.cursor.fetchall()]
+        if pilot_ids is not None:
+            wanted = {int(pilot_id) for pilot_id in pilot_ids}
+            pilots = [pilot_id for pilot_id in pilots if pilot_id in wanted]
+        return pilots
+
+    def load_commitments(self, first_epoch, last_epoch):
+        # active flights already crewed, only those close enough to the window to block an assignment
+        self.cursor.execute("""
+            SELECT PilotID, DepartureUTCEpoch FROM Flights
+            WHERE PilotID IS NOT NULL AND Status IN ('Scheduled', 'Delayed')
+            AND DepartureUTCEpoch BETWEEN ? AND ?
+            ORDER BY PilotID, DepartureUTCEpoch
+        """, (first_epoch - PILOT_REST_SECONDS, last_epoch + PILOT_REST_SECONDS))
+        commitments = defaultdict(list)
+        for pilot_id, epoch in self.cursor.fetchall():
+            commitments[pilot_id].append(epoch)
+        return commitments
+
+    @staticmethod
+    def solve(flights, pilots, commitments, result):
+        # flights are taken in departure order; pilots wait in a heap keyed by the first epoch they may fly
+        # again, so the pilot rested longest is tried first and each pilot is looked at only when usable
+        ready = [(0, pilot_id) for pilot_id in pilots]
+        heapq.heapify(ready)
+        for flight_id, flight_number, epoch, departure_time in flights:
+            pilot_id = None
+            while ready and ready[0][0] <= epoch:
+                free_from, candidate = ready[0]
+                booked = commitments.get(candidate, ())
+                # an existing flight within 12 hours either side blocks the pilot until 12 hours after it
+                clash = bisect_right(booked, epoch + PILOT_REST_SECONDS)
+                if clash > bisect_left(booked, epoch - PILOT_REST_SECONDS):
+                    heapq.heapreplace(ready, (booked[clash - 1] + PILOT_REST_SECONDS + 1, candidate))
+                    continue
+                pilot_id = candidate
+                heapq.heapreplace(ready, (epoch + PILOT_REST_SECONDS + 1, candidate))
+                break
+
+            if pilot_id is not None:
+                result.assigned.append((flight_id, pilot_id))
+            elif not pilots:
+                result.unassignable.append(Unassignable(flight_id, flight_number, departure_time, "no pilots"))
+            else:
+                result.unassignable.append(Unassignable(flight_id, flight_number, departure_time,
+                                                        "every pilot flies within 12 hours"))
+
+
+def print_result(result, show_unassignable=False):
+    print("\nCrew Assignment Summary:")
+    print("-" * 85)
+    print(result)
+    if show_unassignable:
+        for flight in result.unassignable:
+            print(f"    {flight.flight_number:<10} {flight.departure_time:<20} {flight.reason}")
+    print("-" * 85)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assign pilots to every unassigned Scheduled flight")
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--from", dest="departure_from", help="first departure time to crew, e.g. 2025-02-01")
+    parser.add_argument("--to", dest="departure_to", help="crew departures before this time")
+    parser.add_argument("--pilots", type=int, nargs="+", help="only use these pilot IDs")
+    parser.add_argument("--dry-run", action="store_true", help="work out the roster without writing it")
+    parser.add_argument("--show-unassignable", action="store_true", help="list every flight left without a pilot")
+    args = parser.parse_args()
+
+    service = FlightService(args.database, args.profile)
+    result = CrewAssigner(service.connect).assign(args.departure_from, args.departure_to, args.pilots, args.dry_run)
+    print_result(result, args.show_unassignable)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import heapq
+import os
+import random
+import string
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate, product
+
+from bulk_import import BulkImporter, ImportResult
+from connection import PROFILES
+from flight_service import PILOT_REST_SECONDS, FlightService
+
+
+FIRST_NAMES = ["James", "Sarah", "Robert", "Emily", "Michael", "Olivia", "David", "Sophie", "Daniel", "Amelia",
+               "Thomas", "Grace", "Lucas", "Chloe", "Mateo", "Aisha", "Hiroshi", "Priya", "Lars", "Ingrid",
+               "Omar", "Fatima", "Wei", "Mei", "Carlos", "Lucia", "Pierre", "Camille", "Kwame", "Ama"]
+LAST_NAMES = ["Anderson", "Thompson", "Williams", "Johnson", "Brown", "Smith", "Garcia", "Martin", "Rossi",
+              "Muller", "Silva", "Kim", "Tanaka", "Singh", "Patel", "Nielsen", "Haddad", "Chen", "Wang", "Dubois",
+              "Mensah", "Okafor", "Novak", "Kowalski", "Jensen", "Lopez", "Costa", "Ivanova", "Yilmaz", "Murphy"]
+# country and its usual GMT offset, airports take the offset of their country
+COUNTRIES = [("United Kingdom", 0), ("United States", -5), ("United States", -8), ("France", 1), ("Germany", 1),
+             ("United Arab Emirates", 4), ("Australia", 10), ("Japan", 9), ("India", 5), ("Brazil", -3),
+             ("Canada", -5), ("Mexico", -6), ("China", 8), ("Singapore", 8), ("South Africa", 2), ("Nigeria", 1),
+             ("Spain", 1), ("Italy", 1), ("Turkey", 3), ("New Zealand", 12), ("Argentina", -3), ("Egypt", 2)]
+CITY_PARTS = ["Ash", "Bel", "Cor", "Dun", "El", "Fair", "Glen", "Har", "Is", "Kings", "Lyn", "Mar", "Nor", "Or",
+              "Port", "Quin", "Ros", "San", "Tor", "Val", "West", "York"]
+CITY_ENDINGS = ["ford", "ton", "field", "haven", "burg", "ville", "mouth", "port", "stad", "polis", "minster", "dale"]
+
+# relative departures per hour of the day, a morning bank, a midday lull and an evening bank
+HOURLY_WEIGHTS = [1, 1, 1, 1, 2, 5, 9, 11, 10, 8, 7, 6, 6, 6, 7, 8, 9, 10, 10, 9, 7, 5, 3, 2]
+# share of seasonal airports, served only in the first half of the period and retirable after it
+SEASONAL_SHARE = 0.05
+# share of flights sold without a pilot, left for later assignment
+UNASSIGNED_SHARE = 0.05
+
+
+def airport_codes(random_gen, count, taken):
+    codes = ["".join(letters) for letters in product(string.ascii_uppercase, repeat=3)]
+    codes = [code for code in codes if code not in taken]
+    if count > len(codes):
+        raise ValueError(f"At most {len(codes)} new airports can be generated")
+    return random_gen.sample(codes, count)
+
+
+def flight_number(index):
+    # unique 5-6 character numbers: two letters and four digits, then three letters and three digits
+    letters = string.ascii_uppercase
+    if index < 676 * 10000:
+        airline, number = divmod(index, 10000)
+        return f"{letters[airline // 26]}{letters[airline % 26]}{number:04d}"
+    airline, number = divmod(index - 676 * 10000, 1000)
+    if airline >= 26 ** 3:
+        raise ValueError("Too many flights to number uniquely")
+    return f"{letters[airline // 676]}{letters[airline // 26 % 26]}{letters[airline % 26]}{number:03d}"
+
+
+class DataGenerator:
+    # reproducible synthetic schedules: the same seed and sizes always produce the same rows
+    def __init__(self, connection, seed=42, start=datetime(2025, 1, 1), days=365, batch_size=None):
+        self.connect = connection
+        self.cursor = self.connect.cursor()
+        self.random_gen = random.Random(seed)
+        self.start = start
+        self.days = days
+        # flights before this are finished, flights after it are still to fly
+        self.now = start + timedelta(days=days // 2)
+        self.importer = BulkImporter(connection, batch_size)
+
+    def generate(self, flights, pilots, airports):
+        results = [self.generate_destinations(airports), self.generate_pilots(pilots),
+                   self.generate_flights(flights)]
+        self.cursor.execute("ANALYZE")
+        return results
+
+    def generate_destinations(self, count):
+        result = ImportResult("Destinations")
+        start = time.perf_counter()
+        rows = []
+        for code in airport_codes(self.random_gen, count, set(self.importer.airport_ids)):
+            country, offset = self.random_gen.choice(COUNTRIES)
+            city = self.random_gen.choice(CITY_PARTS) + self.random_gen.choice(CITY_ENDINGS)
+            rows.append((code, city, country, f"GMT{offset:+d}" if offset else "GMT"))
+        self.importer.write_batches("INSERT INTO Destinations (AirportCode, CityName, Country, TimeZone) "
+                                    "VALUES (?, ?, ?, ?)", rows, result)
+        self.importer.load_airports()
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def generate_pilots(self, count):
+        result = ImportResult("Pilots")
+        start = time.perf_counter()
+        first_license = len(self.importer.pilot_ids)
+        rows = ((self.random_gen.choice(FIRST_NAMES), self.random_gen.choice(LAST_NAMES), f"GEN{index:07d}")
+                for index in range(first_license, first_license + count))
+        self.importer.write_batches("INSERT INTO Pilots (FirstName, LastName, LicenseNumber) VALUES (?, ?, ?)",
+                                    rows, result)
+        self.importer.load_pilots()
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def generate_flights(self, count):
+        result = ImportResult("Flights")
+        start = time.perf_counter()
+        self.importer.write_batches("""
+            INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status, PilotID, DepartureUTC)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""", self.flight_rows(count), result)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def daily_counts(self, count):
+        # a summer peak and a weekend dip, scaled so the days add up to count
+        weights = []
+        for day in range(self.days):
+            date = self.start + timedelta(days=day)
+            season = 1 + 0.25 * (1 - abs(date.timetuple().tm_yday - 196) / 182)
+            weights.append(season * (0.85 if date.weekday() >= 5 else 1))
+        total = sum(weights)
+        counts = [int(count * weight / total) for weight in weights]
+        for day in self.random_gen.sample(range(self.days), count - sum(counts)):
+            counts[day] += 1
+        return counts
+
+    def flight_rows(self, count):
+        codes = sorted(self.importer.airport_ids)
+        if len(codes) < 2:
+            raise ValueError("At least two airports are needed to generate flights")
+        # a few hubs carry most traffic, roughly Zipf distributed by a random rank
+        self.random_gen.shuffle(codes)
+        # cumulative weights, so choices() does not sum them again for every flight
+        weights = list(accumulate(1 / (rank + 1) for rank in range(len(codes))))
+        seasonal = set(codes[-max(1, int(len(codes) * SEASONAL_SHARE)):]) if len(codes) > 2 else set()
+        year_round = [code for code in codes if code not in seasonal]
+        year_round_weights = weights[:len(year_round)]
+
+        # pilots wait in a heap keyed by when their rest ends, in UTC as the 12 hour rule is measured; a pilot
+        # is only given a flight departing after the rest from their latest one, so every assignment keeps the
+        # rule even though flights are generated in local departure order
+        booked = self.importer.load_pilot_departures()
+        resting = [(booked[pilot_id][-1] + PILOT_REST_SECONDS + 1 if booked.get(pilot_id) else 0, pilot_id)
+                   for pilot_id in sorted(self.importer.pilot_ids.values())]
+        heapq.heapify(resting)
+
+        self.cursor.execute("SELECT COUNT(*) FROM Flights")
+        index = self.cursor.fetchone()[0]
+        for day, day_count in enumerate(self.daily_counts(count)):
+            day_start = self.start + timedelta(days=day)
+            in_season = day_start < self.now
+            minutes = sorted(hour * 60 + self.random_gen.randrange(0, 60, 5)
+                             for hour in self.random_gen.choices(range(24), HOURLY_WEIGHTS, k=day_count))
+            for minute in minutes:
+                departure = day_start + timedelta(minutes=minute)
+                if in_season:
+                    origin, destination = self.random_gen.choices(codes, cum_weights=weights, k=2)
+                else:
+                    origin, destination = self.random_gen.choices(year_round, cum_weights=year_round_weights, k=2)
+                while destination == origin:
+                    destination = self.random_gen.choice(year_round)
+
+                utc = departure - timedelta(minutes=self.importer.airport_offsets[origin])
+                yield (flight_number(index), origin, destination, departure.strftime("%Y-%m-%d %H:%M:%S"),
+                       self.status(departure), self.pick_pilot(resting, departure, origin),
+                       utc.strftime("%Y-%m-%d %H:%M:%S"))
+                index += 1
+
+    def status(self, departure):
+        roll = self.random_gen.random()
+        if departure < self.now:
+            return "Cancelled" if roll < 0.03 else "Completed"
+        # delays cluster in the days right after now
+        if departure < self.now + timedelta(days=2):
+            return "Delayed" if roll < 0.15 else "Scheduled"
+        return "Delayed" if roll < 0.01 else "Scheduled"
+
+    def pick_pilot(self, resting, departure, origin):
+        if not resting or self.random_gen.random() < UNASSIGNED_SHARE:
+            return None
+        # departure is local time at the origin
+        epoch = int((departure - datetime(1970, 1, 1)).total_seconds()) - self.importer.airport_offsets[origin] * 60
+        rest_ends, pilot_id = resting[0]
+        if rest_ends > epoch:
+            return None
+        heapq.heapreplace(resting, (epoch + PILOT_REST_SECONDS + 1, pilot_id))
+        return pilot_id
+
+
+def generate_database(database, flights, pilots, airports, seed=42, days=365, profile="fast-ingest"):
+    service = FlightService(database, profile)
+    try:
+        return DataGenerator(service.connect, seed, days=days).generate(flights, pilots, airports)
+    finally:
+        service.connect.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic flight schedule")
+    parser.add_argument("--database", default="generated.db")
+    parser.add_argument("--flights", type=int, default=100000)
+    parser.add_argument("--pilots", type=int, default=2000)
+    parser.add_argument("--airports", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365, help="length of the schedule starting 2025-01-01")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profile", default="fast-ingest", choices=sorted(PROFILES))
+    args = parser.parse_args()
+
+    results = generate_database(args.database, args.flights, args.pilots, args.airports, args.seed, args.days,
+                                args.profile)
+
+    print(f"\nGenerated Data ({args.database}, seed {args.seed}):")
+    print("-" * 85)
+    for result in results:
+        print(result)
+    print("-" * 85)
+    print(f"Database size: {os.path.getsize(args.database) / 1024 / 1024:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
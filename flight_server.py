@@ -0,0 +1,219 @@
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import parse_qs, urlparse
+
+from connection_pool import ConnectionPool
+from instrumentation import Instrumentation
+
+
+# rows returned when a request does not give a limit, and the most it may ask for
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# the find_flights filters GET /flights accepts, each with how its query string value is read
+FLIGHT_FILTERS = {
+    "flight_number": str,
+    "origin": str,
+    "destination": str,
+    "status": str,
+    "statuses": str,
+    "pilot_id": int,
+    "departure_from": str,
+    "departure_to": str,
+}
+FLIGHT_ORDERS = ("id", "departure")
+
+error_log = logging.getLogger("flights.server")
+
+
+class NotFound(Exception):
+    pass
+
+
+class FlightRequestHandler(BaseHTTPRequestHandler):
+    # keep-alive so load test clients reuse their connection, without Nagle delaying the body behind the headers
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+
+        try:
+            routes = {
+                ("health",): self.health,
+                ("cache",): self.cache_stats,
+                ("stats",): self.query_stats,
+                ("flights",): self.list_flights,
+                ("pilots",): self.list_pilots,
+                ("pilots", "available"): self.available_pilots,
+                ("destinations",): self.list_destinations,
+                ("search",): self.text_search,
+            }
+            if len(parts) == 2 and parts[0] == "flights":
+                body = self.get_flight(parts[1])
+            elif len(parts) == 3 and parts[0] == "boards" and parts[2] in ("departures", "arrivals"):
+                body = self.board(parts[1], parts[2], query)
+            elif tuple(parts) in routes:
+                body = routes[tuple(parts)](query)
+            else:
+                raise NotFound(f"No route for {url.path}")
+        except NotFound as error:
+            self.send_json(404, {"error": str(error)})
+        except ValueError as error:
+            self.send_json(400, {"error": str(error)})
+        except Exception:
+            # e.g. a locked database; the client gets an answer instead of a dropped connection
+            error_log.exception("GET %s failed", self.path)
+            self.send_json(500, {"error": "Internal server error"})
+        else:
+            self.send_json(200, body)
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def limit(self, query):
+        try:
+            limit = int(query.pop("limit", DEFAULT_LIMIT))
+        except ValueError:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}") from None
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+        return limit
+
+    def health(self, query):
+        return {"status": "ok"}
+
+    # hit/miss counters of the destination and pilot reference cache
+    def cache_stats(self, query):
+        return self.server.pool.reference_cache.stats()
+
+    # statement and method timings, when the server runs with --instrument
+    def query_stats(self, query):
+        if self.server.pool.instrumentation is None:
+            raise NotFound("Instrumentation is off, start the server with --instrument")
+        return self.server.pool.instrumentation.snapshot()
+
+    # GET /flights?flight_number=&origin=LHR&destination=&statuses=Scheduled,Delayed&pilot_id=
+    #     &departure_from=&departure_to=&order=departure&limit=
+    def list_flights(self, query):
+        limit = self.limit(query)
+        order = query.pop("order", "id")
+        if order not in FLIGHT_ORDERS:
+            raise ValueError(f"order must be one of {', '.join(FLIGHT_ORDERS)}")
+        # only the filters are passed on, anything else in the query would be a keyword find_flights rejects
+        unknown = set(query) - set(FLIGHT_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown flight filter: {', '.join(sorted(unknown))}")
+        filters = {}
+        for name, value in query.items():
+            try:
+                filters[name] = FLIGHT_FILTERS[name](value)
+            except ValueError:
+                raise ValueError(f"Invalid {name}: {value}") from None
+        with self.server.pool.reader() as service:
+            flights = service.find_flights(by_departure=order == "departure", limit=limit, **filters)
+            return [flight._asdict() for flight in flights]
+
+    def get_flight(self, flight_number):
+        with self.server.pool.reader() as service:
+            flight = service.get_flight(flight_number.upper())
+        if flight is None:
+            raise NotFound(f"Flight {flight_number} not found")
+        return flight._asdict()
+
+    # GET /boards/LHR/departures?from=2025-02-01 06:00&hours=6, times are local to the airport
+    def board(self, airport_code, kind, query):
+        limit = self.limit(query)
+        hours = float(query.get("hours", 6))
+        with self.server.pool.reader() as service:
+            board = service.departure_board if kind == "departures" else service.arrival_board
+            return [flight._asdict() for flight in board(airport_code, query.get("from"), hours, limit)]
+
+    def list_pilots(self, query):
+        limit = self.limit(query)
+        with self.server.pool.reader() as service:
+            return [pilot._asdict() for pilot in islice(service.list_pilots(page_size=limit), limit)]
+
+    # GET /pilots/available?departure=2025-02-01 10:00&origin=LHR&pilot_ids=1,2,3, departure is local time at
+    # origin, or UTC when no origin is given
+    def available_pilots(self, query):
+        if "departure" not in query:
+            raise ValueError("departure is required")
+        pilot_ids = None
+        if query.get("pilot_ids"):
+            pilot_ids = [int(pilot_id) for pilot_id in query["pilot_ids"].split(",")]
+        with self.server.pool.reader() as service:
+            return {"departure": query["departure"],
+                    "pilot_ids": service.available_pilots(pilot_ids, query["departure"], query.get("origin"))}
+
+    def list_destinations(self, query):
+        limit = self.limit(query)
+        with self.server.pool.reader() as service:
+            destinations = service.list_destinations(page_size=limit)
+            return [destination._asdict() for destination in islice(destinations, limit)]
+
+
+    # GET /search?q=new yo&limit=20, prefix matches across destinations, pilots and flight numbers
+    def text_search(self, query):
+        limit = self.limit(query)
+        text = query.get("q", "")
+        with self.server.pool.reader() as service:
+            return {
+                "destinations": [row._asdict() for row in service.search_destinations(text, limit)],
+                "pilots": [row._asdict() for row in service.search_pilots(text, limit)],
+                "flights": [row._asdict() for row in service.search_flight_numbers(text, limit)],
+            }
+
+
+class FlightServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pool, quiet=False):
+        super().__init__(address, FlightRequestHandler)
+        self.pool = pool
+        self.quiet = quiet
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve flight listings, search and pilot availability as JSON")
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--readers", type=int, default=16, help="most read connections open at once")
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    parser.add_argument("--instrument", metavar="STATS_FILE",
+                        help="record query and method timings, served at /stats and added to STATS_FILE on exit")
+    parser.add_argument("--slow-ms", type=float, default=100.0, help="statements slower than this are logged")
+    args = parser.parse_args()
+
+    instrumentation = Instrumentation(args.slow_ms) if args.instrument else None
+    pool = ConnectionPool(args.database, args.readers, instrumentation=instrumentation)
+    server = FlightServer((args.host, args.port), pool, args.quiet)
+    print(f"Serving {args.database} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        if instrumentation is not None:
+            instrumentation.save(args.instrument)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,912 @@
+import calendar
+import json
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+
+from connection import DEFAULT_PROFILE, open_connection, profile_settings
+from instrumentation import InstrumentedConnection
+from migrations import SCHEMA_VERSION, migrate, schema_version
+from reference_cache import ReferenceCache
+
+
+# a pilot cannot fly two flights departing within 12 hours of each other
+PILOT_REST_SECONDS = 12 * 60 * 60
+
+VALID_STATUSES = ('Scheduled', 'Delayed', 'Cancelled', 'Completed')
+ACTIVE_STATUSES = ('Scheduled', 'Delayed')
+
+
+# namedtuples have no per-instance __dict__, rows are built straight into them by the cursor row_factory
+Flight = namedtuple("Flight",
+                    "flight_id flight_number origin destination departure_time status pilot_id pilot_name version")
+Pilot = namedtuple("Pilot", "pilot_id first_name last_name license_number availability")
+Destination = namedtuple("Destination", "destination_id airport_code city_name country timezone")
+# pilot identity without the availability column, which changes with every flight and is never cached
+PilotReference = namedtuple("PilotReference", "pilot_id first_name last_name license_number")
+RetireResult = namedtuple("RetireResult", "retired skipped flights_updated")
+# applied is (flight_id, new version), conflicts is (flight_id, expected version, current version or None when the
+# flight is gone), rejected is (flight_id, reason)
+AmendResult = namedtuple("AmendResult", "applied conflicts rejected")
+PilotAvailability = namedtuple("PilotAvailability", "pilot_id first_name last_name active_flights next_departure")
+# a flight on a departure or arrival board, local_time is in the timezone of the board's airport
+BoardFlight = namedtuple("BoardFlight",
+                         "flight_id flight_number origin destination local_time departure_utc status pilot_name")
+
+
+def record_factory(record):
+    return lambda cursor, row: record._make(row)
+
+
+def departure_epoch(departure_time):
+    # naive departure times are read as UTC, the same as strftime('%s') in the DepartureEpoch column
+    return calendar.timegm(datetime.fromisoformat(departure_time).timetuple())
+
+
+def departure_utc(departure_time, offset_minutes):
+    # a local departure time as DepartureUTC stores it, given the origin's minutes east of UTC
+    return (datetime.fromisoformat(departure_time) - timedelta(minutes=offset_minutes)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def normalise_departure(departure_time):
+    try:
+        return datetime.fromisoformat(str(departure_time)).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise ValueError(f"Invalid departure time: {departure_time}") from None
+
+
+@lru_cache(maxsize=None)
+def parse_utc_offset(timezone_name):
+    # minutes east of UTC for 'GMT', 'UTC', 'GMT-5' or 'GMT+5:30', the forms migrations.UTC_OFFSET reads
+    match = re.fullmatch(r"(?:GMT|UTC)(?:([+-])(\d{1,2})(?::(\d{2}))?)?", str(timezone_name).strip().upper())
+    if match is None:
+        raise ValueError(f"Invalid timezone {timezone_name}, expected e.g. GMT, GMT-5 or GMT+5:30")
+    sign, hours, minutes = match.groups()
+    offset = int(hours or 0) * 60 + int(minutes or 0)
+    if offset > 14 * 60 or int(minutes or 0) >= 60:
+        raise ValueError(f"Invalid timezone {timezone_name}, offsets range from GMT-14 to GMT+14")
+    return -offset if sign == "-" else offset
+
+
+def search_terms(text):
+    # every word of the text as a quoted prefix term, so punctuation typed by a user is never fts5 syntax
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+def take(rows, limit):
+    # a generator rather than an islice object, so callers can tell a lazy listing from a finished result
+    yield from islice(rows, limit)
+
+
+class FlightService:
+    # Table creation
+    pilots_table = """
+    CREATE TABLE IF NOT EXISTS Pilots (
+        PilotID INTEGER PRIMARY KEY,
+        FirstName TEXT NOT NULL,
+        LastName TEXT NOT NULL,
+        LicenseNumber TEXT UNIQUE NOT NULL
+    )
+    """
+
+    destinations_table = """
+    CREATE TABLE IF NOT EXISTS Destinations (
+        DestinationID INTEGER PRIMARY KEY,
+        AirportCode TEXT UNIQUE NOT NULL,
+        CityName TEXT NOT NULL,
+        Country TEXT NOT NULL,
+        TimeZone TEXT NOT NULL
+    )
+    """
+
+    flights_table = """
+    CREATE TABLE IF NOT EXISTS Flights (
+        FlightID INTEGER PRIMARY KEY,
+        FlightNumber TEXT NOT NULL,
+        Origin TEXT NOT NULL,
+        Destination TEXT NOT NULL,
+        DepartureTime DATETIME NOT NULL,
+        Status TEXT NOT NULL CHECK(Status IN ('Scheduled', 'Delayed', 'Cancelled', 'Completed')),
+        PilotID INTEGER,
+        FOREIGN KEY (PilotID) REFERENCES Pilots(PilotID)
+    )
+    """
+    #additional table added
+    deleted_destinations_table = """
+    CREATE TABLE IF NOT EXISTS DeletedDestinations (
+        DestinationID INTEGER PRIMARY KEY,
+        AirportCode TEXT NOT NULL,
+        CityName TEXT NOT NULL,
+        Country TEXT NOT NULL,
+        TimeZone TEXT NOT NULL
+    )
+    """
+
+    # Join Flights and Pilots tables to get pilot names
+    flight_select = """
+        SELECT
+            f.FlightID,
+            f.FlightNumber,
+            f.Origin,
+            f.Destination,
+            f.DepartureTime,
+            f.Status,
+            f.PilotID,
+            CASE
+                WHEN p.FirstName IS NULL THEN 'NO PILOT ASSIGNED'
+                ELSE p.FirstName || ' ' || p.LastName
+            END as PilotName,
+            f.Version
+        FROM Flights f
+        LEFT JOIN Pilots p ON f.PilotID = p.PilotID
+    """
+
+    # the same rows from live and archived flights, through the AllFlights view that attach_archive creates
+    history_select = flight_select.replace("FROM Flights f", "FROM AllFlights f")
+
+    destination_select = "SELECT DestinationID, AirportCode, CityName, Country, TimeZone FROM Destinations"
+
+    # availability is read from the trigger-maintained PilotAvailability table, one row per pilot
+    pilot_select = """
+        SELECT
+            p.PilotID,
+            p.FirstName,
+            p.LastName,
+            p.LicenseNumber,
+            CASE
+                WHEN COALESCE(a.ActiveFlights, 0) > 0 THEN 'NOT AVAILABLE'
+                ELSE 'AVAILABLE'
+            END as Status
+        FROM Pilots p
+        LEFT JOIN PilotAvailability a ON a.PilotID = p.PilotID
+    """
+
+    # optional filters accepted by find_flights; conditions are always added in this order, so searches
+    # with the same filters share one SQL text and sqlite's statement cache reuses the prepared statement
+    flight_filters = {
+        "flight_number": "f.FlightNumber = ?",
+        "origin": "f.Origin = ?",
+        "destination": "f.Destination = ?",
+        "status": "f.Status = ?",
+        # any of several statuses, bound as one json list so the text does not change with the count
+        "statuses": "f.Status IN (SELECT value FROM json_each(?))",
+        "pilot_id": "f.PilotID = ?",
+        "departure_from": "f.DepartureTime >= ?",
+        "departure_to": "f.DepartureTime < ?",
+    }
+
+    # rows fetched per query by the listing generators
+    page_size = 500
+
+    # database may be a file path or ":memory:", settings override single pragmas of the profile;
+    # reference_cache can be shared between services on the same database; an Instrumentation
+    # records the time of every statement and public method call, and is off by default; a loaded
+    # route_graph.RouteGraph is refreshed with every flight this service creates or amends
+    def __init__(self, database="flights.db", profile=DEFAULT_PROFILE, check_same_thread=True,
+                 reference_cache=None, instrumentation=None, route_graph=None, **settings):
+
+        # checked now so a bad profile fails here rather than at the first query
+        profile_settings(profile, **settings)
+        self.database = database
+        self.profile = profile
+        self.check_same_thread = check_same_thread
+        self.settings = settings
+        self.instrumentation = instrumentation
+        self.reference = reference_cache if reference_cache is not None else ReferenceCache()
+        self.routes = route_graph
+        # the connection and cursor are opened on first use, a service that is never queried never opens the file
+        self.connection = None
+        self.shared_cursor = None
+        # PRAGMA data_version of the connection when the reference cache was last checked against it
+        self.data_version = None
+        if instrumentation is not None:
+            instrumentation.instrument_methods(self)
+
+    @property
+    def connect(self):
+        if self.connection is None:
+            self.open()
+        return self.connection
+
+    @property
+    def cursor(self):
+        if self.shared_cursor is None:
+            self.shared_cursor = self.connect.cursor()
+        return self.shared_cursor
+
+    # the connection is only published once its schema is current, so a failed bootstrap leaves the service
+    # unopened, and the next use opens and bootstraps again
+    def open(self):
+        if self.instrumentation is None:
+            connection = open_connection(self.database, self.profile, self.check_same_thread, **self.settings)
+        else:
+            connection = open_connection(self.database, self.profile, self.check_same_thread,
+                                         InstrumentedConnection, **self.settings)
+            connection.instrumentation = self.instrumentation
+
+        # a database stamped with the current schema version was created, migrated and seeded by an earlier
+        # start, so the one PRAGMA read is all a warm start costs
+        try:
+            if schema_version(connection) < SCHEMA_VERSION:
+                if self.instrumentation is None:
+                    self.bootstrap(connection)
+                else:
+                    with self.instrumentation.attributed(f"{type(self).__name__}.bootstrap"):
+                        self.bootstrap(connection)
+        except Exception:
+            connection.close()
+            raise
+        self.connection = connection
+        self.shared_cursor = None
+        self.data_version = None
+
+    # creates, migrates and seeds the schema, run once by open on a database behind the current version
+    def bootstrap(self, connection):
+        cursor = connection.cursor()
+        cursor.execute(self.pilots_table)
+        cursor.execute(self.destinations_table)
+        cursor.execute(self.flights_table)
+        cursor.execute(self.deleted_destinations_table)
+        migrate(connection)
+
+        #reduce the duplication of data and limit the sqlite integrity error
+        cursor.execute("SELECT COUNT(*) FROM Flights")
+        count = cursor.fetchone()[0]
+
+        if count == 0:
+            self.seed(cursor)
+
+        connection.commit()
+
+    def seed(self, cursor):
+        pilot_data = [
+            ("James", "Anderson", "LIC123456"),
+            ("Sarah", "Thompson", "LIC789012"),
+            ("Robert", "Williams", "LIC345678"),
+            ("Emily", "Johnson", "LIC901234"),
+            ("Michael", "Brown", "LIC567890")
+        ]
+
+        destination_data = [
+            ("LHR", "London", "United Kingdom", "GMT"),
+            ("JFK", "New York", "United States", "GMT-5"),
+            ("CDG", "Paris", "France", "GMT+1"),
+            ("DXB", "Dubai", "United Arab Emirates", "GMT+4"),
+            ("SYD", "Sydney", "Australia", "GMT+11")
+        ]
+
+        flight_data = [
+            ("BA101", "LHR", "JFK", "2025-02-01 08:30:00", "Scheduled", 1),
+            ("AF302", "CDG", "DXB", "2025-02-01 12:15:00", "Delayed", 2),
+            ("EK450", "DXB", "SYD", "2025-02-02 18:45:00", "Completed", 3),
+            ("AA789", "JFK", "LHR", "2025-02-03 09:00:00", "Cancelled", 4),
+            ("QF200", "SYD", "CDG", "2025-02-04 21:30:00", "Scheduled", 5)
+        ]
+
+        cursor.executemany("INSERT INTO Pilots (FirstName, LastName, LicenseNumber) VALUES (?, ?, ?)",
+                           pilot_data)
+
+        cursor.executemany(
+            "INSERT INTO Destinations (AirportCode, CityName, Country, TimeZone) VALUES (?, ?, ?, ?)",
+            destination_data)
+
+        cursor.executemany(
+            "INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status, PilotID) VALUES (?, ?, ?, ?, ?, ?)",
+            flight_data)
+
+    def query(self, record, sql, params=()):
+        # a fresh cursor per query so results can be iterated while other calls run
+        cursor = self.connect.cursor()
+        cursor.row_factory = record_factory(record)
+        return cursor.execute(sql, params)
+
+    # keyset pagination, each page seeks past the last key seen instead of holding the whole result in memory;
+    # after is the key of a row already read, to carry on from it
+    def paginate(self, record, select, conditions, params, order_columns, key, page_size=None, after=None):
+        page_size = page_size or self.page_size
+        order = ", ".join(order_columns)
+        last = None if after is None else tuple(after)
+        while True:
+            where = list(conditions)
+            page_params = list(params)
+            if last is not None:
+                where.append(f"({order}) > ({', '.join('?' * len(last))})")
+                page_params.extend(last)
+
+            query = select
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += f" ORDER BY {order} LIMIT ?"
+
+            rows = self.query(record, query, page_params + [page_size]).fetchall()
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last = key(rows[-1])
+
+    # builds the WHERE conditions and parameters for any combination of flight_filters
+    def flight_conditions(self, filters):
+        unknown = set(filters) - set(self.flight_filters)
+        if unknown:
+            raise ValueError(f"Unknown flight filter: {', '.join(sorted(unknown))}")
+
+        values = {name: value for name, value in filters.items() if value is not None}
+        if "statuses" in values:
+            # a list of statuses, or a comma separated string as typed in the console or a query string
+            statuses = values.pop("statuses")
+            if isinstance(statuses, str):
+                statuses = statuses.split(",")
+            statuses = sorted({status.strip().title() for status in statuses if status.strip()})
+            invalid = [status for status in statuses if status not in VALID_STATUSES]
+            if invalid:
+                raise ValueError(f"Invalid status {', '.join(invalid)}.")
+            # one status is the plain equality, which seeks the Status index
+            if len(statuses) == 1 and "status" not in values:
+                values["status"] = statuses[0]
+            elif statuses:
+                values["statuses"] = json.dumps(statuses)
+        for name in ("departure_from", "departure_to"):
+            if name in values:
+                values[name] = normalise_departure(values[name])
+
+        conditions = []
+        params = []
+        for name, condition in self.flight_filters.items():
+            if name in values:
+                conditions.append(condition)
+                params.append(values[name])
+        return conditions, params
+
+    # one query per page for any combination of filters, in FlightID or departure order; limit stops after
+    # that many flights, fetched in a single query when it is below the page size; after starts past the flight
+    # with that key, (flight_id,) or (departure_time, flight_id) by departure
+    def find_flights(self, page_size=None, by_departure=False, limit=None, include_archive=False, after=None,
+                     **filters):
+        conditions, params = self.flight_conditions(filters)
+        select = self.flight_select
+        if include_archive:
+            if not self.archive_attached():
+                raise ValueError("No flight archive is attached.")
+            select = self.history_select
+
+        if by_departure:
+            order_columns, key = ("f.DepartureTime", "f.FlightID"), lambda row: (row.departure_time, row.flight_id)
+        else:
+            order_columns, key = ("f.FlightID",), lambda row: (row.flight_id,)
+
+        if limit is None:
+            return self.paginate(Flight, select, conditions, params, order_columns, key, page_size, after)
+        page_size = min(page_size or self.page_size, limit)
+        return take(self.paginate(Flight, select, conditions, params, order_columns, key, page_size, after), limit)
+
+    def get_flight(self, flight_number):
+        return self.query(Flight, self.flight_select + " WHERE f.FlightNumber = ? ORDER BY f.FlightID",
+                          (flight_number,)).fetchone()
+
+    def list_pilots(self, page_size=None, after=None):
+        return self.paginate(Pilot, self.pilot_select, [], [], ("p.PilotID",),
+                             lambda row: (row.pilot_id,), page_size, after)
+
+    def get_pilot(self, pilot_id):
+        return self.query(Pilot, self.pilot_select + " WHERE p.PilotID = ?", (pilot_id,)).fetchone()
+
+    def list_destinations(self, page_size=None, after=None):
+        return self.paginate(Destination, self.destination_select, [], [], ("DestinationID",),
+                             lambda row: (row.destination_id,), page_size, after)
+
+    # destination and pilot reference lookups are answered from the cache, these load a miss
+    def load_destination(self, airport_code):
+        return self.query(Destination, self.destination_select + " WHERE AirportCode = ?",
+                          (airport_code,)).fetchone()
+
+    def load_pilot(self, pilot_id):
+        return self.query(PilotReference, """
+            SELECT PilotID, FirstName, LastName, LicenseNumber FROM Pilots WHERE PilotID = ?
+        """, (pilot_id,)).fetchone()
+
+    def load_pilot_by_license(self, license_number):
+        return self.query(PilotReference, """
+            SELECT PilotID, FirstName, LastName, LicenseNumber FROM Pilots WHERE LicenseNumber = ?
+        """, (license_number,)).fetchone()
+
+    # data_version moves whenever another connection commits to the file, in this process or any other, and that
+    # commit may have added or retired a destination or pilot, so the shared cache is cleared; a connection seen
+    # for the first time clears it too. Reading the pragma costs no I/O
+    def sync_reference(self):
+        version = self.connect.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.data_version:
+            self.reference.clear()
+            self.data_version = version
+
+    def get_destination(self, airport_code):
+        self.sync_reference()
+        return self.reference.destination(airport_code, self.load_destination)
+
+    def pilot_reference(self, pilot_id):
+        try:
+            pilot_id = int(pilot_id)
+        except (TypeError, ValueError):
+            return None
+        self.sync_reference()
+        return self.reference.pilot(pilot_id, self.load_pilot)
+
+    def pilot_by_license(self, license_number):
+        self.sync_reference()
+        return self.reference.pilot_by_license(license_number, self.load_pilot_by_license)
+
+    def list_deleted_destinations(self, page_size=None):
+        return self.paginate(Destination, "SELECT * FROM DeletedDestinations", [], [], ("DestinationID",),
+                             lambda row: (row.destination_id,), page_size)
+
+    # exclude_flights are FlightIDs being amended, which may keep their own number
+    def flight_number_exists(self, flight_number, exclude_flights=()):
+        if not exclude_flights:
+            self.cursor.execute("SELECT EXISTS (SELECT 1 FROM Flights WHERE FlightNumber = ?)", (flight_number,))
+        else:
+            self.cursor.execute("""
+                SELECT EXISTS (SELECT 1 FROM Flights WHERE FlightNumber = ?
+                               AND FlightID NOT IN (SELECT value FROM json_each(?)))
+            """, (flight_number, json.dumps(list(exclude_flights))))
+        return bool(self.cursor.fetchone()[0])
+
+    def airport_exists(self, airport_code):
+        return self.get_destination(airport_code) is not None
+
+    def pilot_exists(self, pilot_id):
+        return self.pilot_reference(pilot_id) is not None
+
+    # departure_time is local time at origin; without an origin it is taken as UTC
+    def departure_utc_epoch(self, departure_time, origin=None):
+        offset = 0
+        if origin is not None:
+            self.cursor.execute("SELECT UtcOffsetMinutes FROM Destinations WHERE AirportCode = ?", (origin.upper(),))
+            row = self.cursor.fetchone()
+            offset = row[0] if row else 0
+        return departure_epoch(departure_time) - offset * 60
+
+    # returns the pilots from pilot_ids (all pilots when None) with no active flight within 12 hours
+    # of departure_time, in one query; the window is measured in UTC, so flights from airports in different
+    # timezones are compared by the instant they leave. exclude_flights are FlightIDs being amended, which
+    # never conflict with themselves
+    def available_pilots(self, pilot_ids, departure_time, origin=None, exclude_flights=()):
+        departure = self.departure_utc_epoch(departure_time, origin)
+        pilot_filter = "1"
+        params = []
+        if pilot_ids is not None:
+            pilot_filter = "p.PilotID IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(pilot_id) for pilot_id in pilot_ids]))
+        params.append(json.dumps([int(flight_id) for flight_id in exclude_flights]))
+
+        self.cursor.execute(f"""
+            SELECT p.PilotID FROM Pilots p
+            WHERE {pilot_filter}
+            AND NOT EXISTS (
+                SELECT 1 FROM Flights f WHERE f.PilotID = p.PilotID
+                AND f.Status IN ('Scheduled', 'Delayed')
+                AND f.FlightID NOT IN (SELECT value FROM json_each(?))
+                AND f.DepartureUTCEpoch BETWEEN ? AND ?
+            )
+            ORDER BY p.PilotID
+        """, params + [departure - PILOT_REST_SECONDS, departure + PILOT_REST_SECONDS])
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def pilot_is_available(self, pilot_id, departure_time, origin=None, exclude_flights=()):
+        return bool(self.available_pilots([pilot_id], departure_time, origin, exclude_flights))
+
+    availability_select = """
+        SELECT p.PilotID, p.FirstName, p.LastName, COALESCE(a.ActiveFlights, 0), a.NextDeparture
+        FROM Pilots p
+        LEFT JOIN PilotAvailability a ON a.PilotID = p.PilotID
+    """
+
+    # active flight count and earliest active departure per pilot; idle_only keeps pilots with no active flights
+    def pilot_availability(self, idle_only=False, page_size=None):
+        conditions = ["COALESCE(a.ActiveFlights, 0) = 0"] if idle_only else []
+        return self.paginate(PilotAvailability, self.availability_select, conditions, [], ("p.PilotID",),
+                             lambda row: (row.pilot_id,), page_size)
+
+    def get_pilot_availability(self, pilot_id):
+        return self.query(PilotAvailability, self.availability_select + " WHERE p.PilotID = ?",
+                          (pilot_id,)).fetchone()
+
+    def pilot_schedule(self, pilot_id):
+        return self.query(Flight, self.flight_select + """
+            WHERE f.PilotID = ? AND f.Status IN ('Scheduled', 'Delayed')
+            ORDER BY f.DepartureTime
+        """, (pilot_id,)).fetchall()
+
+    # ranked prefix search over airport code, city and country; a code match counts most, then the city
+    def search_destinations(self, text, limit=20):
+        terms = search_terms(text)
+        if terms is None:
+            return []
+        return self.query(Destination, """
+            SELECT d.DestinationID, d.AirportCode, d.CityName, d.Country, d.TimeZone FROM DestinationSearch s
+            JOIN Destinations d ON d.DestinationID = s.rowid
+            WHERE DestinationSearch MATCH ?
+            ORDER BY bm25(DestinationSearch, 10.0, 5.0, 1.0), d.DestinationID
+            LIMIT ?
+        """, (terms, limit)).fetchall()
+
+    # ranked prefix search over first and last name, surnames weigh more
+    def search_pilots(self, text, limit=20):
+        terms = search_terms(text)
+        if terms is None:
+            return []
+        return self.query(Pilot, """
+            WITH hits AS (
+                SELECT rowid, bm25(PilotSearch, 1.0, 2.0) AS score FROM PilotSearch
+                WHERE PilotSearch MATCH ?
+                ORDER BY score LIMIT ?
+            )
+        """ + self.pilot_select + """
+            JOIN hits h ON h.rowid = p.PilotID
+            ORDER BY h.score, p.PilotID
+        """, (terms, limit)).fetchall()
+
+    # flight numbers starting with text; every number is a single word so ranking has nothing to order by,
+    # matches come back in FlightID order, which lets a short prefix stop after limit rows
+    def search_flight_numbers(self, text, limit=20):
+        terms = search_terms(text)
+        if terms is None:
+            return []
+        return self.query(Flight, """
+            WITH hits AS (
+                SELECT rowid FROM FlightNumberSearch WHERE FlightNumberSearch MATCH ? ORDER BY rowid LIMIT ?
+            )
+        """ + self.flight_select + """
+            JOIN hits h ON h.rowid = f.FlightID
+            ORDER BY f.FlightID
+        """, (terms, limit)).fetchall()
+
+    # minutes east of UTC at an airport, from the cached destination and the cached parse of its timezone
+    def airport_utc_offset(self, airport_code):
+        destination = self.get_destination(airport_code.upper())
+        if destination is None:
+            raise ValueError(f"Airport {airport_code} does not exist in our listings.")
+        return parse_utc_offset(destination.timezone)
+
+    board_select = """
+        SELECT
+            f.FlightID,
+            f.FlightNumber,
+            f.Origin,
+            f.Destination,
+            datetime(f.DepartureUTC, ?) AS LocalTime,
+            f.DepartureUTC,
+            f.Status,
+            CASE
+                WHEN p.FirstName IS NULL THEN 'NO PILOT ASSIGNED'
+                ELSE p.FirstName || ' ' || p.LastName
+            END as PilotName
+        FROM Flights f
+        LEFT JOIN Pilots p ON f.PilotID = p.PilotID
+    """
+
+    # flights of one airport departing in [start, start + hours), start and the returned times are local to
+    # the airport and start defaults to its current local time; one range read of the (airport, DepartureUTC) index
+    def board(self, column, airport_code, start=None, hours=6, limit=None):
+        airport_code = airport_code.upper()
+        offset = timedelta(minutes=self.airport_utc_offset(airport_code))
+        if start is None:
+            start_utc = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        else:
+            start_utc = datetime.fromisoformat(normalise_departure(start)) - offset
+        end_utc = start_utc + timedelta(hours=hours)
+
+        query = self.board_select + f"""
+            WHERE f.{column} = ? AND f.DepartureUTC >= ? AND f.DepartureUTC < ?
+            ORDER BY f.DepartureUTC, f.FlightID
+        """
+        params = [f"{int(offset.total_seconds() // 60):+d} minutes", airport_code,
+                  start_utc.strftime("%Y-%m-%d %H:%M:%S"), end_utc.strftime("%Y-%m-%d %H:%M:%S")]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self.query(BoardFlight, query, params).fetchall()
+
+    def departure_board(self, airport_code, start=None, hours=6, limit=None):
+        return self.board("Origin", airport_code, start, hours, limit)
+
+    # there is no arrival time in the schedule, inbound flights are listed by their departure instant
+    # shown in the destination's local time
+    def arrival_board(self, airport_code, start=None, hours=6, limit=None):
+        return self.board("Destination", airport_code, start, hours, limit)
+
+    # (active, finished) flight counts for an airport, used before retiring it
+    def destination_flight_counts(self, airport_code):
+        self.cursor.execute("""
+            SELECT
+                COUNT(*) FILTER (WHERE Status NOT IN ('Completed', 'Cancelled')),
+                COUNT(*) FILTER (WHERE Status IN ('Completed', 'Cancelled'))
+            FROM Flights WHERE Destination = ?
+        """, (airport_code,))
+        return self.cursor.fetchone()
+
+    def validate_route(self, origin, destination):
+        if not self.airport_exists(origin):
+            raise ValueError(f"Origin airport {origin} does not exist in our listings.")
+        if not self.airport_exists(destination):
+            raise ValueError(f"Destination airport {destination} does not exist in our listings.")
+        if origin == destination:
+            raise ValueError("Destination cannot be the same as origin!")
+
+    def validate_pilot(self, pilot_id, departure_time, origin=None, exclude_flights=()):
+        if not self.pilot_exists(pilot_id):
+            raise ValueError(f"Invalid pilot ID {pilot_id}.")
+        if not self.pilot_is_available(pilot_id, departure_time, origin, exclude_flights):
+            raise ValueError(f"Pilot {pilot_id} is flying within 12 hours of {departure_time}.")
+
+    def create_flight(self, flight_number, origin, destination, departure_time, pilot_id=None, status='Scheduled'):
+        flight_number = flight_number.upper()
+        origin = origin.upper()
+        destination = destination.upper()
+        departure_time = normalise_departure(departure_time)
+        status = status.title()
+
+        if status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status {status}.")
+
+        with self.connect:
+            # checked with the write lock held, so no other connection can take the number, retire an airport or
+            # book the pilot between the checks and the insert
+            self.connect.execute("BEGIN IMMEDIATE")
+            if self.flight_number_exists(flight_number):
+                raise ValueError(f"Flight number {flight_number} already exists.")
+            self.validate_route(origin, destination)
+            if pilot_id is not None:
+                self.validate_pilot(pilot_id, departure_time, origin)
+            utc = departure_utc(departure_time, self.airport_utc_offset(origin))
+            self.cursor.execute("""
+                INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status, PilotID, DepartureUTC)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (flight_number, origin, destination, departure_time, status, pilot_id, utc))
+            flight_id = self.cursor.lastrowid
+        self.refresh_routes(flight_id)
+        return self.query(Flight, self.flight_select + " WHERE f.FlightID = ?", (flight_id,)).fetchone()
+
+    # the flight fields amend_flight and amend_flights accept, and their columns
+    amend_columns = {
+        "flight_number": "FlightNumber",
+        "origin": "Origin",
+        "destination": "Destination",
+        "departure_time": "DepartureTime",
+        "pilot_id": "PilotID",
+        "status": "Status",
+    }
+
+    # checks and normalises changes to the current flight, raising ValueError for the first invalid field;
+    # flight_ids are the flights the changes are written to, current's own when not given. callers hold the
+    # write lock, so no other writer can take the number or book the pilot between these checks and the update
+    def validate_changes(self, current, changes, flight_ids=None):
+        changes = dict(changes)
+        flight_ids = (current.flight_id,) if flight_ids is None else flight_ids
+        unknown = set(changes) - set(self.amend_columns)
+        if unknown:
+            raise ValueError(f"Unknown flight fields: {', '.join(sorted(unknown))}")
+
+        if "flight_number" in changes:
+            changes["flight_number"] = changes["flight_number"].upper()
+            if not 2 <= len(changes["flight_number"]) <= 6:
+                raise ValueError("Flight number must be 2-6 characters.")
+            if self.flight_number_exists(changes["flight_number"], flight_ids):
+                raise ValueError(f"Flight number {changes['flight_number']} already exists.")
+        if "origin" in changes or "destination" in changes:
+            changes["origin"] = changes.get("origin", current.origin).upper()
+            changes["destination"] = changes.get("destination", current.destination).upper()
+            self.validate_route(changes["origin"], changes["destination"])
+        if "departure_time" in changes:
+            changes["departure_time"] = normalise_departure(changes["departure_time"])
+        # a new pilot, or a crewed flight moved in time or place, is checked against the pilot's other flights
+        pilot_id = changes["pilot_id"] if "pilot_id" in changes else current.pilot_id
+        if pilot_id is not None and {"pilot_id", "departure_time", "origin"} & set(changes):
+            self.validate_pilot(pilot_id, changes.get("departure_time", current.departure_time),
+                                changes.get("origin", current.origin), flight_ids)
+        if "status" in changes:
+            changes["status"] = changes["status"].title()
+            if changes["status"] not in VALID_STATUSES:
+                raise ValueError(f"Invalid status {changes['status']}.")
+        return changes
+
+    # changes is any of flight_number, origin, destination, departure_time, pilot_id, status;
+    # every flight with the given number is updated in one statement
+    def amend_flight(self, flight_number, changes):
+        current = self.get_flight(flight_number)
+        if current is None:
+            raise ValueError(f"Flight number {flight_number} not found.")
+
+        with self.connect:
+            # as in create_flight, the checks and the update run under one write lock
+            self.connect.execute("BEGIN IMMEDIATE")
+            self.cursor.execute("SELECT FlightID FROM Flights WHERE FlightNumber = ?", (flight_number,))
+            flight_ids = [row[0] for row in self.cursor.fetchall()]
+            changes = self.validate_changes(current, changes, flight_ids)
+            if changes:
+                assignments = ", ".join(f"{self.amend_columns[name]} = ?" for name in changes)
+                self.cursor.execute(f"UPDATE Flights SET {assignments} WHERE FlightNumber = ?",
+                                    list(changes.values()) + [flight_number])
+        if changes:
+            self.refresh_routes(*flight_ids)
+        return self.get_flight(changes.get("flight_number", flight_number))
+
+    # amendments are dicts of flight_id, the version the caller last read (None overwrites whatever is there) and
+    # any amend_flight fields; every flight's changes are one UPDATE by FlightID and the whole list one transaction.
+    # a flight changed since the caller read it is a conflict and an invalid change is rejected, both are left
+    # as they are while the other flights are applied
+    def amend_flights(self, amendments):
+        amendments = [dict(amendment) for amendment in amendments]
+        if any("flight_id" not in amendment for amendment in amendments):
+            raise ValueError("Every amendment needs a flight_id.")
+
+        result = AmendResult([], [], [])
+        with self.connect:
+            # taken before the versions are read, so no other writer can change a flight between check and update
+            self.connect.execute("BEGIN IMMEDIATE")
+            flight_ids = json.dumps(sorted({amendment["flight_id"] for amendment in amendments}))
+            current = {flight.flight_id: flight for flight in self.query(
+                Flight, self.flight_select + " WHERE f.FlightID IN (SELECT value FROM json_each(?))", (flight_ids,))}
+
+            for changes in amendments:
+                flight_id = changes.pop("flight_id")
+                expected = changes.pop("version", None)
+                flight = current.get(flight_id)
+                if flight is None or expected is not None and expected != flight.version:
+                    result.conflicts.append((flight_id, expected, flight.version if flight else None))
+                    continue
+                try:
+                    changes = self.validate_changes(flight, changes)
+                except ValueError as error:
+                    result.rejected.append((flight_id, str(error)))
+                    continue
+                if not changes:
+                    result.rejected.append((flight_id, "No changes."))
+                    continue
+
+                assignments = ", ".join(f"{self.amend_columns[name]} = ?" for name in changes)
+                self.cursor.execute(f"UPDATE Flights SET {assignments}, Version = Version + 1 "
+                                    f"WHERE FlightID = ? AND Version = ?",
+                                    list(changes.values()) + [flight_id, flight.version])
+                # a later amendment of the same flight is checked against this one
+                current[flight_id] = flight._replace(version=flight.version + 1, **changes)
+                result.applied.append((flight_id, flight.version + 1))
+
+        if result.applied:
+            self.refresh_routes(*(flight_id for flight_id, _ in result.applied))
+        return result
+
+    def refresh_routes(self, *flight_ids):
+        if self.routes is not None:
+            self.routes.refresh(self, flight_ids)
+
+    def assign_pilot(self, flight_number, pilot_id):
+        return self.amend_flight(flight_number, {"pilot_id": pilot_id})
+
+    def update_status(self, flight_number, status):
+        return self.amend_flight(flight_number, {"status": status})
+
+    def add_pilot(self, first_name, last_name, license_number):
+        license_number = license_number.upper()
+        #logic to check if pilot already in data assuming all licensce numbers are unique
+        if self.pilot_by_license(license_number) is not None:
+            raise ValueError(f"Pilot license number {license_number} already exists.")
+
+        with self.connect:
+            self.cursor.execute("""
+                INSERT INTO Pilots (FirstName, LastName, LicenseNumber)
+                VALUES (?, ?, ?)""", (first_name.title(), last_name.title(), license_number))
+            pilot_id = self.cursor.lastrowid
+        # the license was cached as missing by the check above
+        self.reference.invalidate_pilot(pilot_id, license_number)
+        return self.get_pilot(pilot_id)
+
+    def add_destination(self, airport_code, city_name, country, timezone):
+        airport_code = airport_code.upper()
+        if self.airport_exists(airport_code):
+            raise ValueError(f"Airport {airport_code} already exists.")
+        parse_utc_offset(timezone)
+
+        # format into capital letters and noun (first letter capitalised)
+        with self.connect:
+            self.cursor.execute("""
+                INSERT INTO Destinations (AirportCode, CityName, Country, TimeZone)
+                VALUES (?, ?, ?, ?)""", (airport_code, city_name.title(), country.title(), timezone.strip().upper()))
+        self.reference.invalidate_destination(airport_code)
+        # so routes can be searched from the new airport before any flight leaves it
+        self.refresh_routes()
+        return self.get_destination(airport_code)
+
+    # archives the airport into DeletedDestinations and removes it, refused while flights to it are active
+    def remove_destination(self, airport_code):
+        airport_code = airport_code.upper()
+        result = self.retire_destinations([airport_code])
+        if airport_code in result.skipped:
+            raise ValueError(result.skipped[airport_code])
+        return result
+
+    # archives, deletes and detaches finished flights from many airports in one transaction; each step goes
+    # through the Destination index for the listed codes only, so the cost follows the flights affected
+    def retire_destinations(self, airport_codes):
+        codes = sorted({code.upper() for code in airport_codes})
+        with self.connect:
+            # taken before the checks so no flight can be scheduled to a code between check and delete
+            self.connect.execute("BEGIN IMMEDIATE")
+            self.cursor.execute("""
+                SELECT AirportCode FROM Destinations WHERE AirportCode IN (SELECT value FROM json_each(?))
+            """, (json.dumps(codes),))
+            existing = {row[0] for row in self.cursor.fetchall()}
+            self.cursor.execute("""
+                SELECT DISTINCT Destination FROM Flights
+                WHERE Destination IN (SELECT value FROM json_each(?))
+                AND Status NOT IN ('Completed', 'Cancelled')
+            """, (json.dumps(codes),))
+            active = {row[0] for row in self.cursor.fetchall()}
+
+            skipped = {}
+            for code in codes:
+                if code in active:
+                    skipped[code] = f"Destination '{code}' cannot be deleted as it has active flights."
+                elif code not in existing:
+                    skipped[code] = f"Airport {code} does not exist in our listings."
+            retired = [code for code in codes if code not in skipped]
+            retired_json = json.dumps(retired)
+
+            flights_updated = 0
+            if retired:
+                self.cursor.execute("""
+                    INSERT INTO DeletedDestinations (AirportCode, CityName, Country, TimeZone)
+                    SELECT AirportCode, CityName, Country, TimeZone
+                    FROM Destinations
+                    WHERE AirportCode IN (SELECT value FROM json_each(?))
+                """, (retired_json,))
+                self.cursor.execute("DELETE FROM Destinations WHERE AirportCode IN (SELECT value FROM json_each(?))",
+                                    (retired_json,))
+                #stop finished flights pointing at an airport code that no longer exists
+                self.cursor.execute("""
+                    UPDATE Flights
+                    SET Destination = '-'
+                    WHERE Destination IN (SELECT value FROM json_each(?))
+                    AND Status IN ('Completed', 'Cancelled')
+                """, (retired_json,))
+                flights_updated = self.cursor.rowcount
+
+        for code in retired:
+            self.reference.invalidate_destination(code)
+        return RetireResult(retired, skipped, flights_updated)
+
+    def archive_attached(self):
+        self.cursor.execute("PRAGMA database_list")
+        return "archive" in {row[1] for row in self.cursor.fetchall()}
+
+    # attaches the archive database that archive.py moves finished flights into, as schema 'archive'; its
+    # Flights table follows the live columns, and the temporary AllFlights view reads both tables
+    def attach_archive(self, path):
+        if not self.archive_attached():
+            self.cursor.execute("ATTACH DATABASE ? AS archive", (path,))
+        self.cursor.execute("PRAGMA main.table_info(Flights)")
+        columns = [(row[1], row[2]) for row in self.cursor.fetchall() if row[1] != "FlightID"]
+        definitions = ", ".join(f"{name} {column_type}" for name, column_type in columns)
+        self.cursor.execute(f"CREATE TABLE IF NOT EXISTS archive.Flights "
+                            f"(FlightID INTEGER PRIMARY KEY, {definitions}, ArchivedAt DATETIME)")
+        # columns added to the live table by later migrations are added to the archive too
+        self.cursor.execute("PRAGMA archive.table_info(Flights)")
+        archived = {row[1] for row in self.cursor.fetchall()}
+        for name, column_type in columns:
+            if name not in archived:
+                self.cursor.execute(f"ALTER TABLE archive.Flights ADD COLUMN {name} {column_type}")
+        for column in ("FlightNumber", "Origin", "Destination", "DepartureTime", "PilotID"):
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_archive_{column.lower()} "
+                                f"ON Flights ({column})")
+
+        names = ", ".join(["FlightID"] + [name for name, column_type in columns])
+        self.cursor.execute("DROP VIEW IF EXISTS temp.AllFlights")
+        self.cursor.execute(f"""
+            CREATE TEMP VIEW AllFlights AS
+            SELECT {names} FROM main.Flights
+            UNION ALL
+            SELECT {names} FROM archive.Flights
+        """)
+        self.connect.commit()
+        return names
@@ -0,0 +1,394 @@
+import argparse
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import types
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# upper bounds in ms of the latency histogram buckets, the last bucket takes everything slower
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+# statement and method time outside any instrumented method call
+UNATTRIBUTED = "(unattributed)"
+# slow statements kept with their plans, older ones are dropped
+SLOW_LOG_SIZE = 200
+
+slow_log = logging.getLogger("flights.slow_queries")
+
+
+def normalise_sql(sql):
+    return " ".join(sql.split())
+
+
+def bucket(elapsed_ms):
+    for index, bound in enumerate(BUCKETS_MS):
+        if elapsed_ms <= bound:
+            return index
+    return len(BUCKETS_MS) - 1
+
+
+def percentile(stats, fraction):
+    # interpolated within the bucket holding the fraction-th call, never above the slowest call seen
+    target = fraction * stats["count"]
+    seen = 0
+    lower = 0.0
+    for bound, count in zip(BUCKETS_MS, stats["histogram"]):
+        if count and seen + count >= target:
+            upper = min(bound, stats["max_ms"])
+            return lower + (upper - lower) * max(target - seen, 0) / count
+        seen += count
+        lower = bound
+    return stats["max_ms"]
+
+
+def new_stats():
+    return {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "histogram": [0] * len(BUCKETS_MS)}
+
+
+def add_timing(stats, elapsed_ms):
+    stats["count"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+    stats["histogram"][bucket(elapsed_ms)] += 1
+
+
+def merge_stats(into, stats):
+    for name, value in stats.items():
+        if name == "histogram":
+            into[name] = [mine + theirs for mine, theirs in zip(into[name], value)]
+        elif name == "max_ms":
+            into[name] = max(into[name], value)
+        elif name == "methods":
+            for method, count in value.items():
+                into[name][method] = into[name].get(method, 0) + count
+        else:
+            into[name] = into.get(name, 0) + value
+
+
+class Statement:
+    # one execution of a statement, timed across execute and every fetch until the cursor moves on
+    def __init__(self, sql, parameters, method):
+        self.sql = sql
+        self.parameters = parameters
+        self.method = method
+        self.elapsed_ms = 0.0
+        self.rows = 0
+        self.logged = False
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    statement = None
+
+    def timed(self, call, *args):
+        instrumentation = self.connection.instrumentation
+        if instrumentation is None or self.statement is None:
+            return call(*args)
+        start = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            instrumentation.add_time(self, self.statement, (time.perf_counter() - start) * 1000)
+
+    def execute(self, sql, parameters=()):
+        self.finish()
+        instrumentation = self.connection.instrumentation
+        if instrumentation is not None:
+            self.statement = instrumentation.begin(sql, parameters)
+        self.timed(super().execute, sql, parameters)
+        if self.statement is not None and self.rowcount > 0:
+            self.statement.rows = self.rowcount
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self.finish()
+        instrumentation = self.connection.instrumentation
+        if instrumentation is not None:
+            # parameters of a batch are not kept, the plan of a slow batch is explained without them
+            self.statement = instrumentation.begin(sql, None)
+        self.timed(super().executemany, sql, seq_of_parameters)
+        if self.statement is not None:
+            self.statement.rows = max(self.rowcount, 0)
+        self.finish()
+        return self
+
+    def fetchone(self):
+        row = self.timed(super().fetchone)
+        if row is None:
+            self.finish()
+        elif self.statement is not None:
+            self.statement.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self.timed(super().fetchmany, self.arraysize if size is None else size)
+        if not rows:
+            self.finish()
+        elif self.statement is not None:
+            self.statement.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.timed(super().fetchall)
+        if self.statement is not None:
+            self.statement.rows += len(rows)
+        self.finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self.timed(super().__next__)
+        except StopIteration:
+            self.finish()
+            raise
+        if self.statement is not None:
+            self.statement.rows += 1
+        return row
+
+    def close(self):
+        self.finish()
+        super().close()
+
+    def finish(self):
+        statement, self.statement = self.statement, None
+        if statement is not None and self.connection.instrumentation is not None:
+            self.connection.instrumentation.record(statement)
+
+    def __del__(self):
+        # cursors read with a single fetchone are never exhausted, they are recorded when dropped
+        try:
+            self.finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # set by FlightService after the connection is opened, statements run before then are not recorded
+    instrumentation = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # the built-in shortcuts create a plain cursor internally, these go through the instrumented one
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class Instrumentation:
+    # per-statement and per-method counts and latency histograms, shared by any number of FlightServices;
+    # statements slower than slow_ms are logged with their EXPLAIN QUERY PLAN
+    def __init__(self, slow_ms=100.0):
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.statements = {}
+        self.methods = {}
+        self.slow = deque(maxlen=SLOW_LOG_SIZE)
+
+    # the public method being run on this thread, SQL it issues is attributed to it
+    def current_method(self):
+        calls = getattr(self.local, "calls", None)
+        return calls[-1] if calls else UNATTRIBUTED
+
+    # runs the block as its own method, even inside another method's call: work such as the schema setup on
+    # first use belongs to no caller, and would otherwise be charged to whichever method opened the connection
+    @contextmanager
+    def attributed(self, name):
+        calls = self.local.__dict__.setdefault("calls", [])
+        calls.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            calls.pop()
+            self.record_method(name, (time.perf_counter() - start) * 1000)
+
+    def begin(self, sql, parameters):
+        return Statement(sql, parameters, self.current_method())
+
+    def add_time(self, cursor, statement, elapsed_ms):
+        statement.elapsed_ms += elapsed_ms
+        if statement.elapsed_ms >= self.slow_ms and not statement.logged:
+            statement.logged = True
+            self.log_slow(cursor.connection, statement)
+
+    def log_slow(self, connection, statement):
+        try:
+            # a plain cursor, so explaining is not itself recorded
+            plan = [row[3] for row in sqlite3.Cursor(connection).execute(
+                "EXPLAIN QUERY PLAN " + statement.sql, statement.parameters or ())]
+        except sqlite3.Error as error:
+            plan = [f"plan unavailable: {error}"]
+        entry = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "ms": round(statement.elapsed_ms, 3),
+            "method": statement.method,
+            "sql": normalise_sql(statement.sql),
+            "parameters": repr(statement.parameters)[:200],
+            "plan": plan,
+        }
+        with self.lock:
+            self.slow.append(entry)
+        slow_log.warning("slow query %.1f ms in %s: %s | plan: %s", entry["ms"], entry["method"], entry["sql"],
+                         "; ".join(plan))
+
+    def record(self, statement):
+        sql = normalise_sql(statement.sql)
+        with self.lock:
+            stats = self.statements.get(sql)
+            if stats is None:
+                stats = self.statements[sql] = dict(new_stats(), rows=0, methods={})
+            add_timing(stats, statement.elapsed_ms)
+            stats["rows"] += statement.rows
+            stats["methods"][statement.method] = stats["methods"].get(statement.method, 0) + 1
+
+            method = self.method_stats(statement.method)
+            method["sql_ms"] += statement.elapsed_ms
+            method["statements"] += 1
+
+    def method_stats(self, name):
+        stats = self.methods.get(name)
+        if stats is None:
+            stats = self.methods[name] = dict(new_stats(), sql_ms=0.0, statements=0)
+        return stats
+
+    def record_method(self, name, elapsed_ms):
+        with self.lock:
+            add_timing(self.method_stats(name), elapsed_ms)
+
+    def instrument_methods(self, target):
+        # wraps the public methods of target on the instance, only the outermost call on a thread is timed
+        # so a method called by another is counted as part of its caller
+        owner = type(target).__name__
+        for name in dir(type(target)):
+            if name.startswith("_") or not isinstance(getattr(type(target), name), types.FunctionType):
+                continue
+            setattr(target, name, self.timed_method(f"{owner}.{name}", getattr(target, name)))
+
+    def timed_method(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            calls = self.local.__dict__.setdefault("calls", [])
+            if calls:
+                return method(*args, **kwargs)
+            calls.append(name)
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                calls.pop()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+            if isinstance(result, types.GeneratorType):
+                # listings do their work as they are iterated, the time is recorded when iteration ends
+                return self.timed_generator(name, result, elapsed_ms)
+            self.record_method(name, elapsed_ms)
+            return result
+        return timed
+
+    def timed_generator(self, name, generator, elapsed_ms):
+        try:
+            while True:
+                calls = self.local.__dict__.setdefault("calls", [])
+                calls.append(name)
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    calls.pop()
+                    elapsed_ms += (time.perf_counter() - start) * 1000
+                yield item
+        finally:
+            generator.close()
+            self.record_method(name, elapsed_ms)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "slow_ms": self.slow_ms,
+                "methods": json.loads(json.dumps(self.methods)),
+                "statements": json.loads(json.dumps(self.statements)),
+                "slow": list(self.slow),
+            }
+
+    # adds this session's numbers to the file, so stats build up over several runs
+    def save(self, path):
+        stats = load_stats(path) if os.path.exists(path) else {"methods": {}, "statements": {}, "slow": []}
+        snapshot = self.snapshot()
+        for section in ("methods", "statements"):
+            for key, value in snapshot[section].items():
+                if key in stats[section]:
+                    merge_stats(stats[section][key], value)
+                else:
+                    stats[section][key] = value
+        stats["slow"] = (stats["slow"] + snapshot["slow"])[-SLOW_LOG_SIZE:]
+        stats["slow_ms"] = snapshot["slow_ms"]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(stats, file, indent=2)
+
+
+def load_stats(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def print_report(stats, top=20, sort="total_ms"):
+    print("\nMethod Latency:")
+    print("-" * 100)
+    print(f"{'Method':<40} {'Calls':>8} {'Total ms':>12} {'SQL ms':>12} {'p50 ms':>8} {'p99 ms':>8} {'Max ms':>8}")
+    print("-" * 100)
+    methods = sorted(stats["methods"].items(), key=lambda item: item[1][sort], reverse=True)
+    for name, method in methods[:top]:
+        if not method["count"]:
+            # statements outside any method call, no latency of their own
+            print(f"{name:<40} {'':>8} {'':>12} {method['sql_ms']:>12,.2f}")
+            continue
+        print(f"{name:<40} {method['count']:>8} {method['total_ms']:>12,.2f} {method['sql_ms']:>12,.2f} "
+              f"{percentile(method, 0.5):>8,.2f} {percentile(method, 0.99):>8,.2f} {method['max_ms']:>8,.2f}")
+    print("-" * 100)
+
+    print("\nStatements:")
+    print("-" * 100)
+    print(f"{'Count':>8} {'Total ms':>12} {'p50 ms':>8} {'p99 ms':>8} {'Max ms':>8} {'Rows':>10}  Called from")
+    print("-" * 100)
+    statements = sorted(stats["statements"].items(), key=lambda item: item[1][sort], reverse=True)
+    for sql, statement in statements[:top]:
+        callers = ", ".join(f"{method} ({count})" for method, count in
+                            sorted(statement["methods"].items(), key=lambda item: item[1], reverse=True))
+        print(f"{statement['count']:>8} {statement['total_ms']:>12,.2f} {percentile(statement, 0.5):>8,.2f} "
+              f"{percentile(statement, 0.99):>8,.2f} {statement['max_ms']:>8,.2f} {statement['rows']:>10}  {callers}")
+        print(f"    {sql[:200]}")
+    print("-" * 100)
+
+    print(f"\nSlow Queries (over {stats.get('slow_ms')} ms, most recent last):")
+    print("-" * 100)
+    for entry in stats["slow"][-top:]:
+        print(f"{entry['at']}  {entry['ms']:,.1f} ms  {entry['method']}")
+        print(f"    {entry['sql'][:200]}")
+        print(f"    parameters {entry['parameters']}")
+        for detail in entry["plan"]:
+            print(f"    plan: {detail}")
+    print("-" * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report query and method timings recorded with --instrument")
+    parser.add_argument("stats", nargs="?", default="flight_stats.json", help="stats file written by an instrumented run")
+    parser.add_argument("--top", type=int, default=20, help="rows shown in each table")
+    parser.add_argument("--sort", default="total_ms", choices=("total_ms", "count", "max_ms"))
+    args = parser.parse_args()
+
+    print_report(load_stats(args.stats), args.top, args.sort)
+
+
+if __name__ == "__main__":
+    main()
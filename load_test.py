@@ -0,0 +1,116 @@
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+from connection_pool import ConnectionPool
+from flight_server import FlightServer
+
+
+STATUSES = ("Scheduled", "Delayed", "Cancelled", "Completed")
+
+
+def request_paths(random_gen, airports):
+    # a mix of flight board, search and availability queries
+    while True:
+        choice = random_gen.random()
+        if choice < 0.4:
+            yield "/flights?" + urlencode({"origin": random_gen.choice(airports), "limit": 50})
+        elif choice < 0.7:
+            yield "/flights?" + urlencode({"status": random_gen.choice(STATUSES), "limit": 50})
+        elif choice < 0.9:
+            departure = f"2025-{random_gen.randint(1, 12):02d}-{random_gen.randint(1, 28):02d} 12:00:00"
+            yield "/pilots/available?" + urlencode({"departure": departure})
+        else:
+            yield "/destinations?limit=100"
+
+
+def client(host, port, seed, airports, deadline, latencies, errors):
+    random_gen = random.Random(seed)
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    for path in request_paths(random_gen, airports):
+        if time.perf_counter() >= deadline:
+            break
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(type(error).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_level(host, port, clients, seconds, airports):
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(host, port, index, airports, deadline, latencies, errors))
+               for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the flight JSON service with growing client counts")
+    parser.add_argument("--url", help="an already running flight_server.py, e.g. http://127.0.0.1:8080")
+    parser.add_argument("--database", default="flights.db", help="database served in-process when --url is not given")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each client level")
+    args = parser.parse_args()
+
+    server = None
+    pool = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        pool = ConnectionPool(args.database, max(args.clients))
+        server = FlightServer(("127.0.0.1", 0), pool, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = "127.0.0.1", server.server_port
+
+    # airports to search by are taken from the service itself
+    connection = http.client.HTTPConnection(host, port)
+    connection.request("GET", "/destinations?limit=1000")
+    airports = [destination["airport_code"] for destination in json.loads(connection.getresponse().read())]
+    connection.close()
+
+    print("\nLoad Test Results:")
+    print("-" * 85)
+    print(f"{'Clients':<10} {'Requests/sec':>15} {'p50 ms':>12} {'p99 ms':>12} {'Errors':>10}")
+    print("-" * 85)
+    for clients in args.clients:
+        throughput, p50, p99, errors = run_level(host, port, clients, args.seconds, airports)
+        print(f"{clients:<10} {throughput:>15,.0f} {p50 * 1000:>12.2f} {p99 * 1000:>12.2f} {errors:>10}")
+    print("-" * 85)
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
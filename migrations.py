@@ -0,0 +1,517 @@
+import argparse
+import sqlite3
+import sys
+
+
+# active flight count and earliest active departure of every pilot, computed from scratch; used to fill
+# PilotAvailability and to check the trigger-maintained copy against
+AVAILABILITY_RECOMPUTE = """
+    SELECT p.PilotID, COUNT(f.FlightID), MIN(f.DepartureTime)
+    FROM Pilots p
+    LEFT JOIN Flights f ON f.PilotID = p.PilotID AND f.Status IN ('Scheduled', 'Delayed')
+    GROUP BY p.PilotID
+"""
+
+# recomputes one pilot's row, {pilot} is OLD.PilotID or NEW.PilotID inside a trigger
+AVAILABILITY_REFRESH = """
+        UPDATE PilotAvailability SET
+            ActiveFlights = (SELECT COUNT(*) FROM Flights
+                             WHERE PilotID = {pilot} AND Status IN ('Scheduled', 'Delayed')),
+            NextDeparture = (SELECT MIN(DepartureTime) FROM Flights
+                             WHERE PilotID = {pilot} AND Status IN ('Scheduled', 'Delayed'))
+        WHERE PilotID = {pilot};
+"""
+
+# minutes east of UTC for a TimeZone such as 'GMT', 'GMT-5' or 'GMT+5:30', {timezone} is a column or NEW.TimeZone;
+# the same rule as flight_service.parse_utc_offset, which rejects anything else before it is stored
+UTC_OFFSET = """(CASE WHEN length({timezone}) <= 3 THEN 0 ELSE
+            (CASE substr({timezone}, 4, 1) WHEN '-' THEN -1 ELSE 1 END) * (
+                CAST(CASE WHEN instr({timezone}, ':') THEN substr({timezone}, 5, instr({timezone}, ':') - 5)
+                     ELSE substr({timezone}, 5) END AS INTEGER) * 60
+                + CASE WHEN instr({timezone}, ':') THEN CAST(substr({timezone}, instr({timezone}, ':') + 1) AS INTEGER)
+                       ELSE 0 END)
+        END)"""
+
+# a local departure time at the origin airport converted to UTC, airports no longer listed count as UTC
+DEPARTURE_UTC = """datetime({departure}, printf('%+d minutes',
+            -COALESCE((SELECT UtcOffsetMinutes FROM Destinations WHERE AirportCode = {origin}), 0)))"""
+
+
+# insert, delete and update triggers that keep an external content fts5 table in step with its base table
+def search_triggers(table, search_table, key, columns):
+    names = ", ".join(columns)
+    old = ", ".join(f"OLD.{column}" for column in columns)
+    new = ", ".join(f"NEW.{column}" for column in columns)
+    prefix = f"trg_{table.lower()}_search"
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {prefix}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {search_table} (rowid, {names}) VALUES (NEW.{key}, {new});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {prefix}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {search_table} ({search_table}, rowid, {names}) VALUES ('delete', OLD.{key}, {old});
+        END""",
+        # only changes to the indexed columns touch the search index
+        f"""CREATE TRIGGER IF NOT EXISTS {prefix}_update AFTER UPDATE OF {names} ON {table}
+        BEGIN
+            INSERT INTO {search_table} ({search_table}, rowid, {names}) VALUES ('delete', OLD.{key}, {old});
+            INSERT INTO {search_table} (rowid, {names}) VALUES (NEW.{key}, {new});
+        END""",
+    ]
+
+
+# tables whose row changes are logged to Changes for replicas, and their keys
+CAPTURED_TABLES = {
+    "Flights": "FlightID",
+    "Pilots": "PilotID",
+    "Destinations": "DestinationID",
+    "DeletedDestinations": "DestinationID",
+}
+
+
+def change_triggers(table, key, columns=None):
+    # one Changes row per row written; only the key is logged, replicate.py copies the row as it is when it syncs.
+    # columns limits the logged updates to those columns, updates of columns other triggers derive are left out
+    prefix = f"trg_{table.lower()}_changes"
+    update_of = f" OF {', '.join(columns)}" if columns else ""
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {prefix}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO Changes (TableName, RowKey, Operation) VALUES ('{table}', NEW.{key}, 'INSERT');
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {prefix}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO Changes (TableName, RowKey, Operation) VALUES ('{table}', OLD.{key}, 'DELETE');
+        END""",
+        # a changed key is logged as the old key gone and the new one written
+        f"""CREATE TRIGGER IF NOT EXISTS {prefix}_update AFTER UPDATE{update_of} ON {table}
+        BEGIN
+            INSERT INTO Changes (TableName, RowKey, Operation)
+            SELECT '{table}', OLD.{key}, 'DELETE' WHERE OLD.{key} IS NOT NEW.{key};
+            INSERT INTO Changes (TableName, RowKey, Operation) VALUES ('{table}', NEW.{key}, 'UPDATE');
+        END""",
+    ]
+
+
+# each migration upgrades the schema from (version - 1) to version, PRAGMA user_version records the last one applied
+MIGRATIONS = [
+    (1, [
+        # flight number lookups in add_new_flight, amend_flight and search option 1
+        "CREATE INDEX IF NOT EXISTS idx_flights_number ON Flights (FlightNumber)",
+        # search by origin, listed in departure order
+        "CREATE INDEX IF NOT EXISTS idx_flights_origin_status ON Flights (Origin, Status, DepartureTime)",
+        # remove_destination active/finished flight counts are answered from the index alone
+        "CREATE INDEX IF NOT EXISTS idx_flights_destination_status ON Flights (Destination, Status)",
+        # search by status
+        "CREATE INDEX IF NOT EXISTS idx_flights_status ON Flights (Status, DepartureTime)",
+        # pilot conflict check and the pilot roster availability subquery
+        "CREATE INDEX IF NOT EXISTS idx_flights_pilot_status_departure ON Flights (PilotID, Status, DepartureTime)",
+    ]),
+    (2, [
+        # integer departure time so the 12 hour pilot conflict check is a plain index range probe
+        """ALTER TABLE Flights ADD COLUMN DepartureEpoch INTEGER
+           GENERATED ALWAYS AS (CAST(strftime('%s', DepartureTime) AS INTEGER)) VIRTUAL""",
+        "CREATE INDEX IF NOT EXISTS idx_flights_pilot_status_epoch ON Flights (PilotID, Status, DepartureEpoch)",
+        # superseded, the epoch index serves the same PilotID/Status prefix
+        "DROP INDEX IF EXISTS idx_flights_pilot_status_departure",
+    ]),
+    (3, [
+        # keyset pages of the flight listing in departure order
+        "CREATE INDEX IF NOT EXISTS idx_flights_departure ON Flights (DepartureTime)",
+    ]),
+    (4, [
+        # filtered listings page by FlightID, single column indexes end in the rowid so each page is a seek
+        # instead of sorting every match
+        "DROP INDEX IF EXISTS idx_flights_origin_status",
+        "CREATE INDEX IF NOT EXISTS idx_flights_origin ON Flights (Origin)",
+        "CREATE INDEX IF NOT EXISTS idx_flights_destination ON Flights (Destination)",
+        "DROP INDEX IF EXISTS idx_flights_status",
+        "CREATE INDEX IF NOT EXISTS idx_flights_status ON Flights (Status)",
+    ]),
+    (5, [
+        # one row per pilot, kept current by the triggers below so the roster never scans Flights
+        """CREATE TABLE IF NOT EXISTS PilotAvailability (
+            PilotID INTEGER PRIMARY KEY,
+            ActiveFlights INTEGER NOT NULL DEFAULT 0,
+            NextDeparture DATETIME,
+            FOREIGN KEY (PilotID) REFERENCES Pilots(PilotID)
+        )""",
+        "INSERT OR REPLACE INTO PilotAvailability (PilotID, ActiveFlights, NextDeparture) " + AVAILABILITY_RECOMPUTE,
+        """CREATE TRIGGER IF NOT EXISTS trg_pilots_insert_availability AFTER INSERT ON Pilots
+        BEGIN
+            INSERT OR IGNORE INTO PilotAvailability (PilotID, ActiveFlights) VALUES (NEW.PilotID, 0);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_pilots_delete_availability AFTER DELETE ON Pilots
+        BEGIN
+            DELETE FROM PilotAvailability WHERE PilotID = OLD.PilotID;
+        END""",
+        # a new active flight only adds to the count, no need to look at the pilot's other flights
+        """CREATE TRIGGER IF NOT EXISTS trg_flights_insert_availability AFTER INSERT ON Flights
+        WHEN NEW.PilotID IS NOT NULL AND NEW.Status IN ('Scheduled', 'Delayed')
+        BEGIN
+            UPDATE PilotAvailability SET
+                ActiveFlights = ActiveFlights + 1,
+                NextDeparture = CASE
+                    WHEN NextDeparture IS NULL OR NEW.DepartureTime < NextDeparture THEN NEW.DepartureTime
+                    ELSE NextDeparture
+                END
+            WHERE PilotID = NEW.PilotID;
+        END""",
+        # removals and changes recompute only the pilots involved, through the PilotID/Status index
+        """CREATE TRIGGER IF NOT EXISTS trg_flights_delete_availability AFTER DELETE ON Flights
+        WHEN OLD.PilotID IS NOT NULL AND OLD.Status IN ('Scheduled', 'Delayed')
+        BEGIN""" + AVAILABILITY_REFRESH.format(pilot="OLD.PilotID") + """
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_flights_update_availability
+        AFTER UPDATE OF PilotID, Status, DepartureTime ON Flights
+        WHEN OLD.Status IN ('Scheduled', 'Delayed') OR NEW.Status IN ('Scheduled', 'Delayed')
+        BEGIN""" + AVAILABILITY_REFRESH.format(pilot="OLD.PilotID") + AVAILABILITY_REFRESH.format(pilot="NEW.PilotID") + """
+        END""",
+    ]),
+    (6, [
+        # prefix-aware full text search, external content tables hold only the index and read the rows
+        # from their base table; the triggers below keep them in step with every insert, update and delete
+        """CREATE VIRTUAL TABLE IF NOT EXISTS DestinationSearch USING fts5(
+            AirportCode, CityName, Country,
+            content='Destinations', content_rowid='DestinationID',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS PilotSearch USING fts5(
+            FirstName, LastName,
+            content='Pilots', content_rowid='PilotID',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS FlightNumberSearch USING fts5(
+            FlightNumber,
+            content='Flights', content_rowid='FlightID',
+            tokenize='unicode61', prefix='2 3'
+        )""",
+        "INSERT INTO DestinationSearch (DestinationSearch) VALUES ('rebuild')",
+        "INSERT INTO PilotSearch (PilotSearch) VALUES ('rebuild')",
+        "INSERT INTO FlightNumberSearch (FlightNumberSearch) VALUES ('rebuild')",
+    ] + search_triggers("Destinations", "DestinationSearch", "DestinationID", ("AirportCode", "CityName", "Country"))
+      + search_triggers("Pilots", "PilotSearch", "PilotID", ("FirstName", "LastName"))
+      + search_triggers("Flights", "FlightNumberSearch", "FlightID", ("FlightNumber",))),
+    (7, [
+        # DepartureTime stays the local time at the origin as entered, DepartureUTC is the same instant in UTC
+        # so boards can read a time window straight off an index; each airport's offset is parsed once into
+        # UtcOffsetMinutes when it is stored
+        "ALTER TABLE Destinations ADD COLUMN UtcOffsetMinutes INTEGER NOT NULL DEFAULT 0",
+        "UPDATE Destinations SET UtcOffsetMinutes = " + UTC_OFFSET.format(timezone="TimeZone"),
+        "ALTER TABLE Flights ADD COLUMN DepartureUTC TEXT",
+        "UPDATE Flights SET DepartureUTC = " + DEPARTURE_UTC.format(departure="DepartureTime", origin="Flights.Origin"),
+        "CREATE INDEX IF NOT EXISTS idx_flights_origin_utc ON Flights (Origin, DepartureUTC)",
+        "CREATE INDEX IF NOT EXISTS idx_flights_destination_utc ON Flights (Destination, DepartureUTC)",
+        """CREATE TRIGGER IF NOT EXISTS trg_destinations_offset_insert AFTER INSERT ON Destinations
+        BEGIN
+            UPDATE Destinations SET UtcOffsetMinutes = """ + UTC_OFFSET.format(timezone="NEW.TimeZone") + """
+            WHERE DestinationID = NEW.DestinationID;
+        END""",
+        # a changed timezone moves every departure from that airport
+        """CREATE TRIGGER IF NOT EXISTS trg_destinations_offset_update AFTER UPDATE OF TimeZone ON Destinations
+        BEGIN
+            UPDATE Destinations SET UtcOffsetMinutes = """ + UTC_OFFSET.format(timezone="NEW.TimeZone") + """
+            WHERE DestinationID = NEW.DestinationID;
+            UPDATE Flights SET DepartureUTC = """ + DEPARTURE_UTC.format(departure="DepartureTime",
+                                                                       origin="NEW.AirportCode") + """
+            WHERE Origin = NEW.AirportCode;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_flights_utc_insert AFTER INSERT ON Flights
+        BEGIN
+            UPDATE Flights SET DepartureUTC = """ + DEPARTURE_UTC.format(departure="NEW.DepartureTime",
+                                                                       origin="NEW.Origin") + """
+            WHERE FlightID = NEW.FlightID;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_flights_utc_update AFTER UPDATE OF DepartureTime, Origin ON Flights
+        BEGIN
+            UPDATE Flights SET DepartureUTC = """ + DEPARTURE_UTC.format(departure="NEW.DepartureTime",
+                                                                       origin="NEW.Origin") + """
+            WHERE FlightID = NEW.FlightID;
+        END""",
+    ]),
+    (8, [
+        # bumped by every change to a flight, so amend_flights can tell that a row changed after the caller read it
+        "ALTER TABLE Flights ADD COLUMN Version INTEGER NOT NULL DEFAULT 1",
+        # writers that do not move Version themselves; a statement that sets it is left alone
+        """CREATE TRIGGER IF NOT EXISTS trg_flights_version
+        AFTER UPDATE OF FlightNumber, Origin, Destination, DepartureTime, Status, PilotID ON Flights
+        WHEN NEW.Version = OLD.Version
+        BEGIN
+            UPDATE Flights SET Version = OLD.Version + 1 WHERE FlightID = NEW.FlightID;
+        END""",
+    ]),
+    (9, [
+        # append-only change log read by replicate.py; AUTOINCREMENT so a sequence number is never reused, even
+        # after old changes are pruned
+        """CREATE TABLE IF NOT EXISTS Changes (
+            Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            TableName TEXT NOT NULL,
+            RowKey INTEGER NOT NULL,
+            Operation TEXT NOT NULL CHECK(Operation IN ('INSERT', 'UPDATE', 'DELETE')),
+            ChangedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )""",
+    # DepartureUTC and Version follow from the columns listed, a replica's own triggers derive them again
+    ] + change_triggers("Flights", "FlightID",
+                        ("FlightNumber", "Origin", "Destination", "DepartureTime", "Status", "PilotID"))
+      + change_triggers("Pilots", "PilotID")
+      + change_triggers("Destinations", "DestinationID", ("AirportCode", "CityName", "Country", "TimeZone"))
+      + change_triggers("DeletedDestinations", "DestinationID")),
+    (10, [
+        # the 12 hour pilot rule compares instants, so it reads the UTC departure; a flight from a retired airport
+        # has no DepartureUTC and falls back to its local time as before
+        """ALTER TABLE Flights ADD COLUMN DepartureUTCEpoch INTEGER
+           GENERATED ALWAYS AS (CAST(strftime('%s', COALESCE(DepartureUTC, DepartureTime)) AS INTEGER)) VIRTUAL""",
+        "CREATE INDEX IF NOT EXISTS idx_flights_pilot_status_utc ON Flights (PilotID, Status, DepartureUTCEpoch)",
+        # superseded, the UTC index serves the same PilotID/Status prefix
+        "DROP INDEX IF EXISTS idx_flights_pilot_status_epoch",
+    ]),
+    (11, [
+        # bulk_import, datagen and create_flight know the origin offset and insert DepartureUTC themselves, so the
+        # extra UPDATE per row is only run for writers that leave it out
+        "DROP TRIGGER IF EXISTS trg_flights_utc_insert",
+        """CREATE TRIGGER IF NOT EXISTS trg_flights_utc_insert AFTER INSERT ON Flights
+        WHEN NEW.DepartureUTC IS NULL
+        BEGIN
+            UPDATE Flights SET DepartureUTC = """ + DEPARTURE_UTC.format(departure="NEW.DepartureTime",
+                                                                       origin="NEW.Origin") + """
+            WHERE FlightID = NEW.FlightID;
+        END""",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# the lookups FlightManager runs against Flights on every interactive operation
+HOT_QUERIES = {
+    "flight number exists": ("SELECT COUNT(*) FROM Flights WHERE FlightNumber = ?", ("BA101",)),
+    "search by flight number": ("SELECT * FROM Flights WHERE FlightNumber = ?", ("BA101",)),
+    "search by origin": ("SELECT * FROM Flights WHERE Origin = ?", ("LHR",)),
+    "search by destination": ("SELECT * FROM Flights WHERE Destination = ?", ("LHR",)),
+    "search by status": ("SELECT * FROM Flights WHERE Status = ?", ("Scheduled",)),
+    "active flights to destination": ("""
+        SELECT COUNT(*) FROM Flights
+        WHERE Destination = ? AND Status NOT IN ('Completed', 'Cancelled')
+    """, ("LHR",)),
+    "finished flights to destination": ("""
+        SELECT COUNT(*) FROM Flights
+        WHERE Destination = ? AND (Status = 'Completed' OR Status = 'Cancelled')
+    """, ("LHR",)),
+    "pilot conflict": ("""
+        SELECT COUNT(*) FROM Flights WHERE PilotID = ?
+        AND Status IN ('Scheduled', 'Delayed')
+        AND DepartureUTCEpoch BETWEEN ? AND ?
+    """, (1, 1738355400, 1738441800)),
+    "available pilots": ("""
+        SELECT p.PilotID FROM Pilots p
+        WHERE p.PilotID IN (SELECT value FROM json_each(?))
+        AND NOT EXISTS (
+            SELECT 1 FROM Flights f WHERE f.PilotID = p.PilotID
+            AND f.Status IN ('Scheduled', 'Delayed')
+            AND f.DepartureUTCEpoch BETWEEN ? AND ?
+        )
+    """, ("[1, 2, 3]", 1738355400, 1738441800)),
+    "flight listing page": ("""
+        SELECT FlightID, DepartureTime FROM Flights f
+        WHERE (f.DepartureTime, f.FlightID) > (?, ?)
+        ORDER BY f.DepartureTime, f.FlightID LIMIT ?
+    """, ("2025-02-01 08:30:00", 1, 500)),
+    "flight listing page by origin": ("""
+        SELECT FlightID FROM Flights f
+        WHERE f.Origin = ? AND (f.FlightID) > (?)
+        ORDER BY f.FlightID LIMIT ?
+    """, ("LHR", 1, 500)),
+    "combined flight search": ("""
+        SELECT FlightID FROM Flights f
+        WHERE f.Origin = ? AND f.Status IN (SELECT value FROM json_each(?))
+        AND f.DepartureTime >= ? AND f.DepartureTime < ?
+        ORDER BY f.DepartureTime, f.FlightID LIMIT ?
+    """, ("LHR", '["Delayed", "Scheduled"]', "2025-02-01 00:00:00", "2025-03-01 00:00:00", 100)),
+    "retire destinations": ("""
+        UPDATE Flights SET Destination = '-'
+        WHERE Destination IN (SELECT value FROM json_each(?))
+        AND Status IN ('Completed', 'Cancelled')
+    """, ('["LHR", "JFK"]',)),
+    "pilot roster page": ("""
+        SELECT p.PilotID, COALESCE(a.ActiveFlights, 0) FROM Pilots p
+        LEFT JOIN PilotAvailability a ON a.PilotID = p.PilotID
+        WHERE (p.PilotID) > (?) ORDER BY p.PilotID LIMIT ?
+    """, (1, 500)),
+    "destination text search": ("""
+        SELECT rowid FROM DestinationSearch WHERE DestinationSearch MATCH ? ORDER BY rank LIMIT ?
+    """, ('"lon"*', 20)),
+    "flight number prefix search": ("""
+        SELECT rowid FROM FlightNumberSearch WHERE FlightNumberSearch MATCH ? ORDER BY rowid LIMIT ?
+    """, ('"ba1"*', 20)),
+    "departure board": ("""
+        SELECT FlightID FROM Flights f
+        WHERE f.Origin = ? AND f.DepartureUTC >= ? AND f.DepartureUTC < ?
+        ORDER BY f.DepartureUTC, f.FlightID LIMIT ?
+    """, ("LHR", "2025-02-01 06:00:00", "2025-02-01 12:00:00", 200)),
+    "arrival board": ("""
+        SELECT FlightID FROM Flights f
+        WHERE f.Destination = ? AND f.DepartureUTC >= ? AND f.DepartureUTC < ?
+        ORDER BY f.DepartureUTC, f.FlightID LIMIT ?
+    """, ("LHR", "2025-02-01 00:00:00", "2025-02-02 00:00:00", 200)),
+    "pilot schedule": ("""
+        SELECT FlightNumber, DepartureTime, Status FROM Flights WHERE PilotID = ?
+        AND Status IN ('Scheduled', 'Delayed')
+        ORDER BY DepartureTime
+    """, (1,)),
+}
+
+
+def schema_version(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection):
+    # upgrades an existing database in place, every pending migration runs in one transaction
+    current = schema_version(connection)
+    pending = [(version, statements) for version, statements in MIGRATIONS if version > current]
+    if not pending:
+        return current
+
+    if connection.in_transaction:
+        connection.commit()
+    connection.execute("BEGIN")
+    try:
+        for version, statements in pending:
+            for statement in statements:
+                connection.execute(statement)
+            connection.execute(f"PRAGMA user_version = {int(version)}")
+        connection.commit()
+    except sqlite3.Error:
+        connection.rollback()
+        raise
+    return schema_version(connection)
+
+
+def query_plan(connection, sql, params=()):
+    return [row[3] for row in connection.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def plan_uses_index(plan):
+    # a plain "SCAN Flights" step means the whole table is read, scanning a json_each parameter list is fine;
+    # an fts5 table answering a MATCH shows as a virtual table scan with an M in its index string
+    for detail in plan:
+        if detail.startswith("SCAN") and "USING" not in detail and "VIRTUAL TABLE" not in detail:
+            return False
+    return any("USING" in detail or ("VIRTUAL TABLE" in detail and ":M" in detail) for detail in plan)
+
+
+def check_query_plans(connection):
+    results = []
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = query_plan(connection, sql, params)
+        results.append((name, plan_uses_index(plan), plan))
+    return results
+
+
+# rows where the trigger-maintained PilotAvailability differs from a full recomputation
+def check_pilot_availability(connection):
+    expected = {row[0]: (row[1], row[2]) for row in connection.execute(AVAILABILITY_RECOMPUTE)}
+    stored = {row[0]: (row[1], row[2]) for row in connection.execute(
+        "SELECT PilotID, ActiveFlights, NextDeparture FROM PilotAvailability")}
+    mismatches = []
+    for pilot_id in sorted(set(expected) | set(stored)):
+        if expected.get(pilot_id) != stored.get(pilot_id):
+            mismatches.append((pilot_id, stored.get(pilot_id), expected.get(pilot_id)))
+    return mismatches
+
+
+def rebuild_pilot_availability(connection):
+    with connection:
+        connection.execute("DELETE FROM PilotAvailability")
+        connection.execute("INSERT INTO PilotAvailability (PilotID, ActiveFlights, NextDeparture) "
+                           + AVAILABILITY_RECOMPUTE)
+
+
+SEARCH_TABLES = ("DestinationSearch", "PilotSearch", "FlightNumberSearch")
+
+
+# search tables whose index no longer matches their base table, sqlite raises on the first corrupt one
+def check_search_index(connection):
+    failed = []
+    for table in SEARCH_TABLES:
+        try:
+            connection.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('integrity-check', 1)")
+        except sqlite3.DatabaseError as error:
+            failed.append((table, str(error)))
+    return failed
+
+
+def rebuild_search_index(connection):
+    with connection:
+        for table in SEARCH_TABLES:
+            connection.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade flights.db to the latest schema version")
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--check", action="store_true", help="verify every hot query is served by an index")
+    parser.add_argument("--check-availability", action="store_true",
+                        help="verify PilotAvailability against a full recomputation")
+    parser.add_argument("--rebuild-availability", action="store_true", help="recompute PilotAvailability from scratch")
+    parser.add_argument("--check-search", action="store_true", help="verify the full text search indexes")
+    parser.add_argument("--rebuild-search", action="store_true", help="rebuild the full text search indexes")
+    args = parser.parse_args()
+
+    # FlightService creates the base tables and applies the migrations
+    from flight_service import FlightService
+    connection = sqlite3.connect(args.database)
+    before = schema_version(connection)
+    connection.close()
+
+    service = FlightService(args.database)
+    print(f"Schema version {before} -> {schema_version(service.connect)}")
+
+    if args.check:
+        failed = 0
+        print("\nQuery Plan Check:")
+        print("-" * 85)
+        for name, uses_index, plan in check_query_plans(service.connect):
+            print(f"{'OK' if uses_index else 'SCAN':<6} {name}")
+            for detail in plan:
+                print(f"{'':<10}{detail}")
+            if not uses_index:
+                failed += 1
+        print("-" * 85)
+        if failed:
+            print(f"{failed} hot queries are not using an index")
+            sys.exit(1)
+
+    if args.rebuild_availability:
+        rebuild_pilot_availability(service.connect)
+        print("PilotAvailability rebuilt")
+
+    if args.rebuild_search:
+        rebuild_search_index(service.connect)
+        print("Search indexes rebuilt")
+
+    if args.check_search:
+        failed = check_search_index(service.connect)
+        for table, error in failed:
+            print(f"{table}: {error}")
+        print(f"{len(failed)} search indexes out of date")
+        if failed:
+            sys.exit(1)
+
+    if args.check_availability:
+        mismatches = check_pilot_availability(service.connect)
+        print("\nPilot Availability Check:")
+        print("-" * 85)
+        print(f"{'Pilot ID':<10} {'Stored (active, next)':<35} {'Expected (active, next)':<35}")
+        print("-" * 85)
+        for pilot_id, stored, expected in mismatches:
+            print(f"{pilot_id:<10} {str(stored):<35} {str(expected):<35}")
+        print("-" * 85)
+        print(f"{len(mismatches)} pilots out of date")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
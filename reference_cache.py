@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+
+
+# stored for keys looked up and not found, so repeated checks of an unknown code do not query either
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # moves on every invalidation, a value loaded before one may be stale and is not stored
+        self.generation = 0
+
+    # (True, value) for a cached key, value None when the key is known not to exist; (False, None) otherwise
+    def get(self, key):
+        if key not in self.entries:
+            self.misses += 1
+            return False, None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        value = self.entries[key]
+        return True, None if value is MISSING else value
+
+    def put(self, key, value, generation):
+        if generation != self.generation:
+            return
+        self.entries[key] = MISSING if value is None else value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+        self.generation += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.generation += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ReferenceCache:
+    # destinations and pilots change rarely but are checked on every flight write; one cache can be shared by
+    # several FlightServices (ConnectionPool does), writes through any of them invalidate it for all, and each
+    # service clears it when its connection sees a commit from any other (FlightService.sync_reference)
+    def __init__(self, max_size=4096):
+        self.lock = threading.Lock()
+        self.destinations = LRUCache(max_size)
+        self.pilots_by_id = LRUCache(max_size)
+        self.pilots_by_license = LRUCache(max_size)
+
+    def lookup(self, cache, key, loader):
+        with self.lock:
+            found, value = cache.get(key)
+            generation = cache.generation
+        if found:
+            return value
+        # loaded without the lock, so one reader's query does not hold up every other reader's lookups
+        value = loader(key)
+        with self.lock:
+            cache.put(key, value, generation)
+        return value
+
+    def destination(self, airport_code, loader):
+        return self.lookup(self.destinations, airport_code, loader)
+
+    def pilot(self, pilot_id, loader):
+        return self.lookup(self.pilots_by_id, pilot_id, loader)
+
+    def pilot_by_license(self, license_number, loader):
+        return self.lookup(self.pilots_by_license, license_number, loader)
+
+    def invalidate_destination(self, airport_code):
+        with self.lock:
+            self.destinations.invalidate(airport_code)
+
+    def invalidate_pilot(self, pilot_id=None, license_number=None):
+        with self.lock:
+            if pilot_id is not None:
+                self.pilots_by_id.invalidate(pilot_id)
+            if license_number is not None:
+                self.pilots_by_license.invalidate(license_number)
+
+    def clear(self):
+        with self.lock:
+            self.destinations.clear()
+            self.pilots_by_id.clear()
+            self.pilots_by_license.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "destinations": self.destinations.stats(),
+                "pilots_by_id": self.pilots_by_id.stats(),
+                "pilots_by_license": self.pilots_by_license.stats(),
+            }
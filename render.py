@@ -0,0 +1,191 @@
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from collections import namedtuple
+from itertools import islice
+from operator import attrgetter
+
+from connection import DEFAULT_PROFILE, PROFILES
+from flight_service import FlightService
+
+
+FORMATS = ("table", "csv", "tsv", "jsonl")
+
+# name is the key in csv and tsv headers and jsonl objects, header is the table heading, get reads the value from a
+# row; width is the narrowest the table column is drawn, it grows to fit the values it is sized from, and blank is
+# shown in the table for a missing value, which the exports leave empty or null
+Column = namedtuple("Column", "header name get width blank")
+
+
+def column(header, name, get=None, width=0, blank=""):
+    return Column(header, name, get or attrgetter(name), max(width, len(header)), blank)
+
+
+FLIGHT_COLUMNS = (
+    column("Flight #", "flight_number", width=10),
+    column("From", "origin", width=10),
+    column("To", "destination", width=10),
+    column("Departure", "departure_time", width=20),
+    column("Status", "status", width=10),
+    column("Pilot", "pilot_name", width=20, blank="No Pilot Assigned"),
+)
+SELECTION_COLUMNS = (
+    column("FlightID", "flight_id", width=9),
+    column("Number", "flight_number", width=7),
+    column("From", "origin", width=5),
+    column("To", "destination", width=5),
+    column("Departure Time", "departure_time", width=16),
+    column("Status", "status"),
+)
+PILOT_COLUMNS = (
+    column("ID", "pilot_id", width=5),
+    column("First Name", "first_name", width=15),
+    column("Last Name", "last_name", width=15),
+    column("License", "license_number", width=15),
+    column("Status", "availability", width=20),
+)
+DESTINATION_COLUMNS = (
+    column("ID#", "destination_id", width=10),
+    column("Code", "airport_code", width=10),
+    column("City", "city_name", width=20),
+    column("Country", "country", width=20),
+    column("Timezone", "timezone", width=10),
+)
+
+class TableWriter:
+    # writes rows to a stream a block at a time, each block built in memory and written with one call instead of one
+    # print per row; the table format sizes its columns from the first block, so long names are shown in full,
+    # and a later value wider than its column pushes the rest of its line along rather than being cut off
+    def __init__(self, columns, format="table", stream=None, block_rows=500, rule_width=85):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format: {format}, choose from {', '.join(FORMATS)}")
+        self.columns = columns
+        self.format = format
+        # None is sys.stdout when writing, so output redirected after the writer is made still goes where it should
+        self.stream = stream
+        self.block_rows = block_rows
+        self.rule_width = rule_width
+        self.widths = None
+        self.line = None
+
+    # returns the number of rows written; keep_going is called with that count after every full block and
+    # stops the listing when it returns False, as the console's page prompt does
+    def write(self, rows, title=None, keep_going=None):
+        stream = self.stream or sys.stdout
+        rows = iter(rows)
+        count = 0
+        block = list(islice(rows, self.block_rows))
+        if self.format == "table":
+            self.widths = [max([col.width] + [len(self.text(col, col.get(row))) for row in block])
+                           for col in self.columns]
+            self.line = " ".join(f"{{:<{width}}}" for width in self.widths)
+            stream.write(self.table_header(title))
+        elif self.format != "jsonl":
+            stream.write(self.delimited([[col.name for col in self.columns]]))
+
+        while block:
+            stream.write(self.render(block))
+            count += len(block)
+            if len(block) < self.block_rows:
+                break
+            if keep_going is not None:
+                stream.flush()
+                if not keep_going(count):
+                    break
+            block = list(islice(rows, self.block_rows))
+
+        if self.format == "table":
+            stream.write(self.rule() + "\n")
+        stream.flush()
+        return count
+
+    @staticmethod
+    def text(col, value):
+        return col.blank if value is None else str(value)
+
+    def rule(self):
+        return "-" * max(self.rule_width, sum(self.widths) + len(self.widths) - 1)
+
+    def table_header(self, title):
+        lines = [f"\n{title}:"] if title else []
+        lines += [self.rule(), self.line.format(*(col.header for col in self.columns)).rstrip(), self.rule()]
+        return "\n".join(lines) + "\n"
+
+    def render(self, block):
+        getters = [col.get for col in self.columns]
+        if self.format == "table":
+            # one format string for the whole line, sized once; str.format takes the values as they are, only a
+            # missing one needs replacing
+            line = self.line.format
+            blanks = [col.blank for col in self.columns]
+            lines = []
+            for row in block:
+                values = [get(row) for get in getters]
+                if None in values:
+                    values = [blank if value is None else value for value, blank in zip(values, blanks)]
+                lines.append(line(*values).rstrip())
+            lines.append("")
+            return "\n".join(lines)
+        if self.format == "jsonl":
+            names = [col.name for col in self.columns]
+            # rows are flat records of strings and numbers, nothing to check for cycles
+            encode = json.JSONEncoder(check_circular=False).encode
+            return "".join(encode(dict(zip(names, [get(row) for get in getters]))) + "\n" for row in block)
+        return self.delimited([[get(row) for get in getters] for row in block])
+
+    def delimited(self, rows):
+        buffer = io.StringIO()
+        if self.format == "tsv":
+            writer = csv.writer(buffer, delimiter="\t", lineterminator="\n")
+        else:
+            writer = csv.writer(buffer)
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+
+def listings(service, page_size):
+    # what each listing reads and how it is shown
+    return {
+        "flights": ("All Flight Information", FLIGHT_COLUMNS, lambda: service.find_flights(page_size=page_size)),
+        "pilots": ("All Pilots Information", PILOT_COLUMNS, lambda: service.list_pilots(page_size=page_size)),
+        "destinations": ("All Available Destinations Information", DESTINATION_COLUMNS,
+                         lambda: service.list_destinations(page_size=page_size)),
+        "deleted-destinations": ("Deleted Destinations", DESTINATION_COLUMNS,
+                                 lambda: service.list_deleted_destinations(page_size=page_size)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a flights, pilots or destinations listing as a table or export")
+    parser.add_argument("listing", choices=["flights", "pilots", "destinations", "deleted-destinations"])
+    parser.add_argument("--format", default="table", choices=FORMATS)
+    parser.add_argument("--output", help="file to write, stdout when not given")
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--page-size", type=int, default=20000, help="rows read from the database per query")
+    parser.add_argument("--block-rows", type=int, default=5000, help="rows written to the output per write")
+    args = parser.parse_args()
+
+    service = FlightService(args.database, args.profile)
+    title, columns, read = listings(service, args.page_size)[args.listing]
+    writer = TableWriter(columns, args.format, block_rows=args.block_rows)
+    start = time.perf_counter()
+    if args.output:
+        # csv wants the newlines it writes left alone
+        with open(args.output, "w", newline="", encoding="utf-8", buffering=1024 * 1024) as output:
+            writer.stream = output
+            count = writer.write(read(), title)
+        print(f"{count:,} rows written to {args.output} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    else:
+        try:
+            writer.write(read(), title)
+        except BrokenPipeError:
+            # the reader stopped early, e.g. piped into head; nothing left to tell it
+            sys.stderr.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from connection import DEFAULT_PROFILE, PROFILES, open_connection
+from flight_service import FlightService
+from migrations import CAPTURED_TABLES
+
+
+class SyncResult:
+    def __init__(self):
+        self.batches = 0
+        self.changes = 0
+        self.written = 0
+        self.deleted = 0
+        self.last_seq = 0
+        self.seconds = 0.0
+
+    def __str__(self):
+        return (f"{self.changes:>10} changes {self.written:>8} rows written {self.deleted:>6} deleted "
+                f"{self.batches:>5} batches  up to {self.last_seq:<10} {self.seconds:>6.2f}s")
+
+
+# the source sequence number a replica has applied up to, kept in the replica itself
+REPLICA_STATE = """
+    CREATE TABLE IF NOT EXISTS ReplicaState (
+        StateID INTEGER PRIMARY KEY CHECK(StateID = 1),
+        SourceSeq INTEGER NOT NULL
+    )
+"""
+
+
+def last_seq(connection):
+    return connection.execute("SELECT COALESCE(MAX(Seq), 0) FROM Changes").fetchone()[0]
+
+
+def snapshot(source, replica_path, pages=4096):
+    # a consistent copy of the whole source through the sqlite3 backup API, copied pages at a time so writers
+    # on the source are not held up; the replica starts from the last change the copy contains
+    start = time.perf_counter()
+    replica = sqlite3.connect(replica_path)
+    try:
+        source.backup(replica, pages=pages)
+        seq = last_seq(replica)
+        with replica:
+            # the replica keeps its own log of what sync writes, starting empty
+            replica.execute("DELETE FROM Changes")
+            replica.execute(REPLICA_STATE)
+            replica.execute("INSERT OR REPLACE INTO ReplicaState (StateID, SourceSeq) VALUES (1, ?)", (seq,))
+    finally:
+        replica.close()
+    return seq, time.perf_counter() - start
+
+
+class Replicator:
+    # applies the source's Changes to a replica in sequence order, one replica transaction per batch; a batch
+    # brings each changed row to what it is in the source now, so applying a batch twice changes nothing
+    def __init__(self, source, replica, batch_size=5000):
+        self.source = source
+        self.replica = replica
+        self.batch_size = batch_size
+        self.columns = {}
+        for table in CAPTURED_TABLES:
+            # generated columns are left out by table_info, the replica computes its own
+            self.columns[table] = [row[1] for row in self.source.execute(f"PRAGMA table_info({table})")]
+
+    def replica_seq(self):
+        try:
+            return self.replica.execute("SELECT SourceSeq FROM ReplicaState").fetchone()[0]
+        except (sqlite3.OperationalError, TypeError):
+            raise ValueError("The replica has no sync state, create it with a snapshot first.")
+
+    def sync(self, max_batches=None):
+        result = SyncResult()
+        start = time.perf_counter()
+        result.last_seq = self.replica_seq()
+        while max_batches is None or result.batches < max_batches:
+            changes = self.source.execute("""
+                SELECT Seq, TableName, RowKey FROM Changes WHERE Seq > ? ORDER BY Seq LIMIT ?
+            """, (result.last_seq, self.batch_size)).fetchall()
+            if not changes:
+                break
+            self.apply(changes, result)
+            result.batches += 1
+            result.changes += len(changes)
+            result.last_seq = changes[-1][0]
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def rows(self, connection, table, keys):
+        return {row[0]: row for row in connection.execute(
+            f"SELECT {', '.join(self.columns[table])} FROM {table} "
+            f"WHERE {CAPTURED_TABLES[table]} IN (SELECT value FROM json_each(?))", (json.dumps(keys),))}
+
+    def apply(self, changes, result):
+        # each changed row once, in the order of its last change, so a code freed by a delete is free again
+        # before a later insert takes it
+        latest = {}
+        for seq, table, key in changes:
+            latest.pop((table, key), None)
+            latest[(table, key)] = seq
+        keys = {}
+        for table, key in latest:
+            keys.setdefault(table, []).append(key)
+
+        with self.replica:
+            self.replica.execute("BEGIN IMMEDIATE")
+            source_rows = {table: self.rows(self.source, table, table_keys) for table, table_keys in keys.items()}
+            replica_rows = {table: self.rows(self.replica, table, table_keys) for table, table_keys in keys.items()}
+            for table, key in latest:
+                row = source_rows[table].get(key)
+                current = replica_rows[table].get(key)
+                key_column = CAPTURED_TABLES[table]
+                if row is None:
+                    if current is not None:
+                        self.replica.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (key,))
+                        result.deleted += 1
+                elif current is None:
+                    columns = self.columns[table]
+                    self.replica.execute(f"INSERT INTO {table} ({', '.join(columns)}) "
+                                         f"VALUES ({', '.join('?' * len(columns))})", row)
+                    result.written += 1
+                else:
+                    # only the columns that differ, so the replica's own triggers (availability, search index,
+                    # UTC departure, version) fire just as they did on the source
+                    changed = [index for index in range(1, len(row)) if row[index] != current[index]]
+                    if changed:
+                        assignments = ", ".join(f"{self.columns[table][index]} = ?" for index in changed)
+                        self.replica.execute(f"UPDATE {table} SET {assignments} WHERE {key_column} = ?",
+                                             [row[index] for index in changed] + [key])
+                        result.written += 1
+            self.replica.execute("UPDATE ReplicaState SET SourceSeq = ?", (changes[-1][0],))
+
+
+def prune(source, before_seq):
+    # drops changes every replica has applied; the sequence carries on from where it was
+    with source:
+        return source.execute("DELETE FROM Changes WHERE Seq < ?", (before_seq,)).rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep replica copies of the flights database up to date")
+    parser.add_argument("command", choices=["snapshot", "sync", "status", "prune"])
+    parser.add_argument("--source", default="flights.db")
+    parser.add_argument("--replica", default="replica.db")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--batch-size", type=int, default=5000, help="changes applied per replica transaction")
+    parser.add_argument("--follow", action="store_true", help="keep syncing until interrupted")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between syncs with --follow")
+    parser.add_argument("--before", type=int, help="prune changes with a lower sequence number")
+    args = parser.parse_args()
+
+    # the source is opened through FlightService, which adds the Changes log to an older database
+    source = FlightService(args.source, args.profile).connect
+
+    if args.command == "snapshot":
+        seq, seconds = snapshot(source, args.replica)
+        print(f"Snapshot of {args.source} written to {args.replica} at change {seq} in {seconds:.2f}s "
+              f"({os.path.getsize(args.replica) / 1024 / 1024:,.1f} MB)")
+        return
+    if args.command == "prune":
+        if args.before is None:
+            parser.error("prune needs --before, the lowest sequence number any replica still needs")
+        print(f"{prune(source, args.before)} changes pruned")
+        return
+
+    replicator = Replicator(source, open_connection(args.replica, args.profile), args.batch_size)
+    try:
+        replica_seq = replicator.replica_seq()
+    except ValueError as error:
+        print(error)
+        return
+    if args.command == "status":
+        source_seq = last_seq(source)
+        print(f"Source at change {source_seq}, replica at {replica_seq}, {source_seq - replica_seq} behind")
+        return
+
+    print("\nReplica Sync:")
+    print("-" * 85)
+    try:
+        while True:
+            result = replicator.sync()
+            if result.changes or not args.follow:
+                print(result, flush=True)
+            if not args.follow:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    print("-" * 85)
+
+if __name__ == "__main__":
+    main()
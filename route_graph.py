@@ -0,0 +1,245 @@
+import argparse
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta, timezone
+
+from connection import DEFAULT_PROFILE, PROFILES
+from flight_service import FlightService, normalise_departure
+
+
+# departure and arrival are UTC epochs; departure_time is the schedule's local time at the origin
+Leg = namedtuple("Leg", "flight_id flight_number origin destination departure_time departure arrival")
+Itinerary = namedtuple("Itinerary", "legs departure arrival hops")
+
+
+def utc_text(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class RouteGraph:
+    # active flights as an in-memory graph: for every airport its outgoing legs sorted by departure, so a search
+    # finds the next connections with one bisect; one graph can be shared by several FlightServices (pass it as
+    # route_graph), flights they create or amend are refreshed in place
+    leg_select = """
+        SELECT f.FlightID, f.FlightNumber, f.Origin, f.Destination, f.DepartureTime,
+               CAST(strftime('%s', f.DepartureUTC) AS INTEGER), d.UtcOffsetMinutes
+        FROM Flights f
+        JOIN Destinations d ON d.AirportCode = f.Origin
+        WHERE f.Status IN ('Scheduled', 'Delayed') AND f.DepartureUTC IS NOT NULL
+    """
+
+    # the schedule has no arrival times, every leg is taken to arrive block_minutes after it departs
+    def __init__(self, block_minutes=120):
+        self.lock = threading.RLock()
+        self.block_seconds = int(block_minutes * 60)
+        self.departures = defaultdict(list)
+        self.legs = {}
+        self.offsets = {}
+
+    def load(self, service):
+        # a full rebuild, for the first load and after writes that bypass FlightService such as bulk imports
+        departures = defaultdict(list)
+        legs = {}
+        offsets = self.airport_offsets(service)
+        cursor = service.connect.cursor()
+        cursor.execute(self.leg_select)
+        for row in cursor:
+            leg, offsets[leg.origin] = self.leg(row)
+            legs[leg.flight_id] = leg
+            departures[leg.origin].append((leg.departure, leg.flight_id))
+        for airport_legs in departures.values():
+            airport_legs.sort()
+        with self.lock:
+            self.departures, self.legs, self.offsets = departures, legs, offsets
+        return self
+
+    @staticmethod
+    def airport_offsets(service):
+        cursor = service.connect.cursor()
+        cursor.execute("SELECT AirportCode, UtcOffsetMinutes FROM Destinations")
+        return dict(cursor.fetchall())
+
+    # a leg and the UTC offset of its origin; the graph's own state is only changed under the lock
+    def leg(self, row):
+        flight_id, flight_number, origin, destination, departure_time, departure, offset = row
+        return Leg(flight_id, flight_number, origin, destination, departure_time, departure,
+                   departure + self.block_seconds), offset
+
+    # re-reads the given flights after a write: legs that moved are re-inserted, legs no longer active are dropped;
+    # legs are keyed by FlightID, a flight number can be flown on many days. airport offsets are re-read too, so
+    # airports added or retimed since the load are known
+    def refresh(self, service, flight_ids):
+        flight_ids = list(dict.fromkeys(flight_ids))
+        offsets = self.airport_offsets(service)
+        rows = []
+        if flight_ids:
+            placeholders = ", ".join("?" * len(flight_ids))
+            cursor = service.connect.cursor()
+            cursor.execute(self.leg_select + f" AND f.FlightID IN ({placeholders})", flight_ids)
+            rows = cursor.fetchall()
+        with self.lock:
+            self.offsets = offsets
+            for flight_id in flight_ids:
+                self.remove(flight_id)
+            for row in rows:
+                leg, offsets[leg.origin] = self.leg(row)
+                self.legs[leg.flight_id] = leg
+                insort(self.departures[leg.origin], (leg.departure, leg.flight_id))
+
+    def remove(self, flight_id):
+        leg = self.legs.pop(flight_id, None)
+        if leg is None:
+            return
+        airport_legs = self.departures[leg.origin]
+        del airport_legs[bisect_left(airport_legs, (leg.departure, leg.flight_id))]
+
+    def stats(self):
+        with self.lock:
+            return {"airports": len(self.departures), "legs": len(self.legs)}
+
+    def start_epoch(self, origin, start):
+        # start is local time at the origin, as on the departure board; None is now
+        if origin not in self.offsets:
+            raise ValueError(f"Airport {origin} does not exist in our listings.")
+        if start is None:
+            return int(time.time())
+        local = datetime.fromisoformat(normalise_departure(start))
+        utc = local - timedelta(minutes=self.offsets[origin])
+        return int(utc.replace(tzinfo=timezone.utc).timestamp())
+
+    def connections(self, airport, earliest, latest):
+        # legs leaving airport from earliest to latest, in departure order
+        airport_legs = self.departures.get(airport, ())
+        index = bisect_left(airport_legs, (earliest,))
+        while index < len(airport_legs) and airport_legs[index][0] <= latest:
+            yield self.legs[airport_legs[index][1]]
+            index += 1
+
+    # earliest arrival over any number of legs: Dijkstra on arrival time, one label per leg reached; min_connection
+    # minutes are kept between legs and no connection waits longer than max_wait_hours. with that limit an
+    # earlier arrival does not reach every departure a later one does, so no arrival is pruned; instead each
+    # airport remembers up to when its departures have been scanned, and every leg is boarded once, from the
+    # earliest arrival that makes it
+    def earliest_arrival(self, origin, destination, start=None, min_connection=45, max_wait_hours=24):
+        origin, destination = origin.upper(), destination.upper()
+        with self.lock:
+            start = self.start_epoch(origin, start)
+            connection, max_wait = int(min_connection * 60), int(max_wait_hours * 3600)
+            scanned = {}
+            inbound = {}
+            heap = [(start, origin, None)]
+            while heap:
+                arrival, airport, leg = heapq.heappop(heap)
+                if airport == destination and leg is not None:
+                    return self.itinerary(inbound, leg)
+                ready = arrival if leg is None else arrival + connection
+                earliest = ready if airport not in scanned else max(ready, scanned[airport] + 1)
+                if earliest > ready + max_wait:
+                    continue
+                scanned[airport] = ready + max_wait
+                for next_leg in self.connections(airport, earliest, ready + max_wait):
+                    inbound[next_leg.flight_id] = leg
+                    heapq.heappush(heap, (next_leg.arrival, next_leg.destination, next_leg))
+            return None
+
+    # fewest legs, the earliest arriving among those: a breadth first search one leg at a time, where every leg is
+    # boarded in the first round that reaches it; within a round the arrivals at an airport are taken in time
+    # order, so their connection windows are scanned once between them
+    def fewest_hops(self, origin, destination, start=None, min_connection=45, max_wait_hours=24, max_hops=4):
+        origin, destination = origin.upper(), destination.upper()
+        with self.lock:
+            start = self.start_epoch(origin, start)
+            connection, max_wait = int(min_connection * 60), int(max_wait_hours * 3600)
+            boarded = set()
+            inbound = {}
+            frontier = [(start, origin, None)]
+            for _ in range(max_hops):
+                frontier.sort()
+                scanned = {}
+                reached = []
+                for arrival, airport, leg in frontier:
+                    ready = arrival if leg is None else arrival + connection
+                    earliest = ready if airport not in scanned else max(ready, scanned[airport] + 1)
+                    if earliest > ready + max_wait:
+                        continue
+                    scanned[airport] = ready + max_wait
+                    for next_leg in self.connections(airport, earliest, ready + max_wait):
+                        if next_leg.flight_id in boarded:
+                            continue
+                        boarded.add(next_leg.flight_id)
+                        inbound[next_leg.flight_id] = leg
+                        reached.append((next_leg.arrival, next_leg.destination, next_leg))
+                if not reached:
+                    return None
+                arrivals = [item for item in reached if item[1] == destination]
+                if arrivals:
+                    return self.itinerary(inbound, min(arrivals)[2])
+                frontier = reached
+            return None
+
+    # inbound maps a leg's FlightID to the leg flown before it, None for the first
+    def itinerary(self, inbound, leg):
+        legs = []
+        while leg is not None:
+            legs.append(leg)
+            leg = inbound[leg.flight_id]
+        return self.itinerary_of(legs[::-1])
+
+    @staticmethod
+    def itinerary_of(legs):
+        return Itinerary(tuple(legs), legs[0].departure, legs[-1].arrival, len(legs))
+
+
+def print_itinerary(title, itinerary):
+    print(f"\n{title}:")
+    print("-" * 85)
+    if itinerary is None:
+        print("No connection found")
+        print("-" * 85)
+        return
+    print(f"{'Flight #':<10} {'From':<6} {'To':<6} {'Local Departure':<20} {'Departs UTC':<20} {'Arrives UTC':<20}")
+    print("-" * 85)
+    for leg in itinerary.legs:
+        print(f"{leg.flight_number:<10} {leg.origin:<6} {leg.destination:<6} {leg.departure_time:<20} "
+              f"{utc_text(leg.departure):<20} {utc_text(leg.arrival):<20}")
+    print("-" * 85)
+    hours, minutes = divmod((itinerary.arrival - itinerary.departure) // 60, 60)
+    print(f"{itinerary.hops} legs, {hours}h {minutes:02d}m from first departure to arrival")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find connecting itineraries between two airports")
+    parser.add_argument("origin")
+    parser.add_argument("destination")
+    parser.add_argument("--at", help="earliest departure, local time at the origin; default now")
+    parser.add_argument("--min-connection", type=float, default=45, help="minutes between legs")
+    parser.add_argument("--max-wait", type=float, default=24, help="longest wait for a connection, in hours")
+    parser.add_argument("--max-hops", type=int, default=4, help="most legs for the fewest hops search")
+    parser.add_argument("--block-minutes", type=float, default=120, help="assumed flight time of every leg")
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    args = parser.parse_args()
+
+    service = FlightService(args.database, args.profile)
+    start = time.perf_counter()
+    graph = RouteGraph(args.block_minutes).load(service)
+    loaded = time.perf_counter() - start
+    stats = graph.stats()
+    print(f"Route graph: {stats['legs']:,} legs from {stats['airports']:,} airports, built in {loaded:.2f}s")
+
+    try:
+        for title, search in (("Earliest Arrival", graph.earliest_arrival), ("Fewest Legs", graph.fewest_hops)):
+            options = {"max_hops": args.max_hops} if search == graph.fewest_hops else {}
+            start = time.perf_counter()
+            itinerary = search(args.origin, args.destination, args.at, args.min_connection, args.max_wait,
+                               **options)
+            print_itinerary(f"{title} ({(time.perf_counter() - start) * 1000:.1f} ms)", itinerary)
+    except ValueError as error:
+        print(error)
+
+
+if __name__ == "__main__":
+    main()
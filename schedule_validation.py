@@ -0,0 +1,387 @@
+import argparse
+import csv
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from connection import DEFAULT_PROFILE, PROFILES
+from flight_service import ACTIVE_STATUSES, PILOT_REST_SECONDS, VALID_STATUSES, FlightService
+from render import FORMATS, TableWriter, column
+
+
+# row is the data line of the proposed schedule, 1 for the first line after a csv header
+ScheduleError = namedtuple("ScheduleError", "row flight_number check detail")
+
+# in the order they are applied; a row is reported for the first check it fails and, like a flight add_new_flight
+# rejects, takes no flight number or pilot time from the rows after it
+CHECKS = ("invalid row", "invalid status", "unknown airport", "same airport", "unknown pilot",
+          "duplicate flight number", "pilot conflict")
+
+ERROR_COLUMNS = (
+    column("Row", "row", width=8),
+    column("Flight #", "flight_number", width=10),
+    column("Check", "check", width=24),
+    column("Detail", "detail"),
+)
+
+
+class ValidationReport:
+    def __init__(self, path, processes, partitions):
+        self.path = path
+        self.processes = processes
+        self.partitions = partitions
+        self.rows = 0
+        self.errors = []
+        self.snapshot_seconds = 0.0
+        self.seconds = 0.0
+
+    @property
+    def valid(self):
+        return not self.errors
+
+    def counts(self):
+        counts = Counter(error.check for error in self.errors)
+        return [(check, counts[check]) for check in CHECKS]
+
+    def __str__(self):
+        return (f"{self.rows:>10,} rows {len(self.errors):>8,} rejected {self.processes:>3} processes "
+                f"{self.partitions:>4} partitions {self.seconds:>8.2f}s")
+
+
+# the worker's read-only view of the snapshot, opened once per process by the pool initializer
+checks = None
+
+
+class SnapshotChecks:
+    def __init__(self, snapshot_path):
+        # immutable: the snapshot is a private copy nothing writes to, so readers skip locking entirely
+        self.connect = sqlite3.connect(f"file:{snapshot_path}?mode=ro&immutable=1", uri=True)
+        # minutes east of UTC by airport code, a proposed departure is local time at its origin
+        self.airports = dict(self.connect.execute("SELECT AirportCode, UtcOffsetMinutes FROM Destinations"))
+        self.pilot_ids = dict(self.connect.execute("SELECT LicenseNumber, PilotID FROM Pilots"))
+        # rows rejected before the pilot checks, read from the run's directory on first use
+        self.rejected = None
+
+
+def open_snapshot(snapshot_path):
+    global checks
+    checks = SnapshotChecks(snapshot_path)
+
+
+def split_file(path, parts):
+    # byte ranges of whole lines with the row number each starts at, the header of a csv file and the number of
+    # rows; rows are split at newlines, so a quoted csv field may not contain one
+    with open(path, "rb") as file:
+        header = None
+        if not path.lower().endswith((".jsonl", ".json")):
+            header = file.readline().decode("utf-8-sig").strip()
+        data_start = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        boundaries = [data_start]
+        for part in range(1, parts):
+            file.seek(max(data_start + (size - data_start) * part // parts, boundaries[-1]))
+            file.readline()
+            boundaries.append(min(file.tell(), size))
+        boundaries.append(size)
+
+        ranges = []
+        row = 1
+        for start, end in zip(boundaries, boundaries[1:]):
+            if end <= start:
+                continue
+            ranges.append((start, end, row))
+            # counted a megabyte at a time in C, the only pass over the data the parent makes
+            file.seek(start)
+            remaining = end - start
+            while remaining:
+                block = file.read(min(remaining, 1024 * 1024))
+                row += block.count(b"\n")
+                remaining -= len(block)
+            if not block.endswith(b"\n"):
+                row += 1
+    return header, ranges, row - 1
+
+
+# the columns of a proposed flight, as bulk_import.py reads them; LicenseNumber is accepted for PilotLicense
+SCHEDULE_FIELDS = ("FlightNumber", "Origin", "Destination", "DepartureTime", "Status", "PilotLicense")
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+# read_range yields this for a json line that does not parse, or is not an object
+MALFORMED = object()
+
+
+def read_range(path, header, start, end):
+    # the SCHEDULE_FIELDS of every line in the range as a tuple, None for a missing value or a blank line and
+    # MALFORMED for a json line that is not an object
+    with open(path, "rb") as file:
+        file.seek(start)
+        lines = file.read(end - start).decode("utf-8").splitlines()
+    if header is None:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                yield None
+                continue
+            try:
+                fields = json.loads(line)
+            except ValueError:
+                fields = None
+            if not isinstance(fields, dict):
+                yield MALFORMED
+                continue
+            yield tuple(fields.get(name) for name in SCHEDULE_FIELDS[:-1]) + \
+                (fields.get("PilotLicense") or fields.get("LicenseNumber"),)
+    else:
+        names = next(csv.reader([header]))
+        if "PilotLicense" not in names and "LicenseNumber" in names:
+            names[names.index("LicenseNumber")] = "PilotLicense"
+        # values are picked by position, a short line is padded with None
+        positions = [names.index(name) if name in names else len(names) for name in SCHEDULE_FIELDS]
+        padding = [None] * (len(names) + 1)
+        for values in csv.reader(lines):
+            if not values:
+                yield None
+                continue
+            values += padding
+            yield tuple([values[position] for position in positions])
+
+
+# rows passed from the row checks to a later check are written to a file per partition and range task in the
+# snapshot's directory; the partition's task reads them back, so they never pass through the parent process
+def spill_path(directory, kind, partition, task):
+    return os.path.join(directory, f"{kind}-{partition}-{task}.pickle")
+
+
+def read_partition(directory, kind, partition, tasks):
+    rows = []
+    for task in range(tasks):
+        with open(spill_path(directory, kind, partition, task), "rb") as file:
+            rows.extend(pickle.load(file))
+    return rows
+
+
+def check_rows(path, header, start, end, first_row, partitions, directory, task):
+    # the checks that need only the row itself and the snapshot's airports and pilots; rows that pass are
+    # spilled for the next checks, by flight number and, for active flights with a pilot, by pilot
+    errors = []
+    numbers = [[] for _ in range(partitions)]
+    pilots = [[] for _ in range(partitions)]
+    airports = checks.airports
+    pilot_ids = checks.pilot_ids
+    for row, fields in enumerate(read_range(path, header, start, end), first_row):
+        if fields is None:
+            continue
+        if fields is MALFORMED:
+            errors.append(ScheduleError(row, "", "invalid row", "malformed json line"))
+            continue
+        flight_number, origin, destination, departure_time, status, license_number = fields
+        flight_number = str(flight_number or "").strip().upper()
+        try:
+            origin = origin.strip().upper()
+            destination = destination.strip().upper()
+            # read as create_flight stores it: to the second, any UTC offset dropped, then taken as UTC
+            departure = datetime.fromisoformat(departure_time.strip())
+            if departure.tzinfo is not None or departure.microsecond:
+                departure = departure.replace(tzinfo=None, microsecond=0)
+            if not flight_number:
+                raise ValueError(flight_number)
+            # a json value that is not a string, such as "Status": 1, is as invalid as a missing one
+            status = (status or "Scheduled").strip().title()
+            license_number = (license_number or "").strip().upper()
+        except (AttributeError, TypeError, ValueError):
+            errors.append(ScheduleError(row, flight_number, "invalid row", "missing or invalid flight column"))
+            continue
+        pilot_id = pilot_ids.get(license_number) if license_number else None
+
+        if status not in VALID_STATUSES:
+            error = ("invalid status", f"status {status}")
+        elif origin not in airports:
+            error = ("unknown airport", f"origin {origin} does not exist in our listings")
+        elif destination not in airports:
+            error = ("unknown airport", f"destination {destination} does not exist in our listings")
+        elif origin == destination:
+            error = ("same airport", f"origin and destination are both {origin}")
+        elif license_number and pilot_id is None:
+            error = ("unknown pilot", f"pilot license {license_number}")
+        else:
+            error = None
+        if error is not None:
+            errors.append(ScheduleError(row, flight_number, *error))
+            continue
+
+        numbers[zlib.crc32(flight_number.encode()) % partitions].append((row, flight_number))
+        if pilot_id is not None and status in ACTIVE_STATUSES:
+            # the 12 hour rule is measured between UTC departures, as validate_pilot measures it
+            departure = (departure - EPOCH) // ONE_SECOND - airports[origin] * 60
+            pilots[pilot_id % partitions].append((row, flight_number, pilot_id, departure))
+
+    for kind, partitioned in (("numbers", numbers), ("pilots", pilots)):
+        for partition, rows in enumerate(partitioned):
+            with open(spill_path(directory, kind, partition, task), "wb") as file:
+                pickle.dump(rows, file, pickle.HIGHEST_PROTOCOL)
+    return errors
+
+
+def check_flight_numbers(directory, partition, tasks):
+    # every flight number in one partition: the first row to use a number keeps it, unless the snapshot has it
+    errors = []
+    rows = sorted(read_partition(directory, "numbers", partition, tasks))
+    existing = {row[0] for row in checks.connect.execute(
+        "SELECT FlightNumber FROM Flights WHERE FlightNumber IN (SELECT value FROM json_each(?))",
+        (json.dumps([flight_number for _, flight_number in rows]),))}
+    first_rows = {}
+    for row, flight_number in rows:
+        if flight_number in existing:
+            errors.append(ScheduleError(row, flight_number, "duplicate flight number", "already exists"))
+        elif flight_number in first_rows:
+            errors.append(ScheduleError(row, flight_number, "duplicate flight number",
+                                        f"already used on row {first_rows[flight_number]}"))
+        else:
+            first_rows[flight_number] = row
+    return errors
+
+
+def rejected_rows(directory):
+    # the parent writes the rejected rows once and each process reads them once, rather than every task
+    # carrying its own pickled copy
+    if checks.rejected is None:
+        with open(os.path.join(directory, "rejected.pickle"), "rb") as file:
+            checks.rejected = pickle.load(file)
+    return checks.rejected
+
+
+def check_pilots(directory, partition, tasks):
+    # every pilot in one partition, rows taken in schedule order as add_new_flight would take them: a flight
+    # departing within 12 hours of one its pilot already flies, in the snapshot or accepted earlier, is a conflict
+    errors = []
+    rejected = rejected_rows(directory)
+    rows = sorted(row for row in read_partition(directory, "pilots", partition, tasks) if row[0] not in rejected)
+    if not rows:
+        return errors
+    departures = {}
+    for pilot_id, departure in checks.connect.execute("""
+        SELECT PilotID, DepartureUTCEpoch FROM Flights
+        WHERE PilotID IN (SELECT value FROM json_each(?)) AND Status IN ('Scheduled', 'Delayed')
+        AND DepartureUTCEpoch BETWEEN ? AND ?
+    """, (json.dumps(sorted({row[2] for row in rows})), min(row[3] for row in rows) - PILOT_REST_SECONDS,
+          max(row[3] for row in rows) + PILOT_REST_SECONDS)):
+        # row 0 marks a flight already in the snapshot
+        departures.setdefault(pilot_id, []).append((departure, 0, None))
+    for flights in departures.values():
+        flights.sort()
+
+    for row, flight_number, pilot_id, departure in rows:
+        flights = departures.setdefault(pilot_id, [])
+        index = bisect_left(flights, (departure - PILOT_REST_SECONDS,))
+        if index < len(flights) and flights[index][0] <= departure + PILOT_REST_SECONDS:
+            other_row, other_number = flights[index][1:]
+            detail = f"{other_number} on row {other_row}" if other_row else "an existing flight"
+            errors.append(ScheduleError(row, flight_number, "pilot conflict",
+                                        f"pilot {pilot_id} flies {detail} within 12 hours"))
+            continue
+        insort(flights, (departure, row, flight_number))
+    return errors
+
+
+class ScheduleValidator:
+    # checks a proposed schedule file (the csv or jsonl layout bulk_import.py loads) against a snapshot of the
+    # database, on a pool of processes. The file is read in byte ranges, one task each, for the row checks; the
+    # rows that pass are then partitioned by flight number for duplicates and by pilot for the 12 hour rule, so
+    # no check needs rows from another partition and the work divides evenly across the processes
+    def __init__(self, service, processes=None, partitions=None):
+        self.service = service
+        self.processes = processes or os.cpu_count()
+        # a few partitions per process, so one slow partition does not leave the others idle
+        self.partitions = partitions or self.processes * 4
+
+    def validate(self, path):
+        report = ValidationReport(path, self.processes, self.partitions)
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_path = os.path.join(directory, "snapshot.db")
+            self.snapshot(snapshot_path)
+            report.snapshot_seconds = time.perf_counter() - start
+            with ProcessPoolExecutor(self.processes, initializer=open_snapshot,
+                                     initargs=(snapshot_path,)) as pool:
+                self.run(pool, path, directory, report)
+        report.errors.sort()
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def snapshot(self, snapshot_path):
+        # a consistent copy through the backup API: every process checks against the same moment, and writers on
+        # the live database carry on meanwhile
+        copy = sqlite3.connect(snapshot_path)
+        try:
+            self.service.connect.backup(copy, pages=4096)
+        finally:
+            copy.close()
+
+    def run(self, pool, path, directory, report):
+        header, ranges, report.rows = split_file(path, self.partitions)
+        tasks = len(ranges)
+        partitions = range(self.partitions)
+        row_checks = [pool.submit(check_rows, path, header, range_start, range_end, first_row, self.partitions,
+                                  directory, task)
+                      for task, (range_start, range_end, first_row) in enumerate(ranges)]
+        for future in row_checks:
+            report.errors.extend(future.result())
+
+        # a duplicate is rejected before its pilot is checked, so it takes no pilot time
+        rejected = set()
+        for errors in pool.map(check_flight_numbers, [directory] * self.partitions, partitions,
+                               [tasks] * self.partitions):
+            report.errors.extend(errors)
+            rejected.update(error.row for error in errors)
+        with open(os.path.join(directory, "rejected.pickle"), "wb") as file:
+            pickle.dump(rejected, file, pickle.HIGHEST_PROTOCOL)
+        for errors in pool.map(check_pilots, [directory] * self.partitions, partitions, [tasks] * self.partitions):
+            report.errors.extend(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check a proposed schedule before loading it with bulk_import.py")
+    parser.add_argument("schedule", help="CSV/JSONL file with FlightNumber, Origin, Destination, DepartureTime, "
+                                             "Status, PilotLicense")
+    parser.add_argument("--database", default="flights.db")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--processes", type=int, help="worker processes, default one per CPU")
+    parser.add_argument("--partitions", type=int, help="partitions per check, default four per process")
+    parser.add_argument("--errors", help="write every rejected row to this file")
+    parser.add_argument("--format", default="jsonl", choices=FORMATS, help="format of the --errors file")
+    parser.add_argument("--show", type=int, default=20, help="rejected rows to print")
+    args = parser.parse_args()
+
+    service = FlightService(args.database, args.profile)
+    report = ScheduleValidator(service, args.processes, args.partitions).validate(args.schedule)
+
+    print("\nSchedule Validation:")
+    print("-" * 85)
+    print(report)
+    print(f"{'Check':<30} {'Rejected':>12}")
+    for check, count in report.counts():
+        print(f"{check:<30} {count:>12,}")
+    print("-" * 85)
+
+    if report.errors and args.show:
+        shown = report.errors[:args.show]
+        TableWriter(ERROR_COLUMNS).write(shown, f"First {len(shown)} Rejected Rows")
+    if args.errors:
+        with open(args.errors, "w", newline="", encoding="utf-8", buffering=1024 * 1024) as output:
+            TableWriter(ERROR_COLUMNS, args.format, output, block_rows=5000).write(report.errors, "Rejected Rows")
+        print(f"{len(report.errors):,} rejected rows written to {args.errors}")
+    if not report.valid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
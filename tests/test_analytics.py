@@ -0,0 +1,42 @@
+import unittest
+
+from analytics import FlightAnalytics, np
+from flight_service import FlightService
+
+
+@unittest.skipIf(np is None, "analytics needs numpy")
+class FlightAnalyticsTest(unittest.TestCase):
+    def setUp(self):
+        self.service = FlightService(":memory:")
+        with self.service.connect:
+            self.service.connect.execute("DELETE FROM Flights")
+
+    def add_flights(self, *flights):
+        with self.service.connect:
+            self.service.connect.executemany(
+                "INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status) VALUES (?, ?, ?, ?, ?)",
+                flights)
+        return FlightAnalytics(self.service.connect).load()
+
+    def test_delayed_flights_are_not_an_outcome(self):
+        analytics = self.add_flights(("AA1", "LHR", "JFK", "2025-02-01 08:00:00", "Completed"),
+                                     ("AA2", "LHR", "JFK", "2025-02-02 08:00:00", "Cancelled"),
+                                     ("AA3", "LHR", "JFK", "2025-02-03 08:00:00", "Delayed"),
+                                     ("AA4", "LHR", "JFK", "2025-02-04 08:00:00", "Scheduled"))
+        self.assertEqual(analytics.route_rates(), [("LHR", "JFK", 4, 0.5, 0.5, 0.5)])
+
+    def test_days_are_utc_days(self):
+        # 05:00 in Sydney is 18:00 UTC the day before
+        analytics = self.add_flights(("QF1", "SYD", "LHR", "2025-02-05 05:00:00", "Completed"),
+                                     ("BA1", "LHR", "SYD", "2025-02-04 08:00:00", "Completed"))
+        days = analytics.daily_rates(window=1)
+        self.assertEqual([(day.isoformat(), flights) for day, flights, *_ in days], [("2025-02-04", 2)])
+
+    def test_unreadable_departure_times_are_left_out(self):
+        analytics = self.add_flights(("BA1", "LHR", "JFK", "2025-02-04 08:00:00", "Completed"),
+                                     ("BA2", "LHR", "JFK", "not a time", "Completed"))
+        self.assertEqual(analytics.flights, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from archive import FlightArchiver
+from flight_service import FlightService
+
+
+class FlightArchiverTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.service = FlightService(os.path.join(directory.name, "flights.db"))
+        self.archive_path = os.path.join(directory.name, "archive.db")
+
+    def test_finished_flights_round_trip_through_all_flights(self):
+        before = sorted(self.service.find_flights())
+        archiver = FlightArchiver(self.service, self.archive_path, batch_size=1)
+        result = archiver.archive("2025-03-01")
+        # EK450 and AA789 are the finished flights in the sample data
+        self.assertEqual((result.moved, result.batches), (2, 2))
+        self.assertEqual(archiver.counts(), (3, 2))
+        self.assertEqual(sorted(flight.flight_number for flight in self.service.find_flights()),
+                         ["AF302", "BA101", "QF200"])
+        self.assertEqual(sorted(self.service.find_flights(include_archive=True)), before)
+        self.assertEqual([flight.flight_number for flight in
+                          self.service.find_flights(origin="DXB", include_archive=True)], ["EK450"])
+
+        self.assertEqual(archiver.archive("2025-03-01").moved, 0)
+        self.assertEqual(archiver.counts(), (3, 2))
+
+    def test_the_newest_flight_stays_live(self):
+        self.service.update_status("QF200", "Completed")
+        FlightArchiver(self.service, self.archive_path).archive("2025-03-01")
+        self.assertEqual(sorted(flight.flight_number for flight in self.service.find_flights()),
+                         ["AF302", "BA101", "QF200"])
+
+
+if __name__ == "__main__":
+    unittest.main()
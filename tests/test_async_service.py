@@ -0,0 +1,53 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from async_service import AsyncFlightService
+
+
+class AsyncFlightServiceTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = os.path.join(directory.name, "flights.db")
+
+    def run_service(self, test):
+        async def run():
+            async with AsyncFlightService(self.database, max_readers=2) as service:
+                await test(service)
+        asyncio.run(run())
+
+    def test_streams_read_every_row_a_page_at_a_time(self):
+        async def test(service):
+            flights = [flight.flight_id async for flight in service.stream_flights(page_size=2)]
+            self.assertEqual(flights, [flight.flight_id for flight in await service.find_flights()])
+            by_departure = [flight async for flight in service.stream_flights(page_size=2, by_departure=True)]
+            self.assertEqual([flight.departure_time for flight in by_departure],
+                             sorted(flight.departure_time for flight in by_departure))
+            self.assertEqual(len(by_departure), len(flights))
+            pilots = [pilot.pilot_id async for pilot in service.stream_pilots(page_size=2)]
+            self.assertEqual(pilots, sorted(pilots))
+        self.run_service(test)
+
+    def test_abandoned_streams_hold_no_reader(self):
+        async def test(service):
+            # kept referenced and never closed, more of them than there are readers
+            streams = [service.stream_flights(page_size=1) for _ in range(4)]
+            for stream in streams:
+                await asyncio.wait_for(stream.__anext__(), 5)
+            self.assertEqual(len(await asyncio.wait_for(service.find_flights(limit=3), 5)), 3)
+            for stream in streams:
+                await stream.aclose()
+        self.run_service(test)
+
+    def test_reads_with_list_arguments_are_shared(self):
+        async def test(service):
+            first, second = await asyncio.gather(service.find_flights(statuses=["Scheduled", "Delayed"]),
+                                                 service.find_flights(statuses=["Scheduled", "Delayed"]))
+            self.assertIs(first, second)
+        self.run_service(test)
+
+
+if __name__ == "__main__":
+    unittest.main()
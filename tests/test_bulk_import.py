@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from bulk_import import BulkImporter
+from flight_service import FlightService
+
+
+class BulkImportTest(unittest.TestCase):
+    def setUp(self):
+        # a new database comes with LHR (GMT), JFK (GMT-5) and pilot LIC123456 among its sample rows
+        self.service = FlightService(":memory:")
+        self.importer = BulkImporter(self.service.connect)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def import_flights(self, *lines):
+        path = os.path.join(self.directory, "flights.jsonl")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        return self.importer.import_flights(path)
+
+    def test_bad_rows_are_rejected_without_stopping_the_import(self):
+        result = self.import_flights(
+            '{"FlightNumber": "TS1", "Origin": "LHR", "Destination": "JFK", "DepartureTime": "2031-01-01 08:00"}',
+            '{"FlightNumber": "TS2", "Origin": "LHR"',
+            '["TS3"]',
+            '{"FlightNumber": "TS4", "Origin": "LHR", "Destination": "JFK", "DepartureTime": "2031-01-01 08:00", '
+            '"Status": 1}',
+            '{"FlightNumber": "TS5", "Origin": "LHR", "Destination": "JFK", "DepartureTime": "2031-01-01 08:00", '
+            '"PilotLicense": 123}',
+            '{"FlightNumber": "TS1", "Origin": "JFK", "Destination": "LHR", "DepartureTime": "2031-01-02 08:00"}',
+        )
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual(result.rejected, [
+            (2, "malformed json line"), (3, "malformed json line"), (4, "missing or invalid flight column"),
+            (5, "missing or invalid flight column"), (6, "flight number TS1 already exists")])
+
+    def test_pilot_conflicts_are_measured_in_utc(self):
+        # JFK 03:00 is 08:00 UTC, the same instant as LHR 08:00; JFK 23:00 is 04:00 UTC the next day
+        result = self.import_flights(
+            '{"FlightNumber": "TS1", "Origin": "LHR", "Destination": "JFK", "DepartureTime": "2031-01-01 08:00", '
+            '"PilotLicense": "LIC123456"}',
+            '{"FlightNumber": "TS2", "Origin": "JFK", "Destination": "LHR", "DepartureTime": "2031-01-01 03:00", '
+            '"PilotLicense": "LIC123456"}',
+            '{"FlightNumber": "TS3", "Origin": "JFK", "Destination": "LHR", "DepartureTime": "2031-01-01 23:00", '
+            '"PilotLicense": "LIC123456"}',
+        )
+        self.assertEqual(result.inserted, 2)
+        self.assertEqual([line_no for line_no, _ in result.rejected], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from crew_assignment import CrewAssigner
+from flight_service import FlightService
+
+
+class CrewAssignerTest(unittest.TestCase):
+    def setUp(self):
+        # pilot 1 already flies BA101 from LHR at 2025-02-01 08:30 UTC
+        self.service = FlightService(":memory:")
+        for flight in (("CA1", "LHR", "CDG", "2025-02-01 15:00:00"),
+                       # 07:00 in Sydney is 20:00 UTC the day before, 11.5 hours after BA101
+                       ("CA2", "SYD", "DXB", "2025-02-02 07:00:00"),
+                       # 16:00 in New York is 21:00 UTC
+                       ("CA3", "JFK", "LHR", "2025-02-01 16:00:00"),
+                       ("CA4", "LHR", "JFK", "2025-02-02 06:00:00")):
+            self.service.create_flight(*flight)
+
+    def pilots(self):
+        rows = self.service.connect.execute("SELECT FlightNumber, PilotID FROM Flights WHERE FlightNumber LIKE 'CA%' "
+                                            "ORDER BY FlightNumber")
+        return dict(rows)
+
+    def test_assignments_keep_the_12_hour_rule_in_utc(self):
+        result = CrewAssigner(self.service.connect).assign(pilot_ids=[1])
+        self.assertEqual([flight.flight_number for flight in result.unassignable], ["CA1", "CA2", "CA4"])
+        self.assertEqual(self.pilots(), {"CA1": None, "CA2": None, "CA3": 1, "CA4": None})
+
+    def test_a_dry_run_writes_nothing(self):
+        result = CrewAssigner(self.service.connect).assign(pilot_ids=[1], dry_run=True)
+        self.assertEqual(len(result.assigned), 1)
+        self.assertEqual(set(self.pilots().values()), {None})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from connection_pool import ConnectionPool
+from flight_server import FlightServer
+
+
+class FlightServerTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pool = ConnectionPool(os.path.join(directory.name, "flights.db"), 2)
+        self.addCleanup(self.pool.close)
+        self.server = FlightServer(("127.0.0.1", 0), self.pool, quiet=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path):
+        try:
+            with urlopen(f"http://127.0.0.1:{self.server.server_port}{path}") as response:
+                return response.status, json.load(response)
+        except HTTPError as error:
+            with error:
+                return error.code, json.load(error)
+
+    def test_list_flights_filters_and_order(self):
+        # a new database comes with five sample flights, one from each airport
+        status, flights = self.get("/flights?order=departure&limit=10")
+        self.assertEqual(status, 200)
+        departures = [flight["departure_time"] for flight in flights]
+        self.assertEqual(len(departures), 5)
+        self.assertEqual(departures, sorted(departures))
+
+        status, flights = self.get(f"/flights?origin=LHR&pilot_id={flights[0]['pilot_id']}")
+        self.assertEqual(status, 200)
+        self.assertEqual([flight["origin"] for flight in flights], ["LHR"])
+
+    def test_list_flights_rejects_bad_parameters(self):
+        for path in ("/flights?by_departure=1", "/flights?page_size=10", "/flights?include_archive=1",
+                     "/flights?colour=red", "/flights?pilot_id=abc", "/flights?limit=ten", "/flights?order=name",
+                     "/flights?departure_from=tomorrow", "/flights?statuses=Boarding"):
+            with self.subTest(path=path):
+                status, body = self.get(path)
+                self.assertEqual(status, 400)
+                self.assertIn("error", body)
+
+    def test_database_errors_are_answered_with_500(self):
+        with self.pool.writer() as service:
+            with service.connect:
+                service.connect.execute("DROP TABLE Pilots")
+        with self.assertLogs("flights.server", "ERROR"):
+            status, body = self.get("/pilots")
+        self.assertEqual(status, 500)
+        self.assertEqual(body, {"error": "Internal server error"})
+
+        status, body = self.get("/health")
+        self.assertEqual(status, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
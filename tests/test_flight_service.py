@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flight_service import FlightService
+
+
+class AmendFlightsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.service = FlightService(os.path.join(directory.name, "flights.db"))
+
+    def test_a_flight_changed_since_it_was_read_is_a_conflict(self):
+        flight = self.service.get_flight("BA101")
+        self.service.update_status("BA101", "Delayed")
+        result = self.service.amend_flights([{"flight_id": flight.flight_id, "version": flight.version,
+                                              "status": "Cancelled"}])
+        self.assertEqual(result.applied, [])
+        self.assertEqual(result.conflicts, [(flight.flight_id, flight.version, flight.version + 1)])
+        self.assertEqual(self.service.get_flight("BA101").status, "Delayed")
+
+    def test_amendments_with_the_current_version_are_applied(self):
+        flight = self.service.get_flight("BA101")
+        result = self.service.amend_flights([{"flight_id": flight.flight_id, "version": flight.version,
+                                              "status": "Delayed"}])
+        self.assertEqual(result.applied, [(flight.flight_id, flight.version + 1)])
+        self.assertEqual(self.service.get_flight("BA101").version, flight.version + 1)
+
+    def test_a_flight_number_taken_by_another_flight_is_rejected(self):
+        flight = self.service.get_flight("BA101")
+        result = self.service.amend_flights([{"flight_id": flight.flight_id, "flight_number": "AF302"}])
+        self.assertEqual(result.rejected, [(flight.flight_id, "Flight number AF302 already exists.")])
+        with self.assertRaisesRegex(ValueError, "AF302 already exists"):
+            self.service.amend_flight("BA101", {"flight_number": "AF302"})
+
+    def test_a_flight_keeps_its_own_number(self):
+        flight = self.service.get_flight("BA101")
+        result = self.service.amend_flights([{"flight_id": flight.flight_id, "flight_number": "ba101"}])
+        self.assertEqual(result.applied, [(flight.flight_id, flight.version + 1)])
+        self.assertEqual(self.service.amend_flight("BA101", {"flight_number": "BA102"}).flight_number, "BA102")
+
+
+class OpenTest(unittest.TestCase):
+    def test_a_failed_bootstrap_leaves_the_service_unopened(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        service = FlightService(os.path.join(directory.name, "flights.db"))
+        with mock.patch("flight_service.migrate", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                service.connect
+        self.assertIsNone(service.connection)
+        # the next use bootstraps again instead of running on a half-built schema
+        self.assertEqual(service.get_flight("BA101").flight_number, "BA101")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from flight_service import FlightService
+from migrations import check_pilot_availability, check_search_index
+
+
+class TriggerTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.service = FlightService(os.path.join(directory.name, "flights.db"))
+        self.connect = self.service.connect
+
+    def departure_utc(self, flight_number):
+        return self.connect.execute("SELECT DepartureUTC FROM Flights WHERE FlightNumber = ?",
+                                    (flight_number,)).fetchone()[0]
+
+    def test_departure_utc_is_derived_when_left_out(self):
+        with self.connect:
+            self.connect.execute("""
+                INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status)
+                VALUES ('ZZ1', 'JFK', 'LHR', '2025-03-01 22:00:00', 'Scheduled')""")
+        self.assertEqual(self.departure_utc("ZZ1"), "2025-03-02 03:00:00")
+
+    def test_departure_utc_given_on_insert_is_kept(self):
+        self.service.create_flight("ZZ2", "SYD", "JFK", "2025-03-01 05:00:00")
+        self.assertEqual(self.departure_utc("ZZ2"), "2025-02-28 18:00:00")
+
+    def test_departure_utc_follows_an_update(self):
+        self.service.create_flight("ZZ3", "SYD", "JFK", "2025-03-01 05:00:00")
+        with self.connect:
+            self.connect.execute("UPDATE Flights SET Origin = 'DXB' WHERE FlightNumber = 'ZZ3'")
+        self.assertEqual(self.departure_utc("ZZ3"), "2025-03-01 01:00:00")
+        with self.connect:
+            self.connect.execute("UPDATE Destinations SET TimeZone = 'GMT+5' WHERE AirportCode = 'DXB'")
+        self.assertEqual(self.departure_utc("ZZ3"), "2025-03-01 00:00:00")
+
+    def availability(self, pilot_id):
+        return self.connect.execute("SELECT ActiveFlights, NextDeparture FROM PilotAvailability WHERE PilotID = ?",
+                                    (pilot_id,)).fetchone()
+
+    def test_pilot_availability_follows_flight_writes(self):
+        # pilot 1 flies BA101, the only active flight in the sample data for them
+        self.assertEqual(self.availability(1), (1, "2025-02-01 08:30:00"))
+        self.service.create_flight("ZZ4", "LHR", "CDG", "2025-01-20 08:00:00", pilot_id=1)
+        self.assertEqual(self.availability(1), (2, "2025-01-20 08:00:00"))
+        self.service.update_status("ZZ4", "Cancelled")
+        self.assertEqual(self.availability(1), (1, "2025-02-01 08:30:00"))
+        self.service.assign_pilot("BA101", 3)
+        self.assertEqual(self.availability(1), (0, None))
+        self.assertEqual(self.availability(3), (1, "2025-02-01 08:30:00"))
+        with self.connect:
+            self.connect.execute("DELETE FROM Flights WHERE FlightNumber = 'BA101'")
+        self.assertEqual(self.availability(3), (0, None))
+
+        self.service.add_pilot("Ada", "Lovelace", "TEST01")
+        with self.connect:
+            self.connect.execute("DELETE FROM Pilots WHERE LicenseNumber = 'TEST01'")
+        self.assertEqual(check_pilot_availability(self.connect), [])
+
+    def test_search_indexes_follow_their_tables(self):
+        self.service.add_pilot("Zoë", "Ashworth", "TEST02")
+        self.assertEqual([pilot.license_number for pilot in self.service.search_pilots("zoe ash")], ["TEST02"])
+        with self.connect:
+            self.connect.execute("UPDATE Pilots SET LastName = 'Brightwell' WHERE LicenseNumber = 'TEST02'")
+        self.assertEqual(self.service.search_pilots("ashworth"), [])
+        self.assertEqual([pilot.license_number for pilot in self.service.search_pilots("bright")], ["TEST02"])
+
+        self.service.create_flight("QZ901", "LHR", "CDG", "2025-03-01 08:00:00")
+        self.service.amend_flight("QZ901", {"flight_number": "QY901"})
+        self.assertEqual(self.service.search_flight_numbers("QZ9"), [])
+        self.assertEqual([flight.flight_number for flight in self.service.search_flight_numbers("QY9")], ["QY901"])
+
+        self.service.add_destination("TKY", "Tokyo", "Japan", "GMT+9")
+        self.assertEqual([airport.airport_code for airport in self.service.search_destinations("tok")], ["TKY"])
+        self.service.remove_destination("TKY")
+        self.assertEqual(self.service.search_destinations("tok"), [])
+        self.assertEqual(check_search_index(self.connect), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from flight_service import FlightService
+from reference_cache import LRUCache, ReferenceCache
+
+
+class ReferenceCacheTest(unittest.TestCase):
+    def test_a_value_loaded_across_an_invalidation_is_not_kept(self):
+        cache = ReferenceCache()
+
+        def stale_loader(key):
+            # another writer changes the key while this load is running
+            cache.invalidate_destination(key)
+            return "old"
+
+        self.assertEqual(cache.destination("LHR", stale_loader), "old")
+        self.assertEqual(cache.destination("LHR", lambda key: "new"), "new")
+        self.assertEqual(cache.destination("LHR", lambda key: "newer"), "new")
+
+    def test_misses_are_cached_until_cleared(self):
+        cache = LRUCache()
+        cache.put("ZZZ", None, cache.generation)
+        self.assertEqual(cache.get("ZZZ"), (True, None))
+        cache.clear()
+        self.assertEqual(cache.get("ZZZ"), (False, None))
+
+
+class SharedDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "flights.db")
+        self.first = FlightService(path)
+        self.second = FlightService(path)
+
+    def test_writes_from_another_connection_are_seen(self):
+        self.assertFalse(self.first.airport_exists("ZZZ"))
+        self.assertTrue(self.first.airport_exists("SYD"))
+
+        self.second.add_destination("ZZZ", "Zedtown", "Zedland", "GMT")
+        self.second.remove_destination("SYD")
+        self.assertTrue(self.first.airport_exists("ZZZ"))
+        self.assertFalse(self.first.airport_exists("SYD"))
+        with self.assertRaises(ValueError):
+            self.first.create_flight("ZZ1", "SYD", "LHR", "2031-01-01 08:00")
+        self.assertIsNotNone(self.first.create_flight("ZZ2", "ZZZ", "LHR", "2031-01-01 08:00"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from flight_service import FlightService
+from migrations import check_pilot_availability
+from replicate import Replicator, snapshot
+
+
+class ReplicatorTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.service = FlightService(os.path.join(directory.name, "flights.db"))
+        self.source = self.service.connect
+        replica_path = os.path.join(directory.name, "replica.db")
+        # the sample data is already logged, the replica starts from it
+        self.snapshot_seq, _ = snapshot(self.source, replica_path)
+        self.replica = sqlite3.connect(replica_path)
+        self.addCleanup(self.replica.close)
+        self.replicator = Replicator(self.source, self.replica)
+
+    def flights(self, connection):
+        return connection.execute("SELECT FlightID, FlightNumber, Origin, Destination, DepartureTime, DepartureUTC, "
+                                  "Status, PilotID, Version FROM Flights ORDER BY FlightID").fetchall()
+
+    def logged(self):
+        return self.source.execute("SELECT TableName, Operation FROM Changes WHERE Seq > ? ORDER BY Seq",
+                                   (self.snapshot_seq,)).fetchall()
+
+    def test_inserts_updates_and_deletes_are_logged_and_applied(self):
+        flight = self.service.create_flight("ZZ1", "LHR", "CDG", "2025-03-01 08:00:00")
+        self.service.amend_flight("ZZ1", {"origin": "JFK", "pilot_id": 2})
+        with self.source:
+            self.source.execute("DELETE FROM Flights WHERE FlightNumber = 'EK450'")
+        self.assertEqual(self.logged(), [("Flights", "INSERT"), ("Flights", "UPDATE"), ("Flights", "DELETE")])
+
+        result = self.replicator.sync()
+        self.assertEqual((result.changes, result.written, result.deleted), (3, 1, 1))
+        self.assertEqual(self.flights(self.replica), self.flights(self.source))
+        # rows derived by the replica's own triggers follow the applied changes
+        self.assertEqual(check_pilot_availability(self.replica), [])
+        self.assertEqual(self.replica.execute("SELECT rowid FROM FlightNumberSearch WHERE FlightNumberSearch "
+                                              "MATCH 'ZZ1'").fetchall(), [(flight.flight_id,)])
+
+        self.assertEqual(self.replicator.sync().changes, 0)
+
+    def test_a_timezone_change_moves_departures_on_the_replica(self):
+        with self.source:
+            self.source.execute("UPDATE Destinations SET TimeZone = 'GMT+2' WHERE AirportCode = 'CDG'")
+        self.assertEqual(self.logged(), [("Destinations", "UPDATE")])
+        self.replicator.sync()
+        self.assertEqual(self.flights(self.replica), self.flights(self.source))
+        self.assertEqual(self.replica.execute("SELECT DepartureUTC FROM Flights WHERE FlightNumber = 'AF302'")
+                         .fetchone(), ("2025-02-01 10:15:00",))
+
+
+if __name__ == "__main__":
+    unittest.main()
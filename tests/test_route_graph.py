@@ -0,0 +1,81 @@
+import unittest
+
+from flight_service import FlightService
+from route_graph import RouteGraph
+
+
+class RouteGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = RouteGraph(block_minutes=120)
+        self.service = FlightService(":memory:", route_graph=self.graph)
+        for airport in ("AAA", "BBB", "CCC", "XXX"):
+            self.service.add_destination(airport, airport, "Testland", "GMT")
+        # a new database comes with sample flights
+        with self.service.connect:
+            self.service.connect.execute("DELETE FROM Flights")
+
+    def add_flights(self, *flights):
+        # inserted directly, create_flight would refuse a flight number flown on more than one day
+        with self.service.connect:
+            self.service.connect.executemany(
+                "INSERT INTO Flights (FlightNumber, Origin, Destination, DepartureTime, Status) VALUES (?, ?, ?, ?, 'Scheduled')",
+                flights)
+        self.graph.load(self.service)
+
+    def flight_ids(self, flight_number):
+        rows = self.service.connect.execute("SELECT FlightID FROM Flights WHERE FlightNumber = ? ORDER BY FlightID",
+                                            (flight_number,))
+        return [row[0] for row in rows]
+
+    def test_one_flight_number_on_several_days(self):
+        self.add_flights(("FN1", "AAA", "BBB", "2025-01-01 08:00:00"), ("FN1", "AAA", "BBB", "2025-01-02 08:00:00"))
+        self.assertEqual(self.graph.stats()["legs"], 2)
+
+        first, second = self.flight_ids("FN1")
+        result = self.service.amend_flights([{"flight_id": first, "departure_time": "2025-01-01 09:00:00"}])
+        self.assertEqual(len(result.applied), 1)
+        self.assertEqual(self.graph.stats()["legs"], 2)
+        self.assertEqual(self.graph.legs[first].departure_time, "2025-01-01 09:00:00")
+        self.assertEqual(self.graph.legs[second].departure_time, "2025-01-02 08:00:00")
+
+        self.service.amend_flights([{"flight_id": second, "status": "Cancelled"}])
+        self.assertEqual(sorted(self.graph.legs), [first])
+
+    def test_earliest_arrival_keeps_a_later_arrival_that_makes_a_connection(self):
+        # the 06:00 arrival at BBB would wait too long for the 02:00 departure next day, the 16:00 arrival makes it
+        self.add_flights(("AB1", "AAA", "BBB", "2025-01-01 04:00:00"), ("AB2", "AAA", "BBB", "2025-01-01 14:00:00"),
+                         ("BC1", "BBB", "CCC", "2025-01-02 02:00:00"))
+        itinerary = self.graph.earliest_arrival("AAA", "CCC", "2025-01-01 03:00", max_wait_hours=12)
+        self.assertIsNotNone(itinerary)
+        self.assertEqual([leg.flight_number for leg in itinerary.legs], ["AB2", "BC1"])
+
+    def test_fewest_hops_keeps_a_later_arrival_with_more_legs(self):
+        # the direct leg reaches BBB first but too early for BC1, only the two leg way round connects
+        self.add_flights(("AB1", "AAA", "BBB", "2025-01-01 04:00:00"), ("AX1", "AAA", "XXX", "2025-01-01 12:00:00"),
+                         ("XB1", "XXX", "BBB", "2025-01-01 18:00:00"), ("BC1", "BBB", "CCC", "2025-01-02 06:00:00"))
+        itinerary = self.graph.fewest_hops("AAA", "CCC", "2025-01-01 00:00", max_wait_hours=12)
+        self.assertIsNotNone(itinerary)
+        self.assertEqual([leg.flight_number for leg in itinerary.legs], ["AX1", "XB1", "BC1"])
+
+    def test_fewest_hops_prefers_fewer_legs_then_earliest_arrival(self):
+        self.add_flights(("AC1", "AAA", "CCC", "2025-01-01 18:00:00"), ("AC2", "AAA", "CCC", "2025-01-01 10:00:00"),
+                         ("AB1", "AAA", "BBB", "2025-01-01 04:00:00"), ("BC1", "BBB", "CCC", "2025-01-01 07:00:00"))
+        self.assertEqual([leg.flight_number for leg in self.graph.fewest_hops("AAA", "CCC", "2025-01-01 00:00").legs],
+                         ["AC2"])
+        self.assertEqual([leg.flight_number for leg in
+                          self.graph.earliest_arrival("AAA", "CCC", "2025-01-01 00:00").legs], ["AB1", "BC1"])
+
+    def test_an_airport_added_after_the_load_is_known(self):
+        self.add_flights(("AB1", "AAA", "BBB", "2025-01-01 08:00:00"))
+        self.service.add_destination("DDD", "DDD", "Testland", "GMT+2")
+        self.assertEqual(self.graph.offsets["DDD"], 120)
+        self.assertIsNone(self.graph.earliest_arrival("DDD", "AAA", "2025-01-01 00:00"))
+
+        self.service.create_flight("DA1", "DDD", "AAA", "2025-01-01 10:00:00")
+        itinerary = self.graph.earliest_arrival("DDD", "AAA", "2025-01-01 00:00")
+        self.assertEqual([leg.flight_number for leg in itinerary.legs], ["DA1"])
+        self.assertEqual(itinerary.legs[0].departure_time, "2025-01-01 10:00:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from flight_service import FlightService
+from schedule_validation import ScheduleValidator
+
+
+class ScheduleValidatorTest(unittest.TestCase):
+    def setUp(self):
+        # a new database comes with LHR (GMT) and JFK (GMT-5) among its sample airports
+        self.service = FlightService(":memory:")
+        self.service.add_destination("TKY", "Tokyo", "Japan", "GMT+9")
+        self.service.add_pilot("Ada", "Lovelace", "TEST01")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def validate(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        return ScheduleValidator(self.service, processes=1, partitions=2).validate(path)
+
+    def test_malformed_json_lines_are_invalid_rows(self):
+        report = self.validate("season.jsonl", "\n".join([
+            '{"FlightNumber": "TS100", "Origin": "LHR", "Destination": "JFK", "DepartureTime": "2031-01-01 08:00"}',
+            '{"FlightNumber": "TS101", "Origin": "LHR"',
+            '["TS102", "LHR", "JFK"]',
+            '{"FlightNumber": "TS103", "Origin": "JFK", "Destination": "LHR", "DepartureTime": "2031-01-02 08:00"}',
+        ]) + "\n")
+        self.assertEqual(report.rows, 4)
+        self.assertEqual([(error.row, error.check, error.detail) for error in report.errors],
+                         [(2, "invalid row", "malformed json line"), (3, "invalid row", "malformed json line")])
+
+    def test_values_that_are_not_strings_are_invalid_rows(self):
+        report = self.validate("season.jsonl", "\n".join([
+            '{"FlightNumber": "TS110", "Origin": "LHR", "Destination": "JFK", "DepartureTime": "2031-01-01 08:00", '
+            '"Status": 1}',
+            '{"FlightNumber": "TS111", "Origin": "LHR", "Destination": "JFK", "DepartureTime": "2031-01-01 08:00", '
+            '"PilotLicense": 123}',
+        ]) + "\n")
+        self.assertEqual([(error.row, error.check) for error in report.errors],
+                         [(1, "invalid row"), (2, "invalid row")])
+
+    def test_a_duplicate_takes_no_pilot_time(self):
+        report = self.validate("season.csv", "\n".join([
+            "FlightNumber,Origin,Destination,DepartureTime,Status,PilotLicense",
+            "TS300,LHR,JFK,2031-01-01 10:00,Scheduled,",
+            "TS300,LHR,JFK,2031-01-01 11:00,Scheduled,TEST01",
+            "TS301,LHR,JFK,2031-01-01 12:00,Scheduled,TEST01",
+        ]) + "\n")
+        self.assertEqual([(error.row, error.check) for error in report.errors], [(2, "duplicate flight number")])
+
+    def test_pilot_conflicts_are_measured_in_utc(self):
+        # Tokyo 23:30 is 14:30 UTC, within 12 hours of London 10:00; JFK 23:30 is 04:30 UTC the next day
+        report = self.validate("season.csv", "\n".join([
+            "FlightNumber,Origin,Destination,DepartureTime,Status,PilotLicense",
+            "TS200,LHR,JFK,2031-01-01 10:00,Scheduled,TEST01",
+            "TS201,TKY,LHR,2031-01-01 23:30,Scheduled,TEST01",
+            "TS202,JFK,LHR,2031-01-01 23:30,Scheduled,TEST01",
+        ]) + "\n")
+        self.assertEqual([(error.row, error.check) for error in report.errors], [(2, "pilot conflict")])
+
+
+if __name__ == "__main__":
+    unittest.main()